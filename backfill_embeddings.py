@@ -1,40 +1,97 @@
 import asyncio
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Load .env file directly - no export needed on Windows
-from dotenv import load_dotenv
-load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+from sqlalchemy import select, update, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows fetched per server-side cursor round-trip
+YIELD_PER = 500
+# Rows per transaction — each COMMIT is a WAL flush, so batch several chunks into one
+COMMIT_EVERY = 500
+
+
+def _load_env():
+    """Merge .env into os.environ without overriding variables that are already set
+    (e.g. in a container) — no export needed on Windows."""
+    from dotenv import dotenv_values
+    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    for key, value in dotenv_values(env_path).items():
+        if value is not None:
+            os.environ.setdefault(key, value)
 
-from database import async_session_maker  
-from models import Message
-from services.embedding_service import embedding_service
-from sqlalchemy import select, update
 
 async def backfill():
-    async with async_session_maker() as db:
-        result = await db.execute(
-            select(Message).where(Message.embedding == None)
-        )
-        messages = result.scalars().all()
-        print(f"Backfilling {len(messages)} messages...")
-        
-        if not messages:
-            print("No messages need backfilling!")
-            return
-        
-        for i, msg in enumerate(messages):
-            text = f"{msg.content} {msg.summary or ''}".strip()
-            embedding = embedding_service.embed(text)
-            await db.execute(
-                update(Message).where(Message.id == msg.id).values(embedding=embedding)
+    # Imported here: database.py and the embedding singleton read env vars at import
+    from database import async_session_maker, engine
+    from models import Message
+    from services.embedding_service import embedding_service, MAX_BATCH_SIZE
+
+    # One batchEmbedContents call + one bulk UPDATE per chunk
+    chunk_size = MAX_BATCH_SIZE
+
+    # Separate sessions: committing on the reader would close its server-side cursor.
+    # The writer gets a dedicated connection so the session-level SET below sticks.
+    async with async_session_maker() as reader, engine.connect() as write_conn:
+        # Safe for this idempotent one-off (a lost tail is re-selected on the next run);
+        # never set this for production writes.
+        await write_conn.execute(text("SET synchronous_commit = off"))
+        await write_conn.commit()
+        async with AsyncSession(bind=write_conn, expire_on_commit=False) as writer:
+            pending = Message.embedding.is_(None)
+            total = await reader.scalar(select(func.count()).select_from(Message).where(pending))
+            print(f"Backfilling {total} messages...")
+
+            if not total:
+                print("No messages need backfilling!")
+                return
+
+            stream = await reader.stream(
+                select(Message.id, Message.content, Message.summary)
+                .where(pending)
+                .execution_options(yield_per=YIELD_PER)
             )
-            if i % 50 == 0:
-                await db.commit()
-                print(f"  {i}/{len(messages)} done")
-        
-        await db.commit()
+            done = uncommitted = 0
+
+            async def flush(chunk, embeddings):
+                nonlocal done, uncommitted
+                # executemany of UPDATE ... WHERE id = :id — one round-trip for the whole chunk
+                await writer.execute(
+                    update(Message),
+                    [{"id": r.id, "embedding": e} for r, e in zip(chunk, embeddings)],
+                )
+                done += len(chunk)
+                uncommitted += len(chunk)
+                if uncommitted >= COMMIT_EVERY:
+                    await writer.commit()
+                    uncommitted = 0
+                    print(f"  {done}/{total} done")
+
+            # Two-stage pipeline: embed chunk N+1 while chunk N's UPDATE is in flight
+            pending_flush = None
+            async for chunk in stream.partitions(chunk_size):
+                texts = [f"{r.content} {r.summary or ''}".strip() for r in chunk]
+                if pending_flush is None:
+                    embeddings = await embedding_service.aembed_batch(texts)
+                else:
+                    embeddings, _ = await asyncio.gather(
+                        embedding_service.aembed_batch(texts), pending_flush,
+                    )
+                pending_flush = flush(chunk, embeddings)
+            if pending_flush is not None:
+                await pending_flush
+            await writer.commit()
+
         print("✓ Backfill complete")
 
-asyncio.run(backfill())
\ No newline at end of file
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    _load_env()
+    try:
+        import uvloop  # ships with uvicorn[standard]; absent on Windows
+    except ImportError:
+        asyncio.run(backfill())
+    else:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(backfill())
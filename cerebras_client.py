@@ -14,7 +14,6 @@ Save as: cerebras_client.py
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import re
 from typing import Any, Dict, List, Optional
@@ -22,6 +21,8 @@ import hashlib
 from functools import lru_cache
 
 import httpx
+import orjson
+from loguru import logger
 
 CEREBRAS_BASE_URL   = "https://api.cerebras.ai/v1"
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
@@ -34,21 +35,52 @@ GEMINI_DEFAULT_MODEL     = "gemini-2.5-flash-lite"
 GEMINI_LITE_MODEL        = "gemini-2.5-flash-lite"
 GEMINI_FALLBACK_MODELS   = ["gemini-3.1-flash-lite", "gemini-2.5-flash"]
 
+# JSON-only guidance lives in the system role once per request — chat() no longer
+# re-appends it to every user prompt. Built once at import, shared by every call.
+_GEMINI_SYSTEM_INSTRUCTION = {
+    "parts": [{"text": (
+        "You are a precise assistant. "
+        "When asked for JSON, output ONLY the JSON object — "
+        "no markdown, no explanation, no ``` fences."
+    )}]
+}
+_OPENAI_SYSTEM_MSG = {
+    "role": "system",
+    "content": (
+        "You are a precise assistant. "
+        "When asked for JSON, return ONLY valid JSON with no extra text."
+    ),
+}
+
+# Leading ```/```json fence and trailing ``` fence, with surrounding whitespace
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
 _response_cache: dict = {}  # simple TTL-less cache for identical prompts
 
 _shared_async_client = None
 
-def _http_client() -> httpx.AsyncClient:
+def shared_http_client() -> httpx.AsyncClient:
     """Lazily-created shared AsyncClient — reused across calls to avoid a new TLS
     handshake per LLM request. Per-request timeouts are passed at the call site."""
     global _shared_async_client
     if _shared_async_client is None or _shared_async_client.is_closed:
         _shared_async_client = httpx.AsyncClient(
-            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0
+            ),
         )
     return _shared_async_client
 
 
+async def aclose_http_client() -> None:
+    """Close the shared AsyncClient — called from the FastAPI lifespan on shutdown."""
+    global _shared_async_client
+    if _shared_async_client is not None and not _shared_async_client.is_closed:
+        await _shared_async_client.aclose()
+    _shared_async_client = None
+
+
 import time
 _last_request_time: float = 0.0
 _min_request_gap: float = 0.0  # rely on 429 retry backoff; proactive throttle removed
@@ -104,18 +136,12 @@ class CerebrasClient:
         if cache_key in _response_cache:
             return _response_cache[cache_key]
 
-        if "Return ONLY" not in prompt and "Return ONLY this JSON" not in prompt:
-            prompt += (
-                "\n\nIMPORTANT: Return ONLY valid JSON. "
-                "No markdown, no ``` fences, no extra text before or after the JSON object."
-            )
-
         text = await self._chat_completion(prompt, max_tokens, temperature)
         text = self._clean_json(text)
 
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
             # Try to extract JSON from messy response
             extracted = self._extract_json(text)
             if extracted:
@@ -125,7 +151,7 @@ class CerebrasClient:
                     _response_cache.clear()
 
                 return extracted
-            print(f"[CerebrasClient] JSON parse failed. Raw: {text[:300]}")
+            logger.warning("[CerebrasClient] JSON parse failed. Raw: {}", text[:300])
             return {"error": "parse_failed", "raw": text[:300]}
 
     async def _chat_completion(
@@ -166,13 +192,7 @@ class CerebrasClient:
             if json_mode:
                 gen_config["responseMimeType"] = "application/json"
             payload = {
-                "system_instruction": {
-                    "parts": [{"text": (
-                        "You are a precise assistant. "
-                        "When asked for JSON, output ONLY the JSON object — "
-                        "no markdown, no explanation, no ``` fences."
-                    )}]
-                },
+                "system_instruction": _GEMINI_SYSTEM_INSTRUCTION,
                 "contents": [{"parts": [{"text": prompt}]}],
                 "generationConfig": gen_config,
             }
@@ -180,33 +200,33 @@ class CerebrasClient:
             delays = [2, 5, 15]
             for attempt in range(4):
                 try:
-                    resp = await _http_client().post(url, headers=headers, json=payload, timeout=30.0)
+                    resp = await shared_http_client().post(url, headers=headers, content=orjson.dumps(payload), timeout=30.0)
 
                     if resp.status_code == 429:
                         # Check if this is a hard limit=0 (deprecated model) vs a soft rate limit
                         try:
-                            body = resp.json()
+                            body = orjson.loads(resp.content)
                             msg = body.get("error", {}).get("message", "")
                             if "limit: 0" in msg:
-                                print(f"[gemini] {model} free tier quota is 0 — trying next model")
+                                logger.warning("[gemini] {} free tier quota is 0 — trying next model", model)
                                 break  # skip to next model immediately
                         except Exception:
                             pass
                         retry_after = int(resp.headers.get("Retry-After", delays[min(attempt, 2)]))
-                        print(f"[gemini] 429 rate limit on {model} — waiting {retry_after}s (attempt {attempt+1})")
+                        logger.warning("[gemini] 429 rate limit on {} — waiting {}s (attempt {})", model, retry_after, attempt+1)
                         await asyncio.sleep(retry_after)
                         continue
 
                     resp.raise_for_status()
                     if model != primary:
-                        print(f"[gemini] using fallback model {model}")
-                    return resp.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
+                        logger.info("[gemini] using fallback model {}", model)
+                    return orjson.loads(resp.content)["candidates"][0]["content"]["parts"][0]["text"].strip()
 
                 except httpx.HTTPStatusError as e:
                     if e.response.status_code in (500, 503) and attempt < 3:
                         await asyncio.sleep(delays[min(attempt, 2)])
                         continue
-                    print(f"[gemini] HTTP {e.response.status_code} on {model}: {e.response.text[:200]}")
+                    logger.warning("[gemini] HTTP {} on {}: {}", e.response.status_code, model, e.response.text[:200])
                     raise
                 except Exception as e:
                     if attempt < 3:
@@ -249,8 +269,8 @@ class CerebrasClient:
 
         text = self._clean_json(text)
         try:
-            result = json.loads(text)
-        except json.JSONDecodeError:
+            result = orjson.loads(text)
+        except orjson.JSONDecodeError:
             result = self._extract_json(text) or {"error": "parse_failed"}
 
         _response_cache[cache_key] = result
@@ -270,16 +290,7 @@ class CerebrasClient:
         for model in models_to_try:
             payload = {
                 "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a precise assistant. "
-                            "When asked for JSON, return ONLY valid JSON with no extra text."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                "messages": [_OPENAI_SYSTEM_MSG, {"role": "user", "content": prompt}],
                 "max_tokens": max_tokens,
                 "temperature": temperature,
             }
@@ -287,28 +298,28 @@ class CerebrasClient:
             for attempt in range(3):
                 try:
                     t0 = time.monotonic()
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        resp = await client.post(
-                            f"{self.base_url}/chat/completions",
-                            headers=headers,
-                            json=payload,
-                        )
-                        resp.raise_for_status()
-
-                        data = resp.json()
-                        choices = data.get("choices", [])
-                        if not choices:
-                            print(f"[cerebras] Empty choices for model {model}: {data}")
-                            break  # try next model
-
-                        content = choices[0].get("message", {}).get("content")
-                        if not content:
-                            print(f"[cerebras] No content for model {model}")
-                            break  # try next model
-
-                        elapsed = time.monotonic() - t0
-                        print(f"[cerebras] model={model} tokens≤{max_tokens} → {elapsed:.2f}s")
-                        return content.strip()
+                    resp = await shared_http_client().post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        content=orjson.dumps(payload),
+                        timeout=30.0,
+                    )
+                    resp.raise_for_status()
+
+                    data = orjson.loads(resp.content)
+                    choices = data.get("choices", [])
+                    if not choices:
+                        logger.warning("[cerebras] Empty choices for model {}: {}", model, data)
+                        break  # try next model
+
+                    content = choices[0].get("message", {}).get("content")
+                    if not content:
+                        logger.warning("[cerebras] No content for model {}", model)
+                        break  # try next model
+
+                    elapsed = time.monotonic() - t0
+                    logger.info("[cerebras] model={} tokens≤{} → {:.2f}s", model, max_tokens, elapsed)
+                    return content.strip()
 
                 except httpx.HTTPStatusError as e:
                     if e.response.status_code in (429, 500) and attempt < 2:
@@ -316,7 +327,7 @@ class CerebrasClient:
                         continue
                     if e.response.status_code in (400, 404):
                         # Model doesn't exist or bad request — skip to next model immediately
-                        print(f"[cerebras] Model {model} failed ({e.response.status_code}), trying next...")
+                        logger.warning("[cerebras] Model {} failed ({}), trying next...", model, e.response.status_code)
                         break
                     raise
                 except Exception as e:
@@ -325,7 +336,7 @@ class CerebrasClient:
                         continue
                     raise
 
-        print("[cerebras] All models exhausted, returning empty")
+        logger.warning("[cerebras] All models exhausted, returning empty")
         return "{}"
     # ──────────────────────────────────────────────────────────────
     # Helpers
@@ -339,20 +350,14 @@ class CerebrasClient:
         return h
 
     def _clean_json(self, text: str) -> str:
-        text = text.strip()
-        # Strip markdown fences
-        for fence in ("```json", "```"):
-            if text.startswith(fence):
-                text = text[len(fence):]
-                break
-        if text.endswith("```"):
-            text = text[:-3]
+        # Strip markdown fences in one pass
+        text = _FENCE_RE.sub("", text)
         # Extract first JSON object or array
-        for start_char, end_char in [('{', '}'), ('[', ']')]:
+        for start_char, end_char in (('{', '}'), ('[', ']')):
             s = text.find(start_char)
             e = text.rfind(end_char)
-            if s != -1 and e != -1 and e > s:
-                return text[s:e + 1].strip()
+            if s != -1 and e > s:
+                return text[s:e + 1]
         return text.strip()
 
     def _extract_json(self, text: str) -> Optional[Dict]:
@@ -366,8 +371,8 @@ class CerebrasClient:
             m = re.search(pattern, text, re.DOTALL)
             if m:
                 try:
-                    return json.loads(m.group())
-                except json.JSONDecodeError:
+                    return orjson.loads(m.group())
+                except orjson.JSONDecodeError:
                     continue
         return None
 
@@ -399,10 +404,9 @@ class CerebrasClient:
             }],
             "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature},
         }
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, headers=headers, json=payload, timeout=30.0)
-            resp.raise_for_status()
-            return resp.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
+        resp = await shared_http_client().post(url, headers=headers, content=orjson.dumps(payload), timeout=30.0)
+        resp.raise_for_status()
+        return orjson.loads(resp.content)["candidates"][0]["content"]["parts"][0]["text"].strip()
 
     async def categorize_message(self, content, existing_categories, message_type="text"):
         categories_text = ", ".join(existing_categories) if existing_categories else "None yet"
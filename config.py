@@ -58,8 +58,18 @@ class Config:
     APPLE_KEY_ID = os.getenv("APPLE_KEY_ID", "")
     APPLE_PRIVATE_KEY = os.getenv("APPLE_PRIVATE_KEY", "").replace("\\n", "\n")
 
+    # APNs push (reminders, group messages). APNS_BUNDLE_ID doubles as the app's bundle
+    # id for App Store Server notification checks in iap_service.
+    APNS_KEY_ID = os.getenv("APNS_KEY_ID", "")
+    APNS_TEAM_ID = os.getenv("APNS_TEAM_ID", "")
+    APNS_AUTH_KEY = os.getenv("APNS_AUTH_KEY", "")
+    APNS_BUNDLE_ID = os.getenv("APNS_BUNDLE_ID", "")
+    APNS_PRODUCTION = os.getenv("APNS_PRODUCTION", "false").lower() == "true"
+
     # Application
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+    ADMIN_SECRET = os.getenv("ADMIN_SECRET", "")           # guards /api/admin/* (empty = admin disabled)
+    PUBLIC_DOMAIN = os.getenv("RAILWAY_PUBLIC_DOMAIN", "")  # host used for absolute image URLs
 
     @classmethod
     def validate_config(cls):
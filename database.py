@@ -4,13 +4,16 @@ Database models using SQLAlchemy with PostgreSQL (Railway)
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, DateTime, ForeignKey, Enum as SQLEnum, Integer, Boolean, LargeBinary, UniqueConstraint
+from sqlalchemy import String, Text, DateTime, ForeignKey, Enum as SQLEnum, Integer, Boolean, LargeBinary, UniqueConstraint, Index, desc, func, text, SmallInteger
 from sqlalchemy.dialects.postgresql import JSON, JSONB
 from datetime import datetime
 from typing import Optional, List, AsyncGenerator
 from pgvector.sqlalchemy import Vector
+import asyncio
 import enum
 import os
+import re
+from loguru import logger
 
 
 # Database URL from environment (Railway PostgreSQL)
@@ -27,22 +30,54 @@ if DATABASE_URL.startswith("postgresql://"):
 elif DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
 
+# Single uvicorn process, so this is the whole app's share of Postgres connections —
+# tunable per deploy without touching code (scripts/backfills open their own engines)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+_CONNECT_ARGS = {
+    "ssl": False,     # Railway internal networking — no SSL needed
+    "timeout": 30,
+    "command_timeout": 60,
+    # The app issues a small set of repeated query shapes — keep them prepared
+    # per connection (asyncpg cache) and skip SQLAlchemy's re-prepare (adapter cache).
+    "statement_cache_size": 1024,
+    "prepared_statement_cache_size": 512,
+    "server_settings": {
+        "application_name": "extended_brain",
+        # JIT compilation only pays off for long analytic queries; for short OLTP
+        # queries it adds planning latency.
+        "jit": "off",
+    },
+}
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     future=True,
     pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10,
-    connect_args={
-        "ssl": False,     # Railway internal networking — no SSL needed
-        "timeout": 30,
-        "server_settings": {
-            "application_name": "extended_brain",
-        },
-    },
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=1800,    # recycle before Railway's proxy idles out long-lived connections
+    connect_args=_CONNECT_ARGS,
 )
 
+async def warm_pool() -> None:
+    """Open DB_POOL_SIZE connections up front so the first requests after a deploy don't
+    each pay connect + auth. All are checked out at once (one at a time the pool would just
+    hand the same connection back), then returned to the pool idle."""
+    async def _open():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    conns = await asyncio.gather(*(_open() for _ in range(DB_POOL_SIZE)), return_exceptions=True)
+    opened = [c for c in conns if not isinstance(c, BaseException)]
+    for conn in opened:
+        await conn.close()
+    logger.info("✓ DB pool warmed ({}/{} connections)", len(opened), DB_POOL_SIZE)
+
+
 # Create session maker
 async_session_maker = async_sessionmaker(
     engine,
@@ -53,11 +88,25 @@ async_session_maker = async_sessionmaker(
 
 # Base class for models
 class Base(DeclarativeBase):
-    pass
+    # Fetch server-generated timestamps via RETURNING on INSERT/UPDATE so they are
+    # readable after flush without a lazy refresh (which async sessions can't do).
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# Timestamps are generated by Postgres rather than per-row datetime.utcnow() calls.
+# Columns stay naive UTC (TIMESTAMP WITHOUT TIME ZONE) to match every comparison in
+# the codebase, hence now() AT TIME ZONE 'utc' rather than bare now().
+UTC_NOW = text("(now() AT TIME ZONE 'utc')")          # server_default (DDL)
+UTC_NOW_SQL = func.timezone("utc", func.now())          # onupdate (inlined into the UPDATE)
+_UTC_NOW_DEPARSED = "timezone('utc'::text, now())"      # UTC_NOW as information_schema reports it
 
 
 # Enums
-class MessageType(enum.Enum):
+# str mixin: members compare equal to their values ("text"), so callers can test
+# msg.message_type == "text" without constructing enum instances. Postgres stores the
+# member *names* (TEXT, IMAGE, …) as the native enum labels — don't add values_callable
+# without migrating the messagetype type, or existing rows stop loading.
+class MessageType(str, enum.Enum):
     TEXT = "text"
     IMAGE = "image"
     AUDIO = "audio"
@@ -77,7 +126,7 @@ class User(Base):
     
     # Personal Information
     name: Mapped[str] = mapped_column(String(100))
-    age: Mapped[int] = mapped_column(Integer)
+    age: Mapped[int] = mapped_column(SmallInteger)
     occupation: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, default="")
     
     # Authentication
@@ -94,11 +143,11 @@ class User(Base):
     active_group_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     
     # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow
+        server_default=UTC_NOW,
+        onupdate=UTC_NOW_SQL,
     )
     last_login: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
@@ -134,8 +183,8 @@ class DeviceToken(Base):
     user_id:    Mapped[int]      = mapped_column(ForeignKey("users.id"), index=True)
     token:      Mapped[str]      = mapped_column(String(255), unique=True, index=True)
     platform:   Mapped[str]      = mapped_column(String(20), default="ios")
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW_SQL)
 
     def __repr__(self):
         return f"<DeviceToken user={self.user_id} token={self.token[:8]}...>"
@@ -144,14 +193,19 @@ class DeviceToken(Base):
 class OTPVerification(Base):
     """Store OTP codes for phone verification"""
     __tablename__ = "otp_verifications"
+    # Every OTP query filters on phone_number (+ is_verified) and wants the newest row;
+    # this answers them from the index without a sort, and covers plain phone lookups.
+    __table_args__ = (
+        Index("idx_otp_phone_verified_created", "phone_number", "is_verified", desc("created_at")),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    phone_number: Mapped[str] = mapped_column(String(20), index=True)
+    phone_number: Mapped[str] = mapped_column(String(20))
     otp_code: Mapped[str] = mapped_column(String(20))
     is_verified: Mapped[bool] = mapped_column(default=False)
-    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0)
     expires_at: Mapped[datetime] = mapped_column(DateTime)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     
     def __repr__(self):
         return f"<OTP {self.phone_number} - {self.otp_code}>"
@@ -166,11 +220,11 @@ class Category(Base):
     description: Mapped[Optional[str]] = mapped_column(Text)
     color: Mapped[Optional[str]] = mapped_column(String(7))  # Hex color
     icon: Mapped[Optional[str]] = mapped_column(String(50))
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow
+        server_default=UTC_NOW,
+        onupdate=UTC_NOW_SQL,
     )
     
     # Relationships
@@ -186,9 +240,14 @@ class Category(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    # Serves the hot "my feed" shape (WHERE user_id = ? ORDER BY created_at DESC)
+    # without a sort node, and covers plain user_id lookups as its leading column.
+    __table_args__ = (
+        Index("idx_messages_user_created", "user_id", desc("created_at")),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     category_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id"), index=True)
     group_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
     assigned_to_user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -209,11 +268,11 @@ class Message(Base):
     
     # Timestamps
     original_timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, index=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow
+        server_default=UTC_NOW,
+        onupdate=UTC_NOW_SQL,
     )
     
     # Relationships
@@ -233,7 +292,7 @@ class ProAccount(Base):
     plan_type: Mapped[str] = mapped_column(String(20), default="pro")
     max_members: Mapped[int] = mapped_column(Integer, default=10)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     owner: Mapped["User"] = relationship("User", back_populates="pro_account", foreign_keys=[owner_id])
     members: Mapped[List["ProAccountMember"]] = relationship(
@@ -255,7 +314,7 @@ class ProAccountMember(Base):
     invited_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
     invite_token: Mapped[str] = mapped_column(String(64), unique=True, index=True)
     status: Mapped[str] = mapped_column(String(20), default="pending")
-    invited_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    invited_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     joined_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     account: Mapped["ProAccount"] = relationship("ProAccount", back_populates="members")
@@ -281,7 +340,7 @@ class Group(Base):
     # Per-group member cap (includes the creator/admin).
     max_members: Mapped[int] = mapped_column(Integer, default=10)
     created_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     account: Mapped["ProAccount"] = relationship("ProAccount", back_populates="groups")
     members: Mapped[List["GroupMember"]] = relationship(
@@ -297,7 +356,7 @@ class GroupMember(Base):
     group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     role: Mapped[str] = mapped_column(String(20), default="member")
-    joined_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    joined_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     group: Mapped["Group"] = relationship("Group", back_populates="members")
     user: Mapped["User"] = relationship("User", back_populates="group_memberships")
@@ -318,7 +377,7 @@ class CouponCode(Base):
     uses_count: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     redemptions: Mapped[List["CouponRedemption"]] = relationship(
         "CouponRedemption", back_populates="coupon", cascade="all, delete-orphan"
@@ -332,7 +391,7 @@ class CouponRedemption(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     coupon_id: Mapped[int] = mapped_column(ForeignKey("coupon_codes.id"), index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
-    redeemed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    redeemed_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     coupon: Mapped["CouponCode"] = relationship("CouponCode", back_populates="redemptions")
     user: Mapped["User"] = relationship("User")
@@ -346,7 +405,7 @@ class GroupLastSeen(Base):
     id:           Mapped[int]      = mapped_column(primary_key=True)
     user_id:      Mapped[int]      = mapped_column(ForeignKey("users.id"), index=True)
     group_id:     Mapped[int]      = mapped_column(Integer, index=True)
-    last_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 class LabelAnnotation(Base):
@@ -370,7 +429,7 @@ class LabelAnnotation(Base):
     label:      Mapped[str]      = mapped_column(String(50), nullable=False)
     # "user_correction" | "manual"
     source:     Mapped[str]      = mapped_column(String(30), default="user_correction")
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, index=True)
 
     user: Mapped["User"] = relationship("User")
 
@@ -386,7 +445,7 @@ class IAPTransaction(Base):
     product_id: Mapped[str] = mapped_column(String(100), nullable=False)
     environment: Mapped[str] = mapped_column(String(20), default="Production")  # Production | Sandbox
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 class PaymentOrder(Base):
@@ -400,7 +459,7 @@ class PaymentOrder(Base):
     plan: Mapped[str] = mapped_column(String(20), nullable=False)    # "monthly" | "annual"
     amount: Mapped[int] = mapped_column(Integer, nullable=False)      # paise
     status: Mapped[str] = mapped_column(String(20), default="created")  # created | paid | failed
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 class StoredImage(Base):
@@ -411,7 +470,7 @@ class StoredImage(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     data: Mapped[bytes] = mapped_column(LargeBinary)
     mime_type: Mapped[str] = mapped_column(String(50), default="image/jpeg")
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     user: Mapped["User"] = relationship("User")
 
@@ -432,16 +491,48 @@ class AnalyticsEvent(Base):
     platform:    Mapped[Optional[str]]  = mapped_column(String(20), nullable=True)               # "ios" | "web"
     app_version: Mapped[Optional[str]]  = mapped_column(String(20), nullable=True)
     client_ts:   Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)             # event time on device
-    created_at:  Mapped[datetime]       = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    created_at:  Mapped[datetime]       = mapped_column(DateTime, server_default=UTC_NOW, index=True)
 
 
 # Database initialization
+# Whether the halfvec ANN index is in use (pgvector ≥ 0.7 and the index built). Set by init_db;
+# search_service picks its candidate ORDER BY from it.
+HALFVEC_ANN = False
+# Whether messages.tsv (generated full-text column) exists. Set by init_db; search_service
+# only adds its full-text CTE when it does.
+TSV_SEARCH = False
+
+
 async def init_db():
     """Create all tables and apply safe column migrations."""
-    async with engine.begin() as conn:
+    from sqlalchemy.pool import NullPool
+    # Index builds, the tsv rewrite and the SMALLINT conversions can outlast the request
+    # command_timeout — run the DDL on its own unpooled connection with no client timeout.
+    ddl_engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={**_CONNECT_ARGS, "command_timeout": None},
+    )
+    try:
+        await _apply_migrations(ddl_engine)
+    finally:
+        await ddl_engine.dispose()
+
+
+async def _apply_migrations(ddl_engine):
+    from sqlalchemy import text as sa_text
+    async with ddl_engine.begin() as conn:
+        # Message.embedding is a pgvector column — the type must exist before create_all
+        await conn.execute(sa_text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.create_all)
+        # halfvec (and its HNSW opclass) arrived in pgvector 0.7 — older installs keep fp32 ANN
+        global HALFVEC_ANN, TSV_SEARCH
+        version = await conn.scalar(sa_text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        m = re.match(r"(\d+)\.(\d+)", version or "")
+        halfvec_ok = bool(m) and (int(m.group(1)), int(m.group(2))) >= (0, 7)
+        if not halfvec_ok:
+            logger.warning("[migration] pgvector {} < 0.7 — semantic search stays on the fp32 index", version)
         # Safe migrations for columns added after initial deploy
-        from sqlalchemy import text as sa_text
         migrations = [
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_pro BOOLEAN DEFAULT FALSE",
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS active_group_id INTEGER",
@@ -454,6 +545,12 @@ async def init_db():
             "CREATE TABLE IF NOT EXISTS group_last_seen (id SERIAL PRIMARY KEY, user_id INTEGER REFERENCES users(id), group_id INTEGER, last_seen_at TIMESTAMP DEFAULT NOW(), UNIQUE(user_id, group_id))",
             # Performance indexes
             "CREATE INDEX IF NOT EXISTS idx_messages_user_created ON messages(user_id, created_at DESC)",
+            # Leading-column prefix of idx_messages_user_created — pure write amplification
+            "DROP INDEX IF EXISTS ix_messages_user_id",
+            "CREATE INDEX IF NOT EXISTS idx_otp_phone_verified_created ON otp_verifications(phone_number, is_verified, created_at DESC)",
+            # Prefixes of idx_otp_phone_verified_created (model index + migrate_database.py's)
+            "DROP INDEX IF EXISTS ix_otp_verifications_phone_number",
+            "DROP INDEX IF EXISTS idx_otp_phone",
             # Trigram GIN indexes accelerate the fast-search ILIKE (lower(col) LIKE '%term%'),
             # which otherwise can't use a btree because of the leading wildcard. Matches the
             # expression used in search_service (`func.lower(Message.content).contains(...)`).
@@ -469,6 +566,16 @@ async def init_db():
             "CREATE EXTENSION IF NOT EXISTS pg_trgm",
             "CREATE INDEX IF NOT EXISTS idx_messages_content_trgm ON messages USING gin (lower(content) gin_trgm_ops)",
             "CREATE INDEX IF NOT EXISTS idx_messages_summary_trgm ON messages USING gin (lower(summary) gin_trgm_ops)",
+            # Partial index over rows still missing an embedding — the backfill / admin re-embed
+            # scans become index scans that shrink to nothing as rows get embedded. Keyed on
+            # created_at DESC so /api/admin/reembed's newest-first LIMIT needs no sort.
+            "CREATE INDEX IF NOT EXISTS ix_messages_embedding_null ON messages(created_at DESC) WHERE embedding IS NULL",
+            # Full-text side of hybrid search (search_service._retrieve fuses it with the vector
+            # rank). Stored generated column so writes keep it current with no app code; adding
+            # it rewrites the table once, like the SMALLINT conversions below. Not mapped on the
+            # ORM model — only raw SQL reads it. Same inline-build TRIPWIRE as above.
+            "ALTER TABLE messages ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, '') || ' ' || coalesce(summary, ''))) STORED",
+            "CREATE INDEX IF NOT EXISTS idx_messages_tsv ON messages USING gin (tsv)",
             "CREATE INDEX IF NOT EXISTS idx_messages_group_created ON messages(group_id, created_at DESC) WHERE group_id IS NOT NULL",
             "CREATE INDEX IF NOT EXISTS idx_messages_assigned ON messages(assigned_to_user_id) WHERE assigned_to_user_id IS NOT NULL",
             "CREATE INDEX IF NOT EXISTS idx_group_last_seen_lookup ON group_last_seen(user_id, group_id)",
@@ -477,6 +584,10 @@ async def init_db():
             "CREATE TABLE IF NOT EXISTS label_annotations (id SERIAL PRIMARY KEY, user_id INTEGER REFERENCES users(id), message_id INTEGER REFERENCES messages(id), text TEXT NOT NULL, label VARCHAR(50) NOT NULL, source VARCHAR(30) DEFAULT 'user_correction', created_at TIMESTAMP DEFAULT NOW())",
             "CREATE INDEX IF NOT EXISTS idx_label_annotations_user ON label_annotations(user_id)",
             "ALTER TABLE users ALTER COLUMN occupation DROP NOT NULL",
+            # Narrow small counters to 2 bytes. Type changes rewrite the table, so guard on the
+            # current type to keep every later startup a no-op.
+            "DO $$ BEGIN IF (SELECT data_type FROM information_schema.columns WHERE table_name = 'users' AND column_name = 'age') = 'integer' THEN ALTER TABLE users ALTER COLUMN age TYPE SMALLINT USING age::smallint; END IF; END $$",
+            "DO $$ BEGIN IF (SELECT data_type FROM information_schema.columns WHERE table_name = 'otp_verifications' AND column_name = 'attempts') = 'integer' THEN ALTER TABLE otp_verifications ALTER COLUMN attempts TYPE SMALLINT USING attempts::smallint; END IF; END $$",
             "ALTER TABLE pro_account_members ALTER COLUMN phone_number TYPE VARCHAR(100)",
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS google_uid VARCHAR(128)",
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS apple_uid VARCHAR(128)",
@@ -494,31 +605,81 @@ async def init_db():
             # Group profile photo (WhatsApp-style avatar)
             "ALTER TABLE groups ADD COLUMN IF NOT EXISTS photo_url VARCHAR(500)",
         ]
+        if halfvec_ok:
+            # ANN index for semantic search, built over the fp16 projection of the embedding:
+            # half the bytes per graph node, so twice as much of the index stays in
+            # shared_buffers. search_service._retrieve orders by the same expression for
+            # candidates, then re-ranks them on the full-precision column. Replaces the fp32
+            # messages_embedding_hnsw and the hand-built ivfflat idx_messages_embedding — but
+            # the drops only run once the halfvec index exists and is valid, so a failed or
+            # timed-out build never leaves search without an ANN index.
+            # Same inline-build TRIPWIRE as above applies.
+            migrations += [
+                "CREATE INDEX IF NOT EXISTS messages_embedding_hnsw_half ON messages USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)",
+                "DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = 'messages_embedding_hnsw_half' AND i.indisvalid) THEN DROP INDEX IF EXISTS messages_embedding_hnsw; DROP INDEX IF EXISTS idx_messages_embedding; END IF; END $$",
+            ]
+        else:
+            # pgvector < 0.7: fp32 HNSW over the raw column (HNSW itself needs ≥ 0.5)
+            migrations.append(
+                "CREATE INDEX IF NOT EXISTS messages_embedding_hnsw ON messages USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+            )
+        # Timestamp defaults moved from Python (datetime.utcnow) to Postgres; tables created
+        # before that have no column DEFAULT, so attach it to every server-defaulted column.
+        # SET DEFAULT takes an ACCESS EXCLUSIVE lock, so (like the SMALLINT conversions) only
+        # issue it when the stored default isn't already ours — Postgres keeps UTC_NOW in
+        # its deparsed form, _UTC_NOW_DEPARSED.
+        deparsed = _UTC_NOW_DEPARSED.replace("'", "''")   # as a SQL string literal body
+        for table in Base.metadata.sorted_tables:
+            for col in table.columns:
+                if col.server_default is not None and isinstance(col.type, DateTime):
+                    migrations.append(
+                        f"DO $$ BEGIN IF (SELECT column_default FROM information_schema.columns "
+                        f"WHERE table_name = '{table.name}' AND column_name = '{col.name}') "
+                        f"IS DISTINCT FROM '{deparsed}' THEN "
+                        f"ALTER TABLE {table.name} ALTER COLUMN {col.name} SET DEFAULT {UTC_NOW.text}; "
+                        f"END IF; END $$"
+                    )
         for stmt in migrations:
+            # Each statement in its own SAVEPOINT: a failure would otherwise abort the whole
+            # transaction, failing every later statement and rolling back create_all at COMMIT
             try:
-                await conn.execute(sa_text(stmt))
+                async with conn.begin_nested():
+                    await conn.execute(sa_text(stmt))
             except Exception as e:
-                print(f"[migration] skipped: {e}")
+                logger.warning("[migration] skipped: {}", e)
+
+        # Search orders by the halfvec expression only if that index actually got built
+        HALFVEC_ANN = halfvec_ok and bool(await conn.scalar(sa_text(
+            "SELECT EXISTS (SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = 'messages_embedding_hnsw_half' AND i.indisvalid)"
+        )))
+        if halfvec_ok and not HALFVEC_ANN:
+            logger.warning("[migration] halfvec ANN index missing — semantic search stays on the fp32 index")
+        TSV_SEARCH = bool(await conn.scalar(sa_text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'messages' AND column_name = 'tsv')"
+        )))
+        if not TSV_SEARCH:
+            logger.warning("[migration] messages.tsv missing — search runs vector-only")
 
         # Backfill invite_token for any group created before the column existed.
         try:
             import secrets
-            rows = (await conn.execute(
-                sa_text("SELECT id FROM groups WHERE invite_token IS NULL")
-            )).fetchall()
-            for (gid,) in rows:
-                await conn.execute(
-                    sa_text("UPDATE groups SET invite_token = :tok WHERE id = :gid"),
-                    {"tok": secrets.token_urlsafe(24), "gid": gid},
-                )
+            async with conn.begin_nested():
+                rows = (await conn.execute(
+                    sa_text("SELECT id FROM groups WHERE invite_token IS NULL")
+                )).fetchall()
+                for (gid,) in rows:
+                    await conn.execute(
+                        sa_text("UPDATE groups SET invite_token = :tok WHERE id = :gid"),
+                        {"tok": secrets.token_urlsafe(24), "gid": gid},
+                    )
         except Exception as e:
-            print(f"[migration] invite_token backfill skipped: {e}")
+            logger.warning("[migration] invite_token backfill skipped: {}", e)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database session"""
+    # The context manager closes the session; no extra close() round-trip needed
     async with async_session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
@@ -6,18 +6,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, UploadFile, File, WebSocket, WebSocketDisconnect, Query, Body
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, EmailStr
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, ValidationError
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, date
 from enum import Enum
 from contextlib import asynccontextmanager
 from zoneinfo import ZoneInfo
 import os
+import sys
 import re
+import json
 import secrets
+import time
 import asyncio
+from collections import OrderedDict
 import httpx
+import orjson
 from sqlalchemy import and_, or_, select, update, func, text, delete as sql_delete
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,18 +32,28 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 from config import Config
 
-from database import get_db, init_db, engine, Base, async_session_maker, DeviceToken, StoredImage, GroupLastSeen, LabelAnnotation, IAPTransaction, PaymentOrder, AnalyticsEvent
+# enqueue=True hands records to a writer thread, so request handlers never block on a
+# stderr write; messages use loguru's lazy "{}" args rather than eager f-strings.
+logger.remove()
+logger.add(sys.stderr, level=os.getenv("LOG_LEVEL", "INFO"), enqueue=True)
+
+from database import get_db, init_db, warm_pool, engine, Base, async_session_maker, DeviceToken, StoredImage, GroupLastSeen, LabelAnnotation, IAPTransaction, PaymentOrder, AnalyticsEvent
 from models import User, Message, Category, MessageType, ProAccount, ProAccountMember, Group, GroupMember, CouponCode, CouponRedemption
 from services.group_service import group_service as grp_svc, total_unread_for_user
 from services.coupon_service import coupon_service as cpn_svc
 from services.payment_service import payment_service as pay_svc
 from services.iap_service import iap_service
-from cerebras_client import CerebrasClient
+from cerebras_client import CerebrasClient, aclose_http_client
 from services.message_processor import MessageProcessor
 from services.search_service import SearchService
 from services.category_manager import CategoryManager
+from services.list_service import ListService
+from services.document_processor import shutdown_extract_pool
+from services import redis_cache, semantic_cache
+from services.embedding_service import cache_stats as embedding_cache_stats
+from services.sms_service import aclose_sms_client
 from services.auth_service import AuthService, get_current_user, decode_user_id_safe
-from services.reminder_service import ReminderService, send_apns_notification, Reminder
+from services.reminder_service import ReminderService, send_apns_notification, Reminder, aclose_apns_client
 from services.briefing_service import briefing_service
 from services.nudge_service import nudge_service
 from services.context_service import context_service
@@ -49,9 +66,10 @@ from services.recurrence_service import RecurrenceService, Recurrence
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 Starting Extended Brain API...")
+    logger.info("🚀 Starting Extended Brain API...")
     await init_db()
-    print("✓ Database initialized")
+    logger.info("✓ Database initialized")
+    await warm_pool()
 
     # Load ONNX intent classifier in a thread so the event loop stays responsive
     # during the backbone download (can take 10–30s on first deploy).
@@ -59,19 +77,28 @@ async def lifespan(app: FastAPI):
     from services.classifier_service import classifier_service
     loop = asyncio.get_event_loop()
     ok = await loop.run_in_executor(None, classifier_service.load)
-    print(f"{'✓ Intent classifier loaded (ONNX)' if ok else '⚠ Intent classifier not loaded — using Gemini'}")
+    if ok:
+        logger.info("✓ Intent classifier loaded (ONNX)")
+    else:
+        logger.warning("⚠ Intent classifier not loaded — using Gemini")
 
     from services.reminder_service import Reminder
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     scheduler_task = asyncio.create_task(_master_scheduler())
-    print("✅ Master scheduler running")
+    logger.info("✅ Master scheduler running")
 
-    print("✓ Extended Brain API started successfully")
+    logger.info("✓ Extended Brain API started successfully")
     yield
     scheduler_task.cancel()
-    print("✓ Extended Brain API shutdown")
+    await aclose_http_client()
+    await aclose_apns_client()
+    await redis_cache.aclose()
+    await aclose_sms_client()
+    shutdown_extract_pool()
+    logger.info("✓ Extended Brain API shutdown")
+    await logger.complete()
 
 
 async def _cleanup_stale_data():
@@ -99,7 +126,7 @@ async def _cleanup_stale_data():
             )
             await db.execute(sql_delete(Message).where(Message.id.in_(stale_ids)))
             await db.commit()
-            print(f"[cleanup] Deleted {len(stale_ids)} completed To-Do messages older than 7 days")
+            logger.info("[cleanup] Deleted {} completed To-Do messages older than 7 days", len(stale_ids))
 
         # Delete fired one-time reminders (recurrence IS NULL = not recurring) older than 7 days
         fired_result = await db.execute(
@@ -112,7 +139,7 @@ async def _cleanup_stale_data():
         await db.commit()
         fired_count = fired_result.rowcount
         if fired_count:
-            print(f"[cleanup] Deleted {fired_count} fired one-time reminders older than 7 days")
+            logger.info("[cleanup] Deleted {} fired one-time reminders older than 7 days", fired_count)
 
 
 async def _send_event_auto_notifications():
@@ -120,7 +147,6 @@ async def _send_event_auto_notifications():
     Fire a silent day-before push for Events that have auto_notify_date == today.
     These are NOT Reminder rows — they never appear in the Reminders section.
     """
-    from zoneinfo import ZoneInfo
     today_ist = datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d")
     async with async_session_maker() as db:
         result = await db.execute(
@@ -155,14 +181,14 @@ async def _send_event_auto_notifications():
                     update(Message).where(Message.id == msg_id).values(tags=updated_tags)
                 )
                 await db.commit()
-                print(f"[event_notify] Sent day-before push for event {msg_id}")
+                logger.info("[event_notify] Sent day-before push for event {}", msg_id)
             except Exception as e:
-                print(f"[event_notify] Failed for event {msg_id}: {e}")
+                logger.warning("[event_notify] Failed for event {}: {}", msg_id, e)
 
 
 async def _master_scheduler():
     """Single scheduler loop — runs every 60 seconds."""
-    print("[scheduler] Master scheduler started")
+    logger.info("[scheduler] Master scheduler started")
     tick = 0
     while True:
         try:
@@ -184,7 +210,7 @@ async def _master_scheduler():
         except asyncio.CancelledError:
             break
         except Exception as e:
-            print(f"[scheduler] Error: {e}")
+            logger.exception("[scheduler] Error: {}", e)
         finally:
             await asyncio.sleep(60)
 
@@ -195,6 +221,7 @@ app = FastAPI(
     title="Extended Brain API",
     version="4.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -221,6 +248,29 @@ message_processor  = MessageProcessor(cerebras_client, reminder_service=reminder
 project_service    = ProjectService(cerebras_client)
 subtask_service    = SubtaskService(cerebras_client)
 recurrence_service = RecurrenceService(cerebras_client)
+list_service       = ListService(cerebras_client)
+
+# Fire-and-forget work (cache busts, broadcasts, pushes, enrichment). The loop only keeps
+# weak references to tasks, so hold them here until done or they can be GC'd mid-flight.
+_BG_TASKS: set = set()
+# Caps concurrent push fan-out per request so a large group can't flood APNs / the DB pool
+_PUSH_SEM = asyncio.Semaphore(int(os.getenv("PUSH_CONCURRENCY", 5)))
+# Caps concurrent media enrichment (vision / document extraction / link fetch). Each run
+# holds a DB session across a slow external call, so an upload burst would otherwise
+# drain the pool that live requests need; the rest simply wait their turn.
+_ENRICH_SEM = asyncio.Semaphore(int(os.getenv("ENRICH_CONCURRENCY", 4)))
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _BG_TASKS.add(task)
+    task.add_done_callback(_BG_TASKS.discard)
+    return task
+
+
+async def _enrich(coro) -> None:
+    async with _ENRICH_SEM:
+        await coro
 
 
 # ================== WebSocket Connection Manager ==================
@@ -259,6 +309,13 @@ ws_manager = WSConnectionManager()
 
 # ================== Pydantic Models ==================
 
+class RequestModel(BaseModel):
+    """Base for request bodies. Handlers only read them, so they're frozen: an accidental
+    write fails loudly instead of silently diverging from what the client sent. Strings
+    are deliberately not stripped — captured content and passwords must stay verbatim."""
+    model_config = ConfigDict(frozen=True)
+
+
 class MessageTypeEnum(str, Enum):
     TEXT     = "text"
     IMAGE    = "image"
@@ -267,7 +324,7 @@ class MessageTypeEnum(str, Enum):
     VIDEO    = "video"
 
 
-class UserRegistrationRequest(BaseModel):
+class UserRegistrationRequest(RequestModel):
     name:         str      = Field(..., min_length=2, max_length=100)
     email:        EmailStr
     age:          int      = Field(..., ge=13, le=120)
@@ -276,42 +333,42 @@ class UserRegistrationRequest(BaseModel):
     timezone:     Optional[str] = "Asia/Kolkata"
 
 
-class OTPSendRequest(BaseModel):
+class OTPSendRequest(RequestModel):
     phone_number: str = Field(..., min_length=10, max_length=20)
 
 
-class OTPVerifyRequest(BaseModel):
+class OTPVerifyRequest(RequestModel):
     phone_number: str = Field(..., min_length=10, max_length=20)
     otp:          str = Field(..., min_length=6, max_length=6)
 
 
-class LoginRequest(BaseModel):
+class LoginRequest(RequestModel):
     phone_number: Optional[str] = None
     email:        Optional[str] = None
     password:     str
 
 
-class ForgotPasswordRequest(BaseModel):
+class ForgotPasswordRequest(RequestModel):
     phone_number: str
     new_password: str = Field(..., min_length=6)
     otp: Optional[str] = None              # required when ENABLE_OTP (MSG91 path)
 
 
-class FirebaseVerifyPhoneRequest(BaseModel):
+class FirebaseVerifyPhoneRequest(RequestModel):
     id_token: str = Field(..., min_length=1)
 
 
-class FirebaseResetPasswordRequest(BaseModel):
+class FirebaseResetPasswordRequest(RequestModel):
     id_token:     str = Field(..., min_length=1)
     new_password: str = Field(..., min_length=6)
 
 
-class AppleSignInRequest(BaseModel):
+class AppleSignInRequest(RequestModel):
     id_token:  str = Field(..., min_length=1)
     full_name: Optional[str] = None
 
 
-class OAuthVerifyPhoneRequest(BaseModel):
+class OAuthVerifyPhoneRequest(RequestModel):
     session_token: str
     # Phone verification — two supported paths during the Firebase→MSG91 transition:
     #   MSG91/OTP: phone_number + otp   ·   Legacy Firebase: phone_id_token
@@ -319,12 +376,12 @@ class OAuthVerifyPhoneRequest(BaseModel):
     phone_number:   Optional[str] = None
     otp:            Optional[str] = None
 
-class GoogleSignInRequest(BaseModel):
+class GoogleSignInRequest(RequestModel):
     id_token:  str = Field(..., min_length=1)
     full_name: Optional[str] = None
 
 
-class MessageCreate(BaseModel):
+class MessageCreate(RequestModel):
     content:          str
     message_type:     MessageTypeEnum = MessageTypeEnum.TEXT
     media_url:        Optional[str]   = None
@@ -339,23 +396,26 @@ class MessageCreate(BaseModel):
     client_id:        Optional[str]   = None   # idempotency key for capture retries
 
 
-class SearchQuery(BaseModel):
+class SearchQuery(RequestModel):
     query:           str
     limit:           int = 10
     category_filter: Optional[List[str]] = None
     group_id:        Optional[int] = None
     fast:            bool = False  # skip LLM; return embedding+keyword results instantly
+    # Reciprocal-rank-fusion weights for the full search (ignored when fast=True)
+    keyword_weight:  float = Field(0.4, ge=0.0, le=1.0)
+    vector_weight:   float = Field(0.6, ge=0.0, le=1.0)
 
 
-class DoneRequest(BaseModel):
+class DoneRequest(RequestModel):
     done: bool = True
 
 
-class RemindAtRequest(BaseModel):
+class RemindAtRequest(RequestModel):
     remind_at: str  # ISO 8601 datetime with timezone, e.g. "2026-06-02T18:00:00+05:30"
 
 
-class CategoryOperation(BaseModel):
+class CategoryOperation(RequestModel):
     operation:     str
     category_name: Optional[str] = None
     new_name:      Optional[str] = None
@@ -364,31 +424,45 @@ class CategoryOperation(BaseModel):
 
 # ================== Core Endpoints ==================
 
+# Static payload — serialised once at import instead of per request
+_ROOT_BODY = orjson.dumps({
+    "message": "Extended Brain API",
+    "version": "4.0.0",
+    "status":  "active",
+    "features": [
+        "Morning Briefing", "Recurring Tasks", "Subtasks",
+        "Project Grouping", "Idle Nudges", "Follow-up Tracking",
+        "Multi-turn Context", "Priority Escalation", "/status",
+    ],
+})
+_classifier_health: Optional[dict] = None
+
+
 @app.get("/")
 async def root():
-    return {
-        "message": "Extended Brain API",
-        "version": "4.0.0",
-        "status":  "active",
-        "features": [
-            "Morning Briefing", "Recurring Tasks", "Subtasks",
-            "Project Grouping", "Idle Nudges", "Follow-up Tracking",
-            "Multi-turn Context", "Priority Escalation", "/status",
-        ],
-    }
+    return Response(_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
+    global _classifier_health
     from services.classifier_service import classifier_service
-    return {
+    classifier = _classifier_health
+    if classifier is None:
+        classifier = {
+            "ready":   classifier_service.is_ready,
+            "classes": [str(c) for c in classifier_service._classes] if classifier_service.is_ready else [],
+        }
+        # The classifier only ever goes not-ready → ready (lifespan load), so freeze it once ready
+        if classifier_service.is_ready:
+            _classifier_health = classifier
+    return ORJSONResponse({
         "status":      "healthy",
         "timestamp":   datetime.now().isoformat(),
-        "classifier":  {
-            "ready":   classifier_service.is_ready,
-            "classes": list(classifier_service._classes) if classifier_service.is_ready else [],
-        },
-    }
+        "classifier":  classifier,
+        "semantic_cache":  semantic_cache.stats(),
+        "embedding_cache": embedding_cache_stats(),
+    })
 
 
 # ================== Auth Endpoints ==================
@@ -426,9 +500,7 @@ async def firebase_verify_phone(request: FirebaseVerifyPhoneRequest, db: AsyncSe
         raise HTTPException(status_code=400, detail=str(e))
 
     # Remove any existing OTP records for this phone and insert a pre-verified one.
-    existing = await db.execute(select(OTPVerification).where(OTPVerification.phone_number == phone_number))
-    for row in existing.scalars():
-        await db.delete(row)
+    await db.execute(sql_delete(OTPVerification).where(OTPVerification.phone_number == phone_number))
 
     otp_record = OTPVerification(
         phone_number=phone_number,
@@ -972,7 +1044,6 @@ async def update_briefing_settings(
         new_time = None
     else:
         # Validate HH:MM format
-        import re
         if not re.match(r"^\d{2}:\d{2}$", str(time_str)):
             raise HTTPException(status_code=400, detail="time must be HH:MM format")
         new_time = time_str
@@ -1114,7 +1185,6 @@ async def get_assigned_to_others(
 ):
     """Return group messages where the current user is the assigner (sender) and
     tags.assignments is non-empty — i.e. tasks they assigned to other group members."""
-    import json as _json
 
     rows = await db.execute(
         select(Message)
@@ -1146,7 +1216,7 @@ async def get_assigned_to_others(
     return {"success": True, "results": messages, "total": len(messages)}
 
 
-class AssignmentCompleteBody(BaseModel):
+class AssignmentCompleteBody(RequestModel):
     done: bool = True
 
 @app.patch("/api/messages/{message_id}/assignments/{assignment_idx}/complete")
@@ -1160,7 +1230,6 @@ async def complete_assignment(
     """Mark or unmark a specific assignee's slot as done.
     Callable by the assignee themselves OR the message owner (assigner).
     Pass {"done": false} to undo completion. Omit body to mark done (backward compat)."""
-    import json as _json
 
     done = body.done if body is not None else True
 
@@ -1191,15 +1260,16 @@ async def complete_assignment(
         text(
             "UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid"
         ).bindparams(
-            extra=_json.dumps({"assignments": assignments}),
+            extra=json.dumps({"assignments": assignments}),
             mid=message_id,
         )
     )
     await db.commit()
+    semantic_cache.invalidate(msg.user_id)
 
     # ── Broadcast to group so other clients refresh ───────────────────
     if msg.group_id:
-        asyncio.create_task(ws_manager.broadcast(msg.group_id, {
+        _spawn(ws_manager.broadcast(msg.group_id, {
             "type":           "assignment_complete",
             "message_id":     message_id,
             "assignment_idx": assignment_idx,
@@ -1224,7 +1294,7 @@ async def complete_assignment(
                           "group_id": msg.group_id},
                 )
         except Exception as e:
-            print(f"[push] assigner completion notify failed: {e}")
+            logger.warning("[push] assigner completion notify failed: {}", e)
 
     return {
         "success":     True,
@@ -1244,7 +1314,6 @@ async def assign_message(
     """Retroactively assign an existing group message to a member.
     Callable by the message owner. Appends to tags.assignments, forces bucket=To-Do,
     mirrors a personal To-Do for the assignee, and sends APNs."""
-    import json as _json
 
     msg = await db.get(Message, message_id)
     if not msg:
@@ -1287,7 +1356,7 @@ async def assign_message(
             "    assigned_to_user_id = :auid "
             "WHERE id = :mid"
         ).bindparams(
-            extra=_json.dumps({
+            extra=json.dumps({
                 "assignments":    assignments,
                 "primary_bucket": "To-Do",
                 "intent_bucket":  "To-Do",
@@ -1336,10 +1405,10 @@ async def assign_message(
                       "message_id": message_id},
             )
     except Exception as e:
-        print(f"[push] assign notify failed for uid={assignee_id}: {e}")
+        logger.warning("[push] assign notify failed for uid={}: {}", assignee_id, e)
 
     # Broadcast to group so other clients refresh
-    asyncio.create_task(ws_manager.broadcast(msg.group_id, {
+    _spawn(ws_manager.broadcast(msg.group_id, {
         "type":           "assignment_added",
         "message_id":     message_id,
         "assigned_to":    assignee_name,
@@ -1349,13 +1418,13 @@ async def assign_message(
 
     # Bust personal bootstrap cache for every group member so the task transitions
     # from "group-wide unassigned" to "assigned to [name]" without waiting for TTL.
-    from services import redis_cache as _rc
     try:
         member_rows = await db.execute(
             select(GroupMember.user_id).where(GroupMember.group_id == msg.group_id)
         )
         for (muid,) in member_rows.all():
-            asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(muid, None)))
+            _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(muid, None)))
+            semantic_cache.invalidate(muid)
     except Exception:
         pass  # cache bust is best-effort
 
@@ -1378,12 +1447,11 @@ async def bootstrap(
     """Single round-trip that returns everything iOS needs to open a context:
     recent messages, group members, assigned tasks, and unread counts.
     Pass refresh=true to bypass the 30-second Redis cache (e.g. pull-to-refresh)."""
-    from services import redis_cache
     bk = redis_cache.bootstrap_key(current_user.id, group_id)
     if not refresh:
         cached = await redis_cache.cache_get(bk)
         if cached:
-            return cached
+            return ORJSONResponse(cached)
 
     # 1. Recent messages ──────────────────────────────────────────────
     if group_id:
@@ -1571,7 +1639,9 @@ async def bootstrap(
         "unread_counts": unread_counts,
     }
     await redis_cache.cache_set(bk, payload, ex=30)
-    return payload
+    # Already JSON-native (it round-trips through Redis) — skip jsonable_encoder's
+    # recursive walk over up to 200 messages and serialise straight to bytes
+    return ORJSONResponse(payload)
 
 
 @app.get("/api/messages/recent")
@@ -1739,7 +1809,7 @@ async def group_websocket(
 ):
     """WebSocket endpoint for live group chat. Eliminates HTTP polling."""
     from jose import jwt as jose_jwt, JWTError
-    SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key")
+    from services.auth_service import SECRET_KEY
 
     # Verify JWT token from query param
     try:
@@ -1785,7 +1855,6 @@ async def delete_message(
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a message owned by the current user."""
-    from services import redis_cache as _rc
     msg = await db.get(Message, message_id)
     if not msg:
         raise HTTPException(status_code=404, detail="Message not found")
@@ -1796,10 +1865,10 @@ async def delete_message(
     group_id = msg.group_id
     await db.delete(msg)
     await db.commit()
-    asyncio.create_task(_rc.cache_del_user_searches(current_user.id))
-    asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, None)))
+    _spawn(redis_cache.cache_del_user_searches(current_user.id))
+    _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, None)))
     if group_id:
-        asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, group_id)))
+        _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, group_id)))
     return {"success": True}
 
 
@@ -1959,9 +2028,8 @@ async def set_remind_at(
         raise HTTPException(status_code=422, detail="remind_at must be an ISO 8601 datetime")
 
     # Decompose into date + time for reminder_service
-    from zoneinfo import ZoneInfo as _ZI
     user_tz = current_user.timezone or "Asia/Kolkata"
-    local_dt = remind_dt.astimezone(_ZI(user_tz))
+    local_dt = remind_dt.astimezone(ZoneInfo(user_tz))
     analysis = {
         "event_time":  local_dt.strftime("%H:%M"),
         "due_date":    local_dt.strftime("%Y-%m-%d"),
@@ -1980,13 +2048,13 @@ async def set_remind_at(
     if not reminder:
         raise HTTPException(status_code=500, detail="Could not create reminder")
 
-    import json as _json_ra
     new_tags = {"remind_at": reminder.remind_at.isoformat(), "needs_time": False}
     await db.execute(
         text("UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid")
-        .bindparams(extra=_json_ra.dumps(new_tags), mid=message_id)
+        .bindparams(extra=json.dumps(new_tags), mid=message_id)
     )
     await db.commit()
+    semantic_cache.invalidate(current_user.id)
 
     return {
         "success":     True,
@@ -2083,7 +2151,12 @@ async def capture_message(
         ),
         no_llm_fallback=bool(group_id),
         skip_reminder=bool(assignments),
+        user=current_user,
     )
+    # New message (and possibly a new category) — the cached listing's counts and any
+    # cached search results are stale
+    category_manager.invalidate(current_user.id)
+    semantic_cache.invalidate(current_user.id)
 
     # ── Stamp the idempotency key on the new row (so a retry resolves here) ──
     if message.client_id and result.get("message_id"):
@@ -2108,7 +2181,6 @@ async def capture_message(
         # Detect group-wide reminder: no specific @mention but a due time was extracted
         is_group_reminder = (not assignments) and bool(result.get("due_date") or result.get("remind_at"))
 
-        import json as _json
 
         extra_tags: dict = {}
         if assignments:
@@ -2124,7 +2196,7 @@ async def capture_message(
             ).bindparams(
                 gid=group_id,
                 auid=primary_uid,
-                extra=_json.dumps(extra_tags),
+                extra=json.dumps(extra_tags),
                 mid=result["message_id"],
             )
         )
@@ -2136,13 +2208,13 @@ async def capture_message(
         result["assignments"]    = assignments
 
         # ── Bust bootstrap cache for sender + each assignee ──────────
-        from services import redis_cache as _rc
-        asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, group_id)))
+        _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, group_id)))
         for _a in assignments:
-            asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(_a["user_id"], None)))
+            _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(_a["user_id"], None)))
+            semantic_cache.invalidate(_a["user_id"])
 
         # ── Broadcast new message to group WebSocket ──────────────────
-        asyncio.create_task(ws_manager.broadcast(group_id, {
+        _spawn(ws_manager.broadcast(group_id, {
             "type":                "new_message",
             "id":                  result.get("message_id"),
             "content":             content,
@@ -2213,7 +2285,7 @@ async def capture_message(
                             db=db,
                         )
                 except Exception as e:
-                    print(f"[reminder] assignee reminder failed for uid={auid}: {e}")
+                    logger.warning("[reminder] assignee reminder failed for uid={}: {}", auid, e)
 
         _push_assign: list[tuple[int, list[str]]] = []
         for assignment in assignments:
@@ -2226,7 +2298,7 @@ async def capture_message(
                 )
                 _push_assign.append((auid, [r[0] for r in rows.all()]))
             except Exception as e:
-                print(f"[push] token fetch failed for uid={auid}: {e}")
+                logger.warning("[push] token fetch failed for uid={}: {}", auid, e)
 
         _push_grp: list[tuple[int, list[str]]] = []
         if is_group_reminder:
@@ -2240,7 +2312,7 @@ async def capture_message(
                     )
                     _push_grp.append((muid, [r[0] for r in rows.all()]))
                 except Exception as e:
-                    print(f"[push] group reminder token fetch failed for uid={muid}: {e}")
+                    logger.warning("[push] group reminder token fetch failed for uid={}: {}", muid, e)
 
         await db.commit()
 
@@ -2251,38 +2323,32 @@ async def capture_message(
         _mid       = result["message_id"]
         _body      = content[:80]
 
-        async def _send_pushes() -> None:
-            from services.group_service import total_unread_for_user as _tuu
-            for auid, tokens in _push_assign:
-                try:
-                    async with async_session_maker() as _s:
-                        badge = await _tuu(_s, auid)
-                    for token in tokens:
-                        await send_apns_notification(
-                            device_token=token,
-                            title=f"{_sender} assigned you a task",
-                            body=_body, badge=badge,
-                            data={"type": "assignment", "group_id": _gid,
-                                  "message_id": _mid},
-                        )
-                except Exception as e:
-                    print(f"[push] assignment notify failed for uid={auid}: {e}")
-            for muid, tokens in _push_grp:
+        async def _notify(uid: int, tokens: list, title: str, kind: str) -> None:
+            async with _PUSH_SEM:
                 try:
                     async with async_session_maker() as _s:
-                        badge = await _tuu(_s, muid)
+                        badge = await total_unread_for_user(_s, uid)
                     for token in tokens:
                         await send_apns_notification(
                             device_token=token,
-                            title=f"Reminder · {_sender}",
+                            title=title,
                             body=_body, badge=badge,
-                            data={"type": "group_reminder", "group_id": _gid,
+                            data={"type": kind, "group_id": _gid,
                                   "message_id": _mid},
                         )
                 except Exception as e:
-                    print(f"[push] group reminder notify failed for uid={muid}: {e}")
+                    logger.warning("[push] {} notify failed for uid={}: {}", kind, uid, e)
+
+        async def _send_pushes() -> None:
+            # Recipients are independent (own session each) — fan out, bounded by _PUSH_SEM
+            await asyncio.gather(
+                *[_notify(auid, tokens, f"{_sender} assigned you a task", "assignment")
+                  for auid, tokens in _push_assign],
+                *[_notify(muid, tokens, f"Reminder · {_sender}", "group_reminder")
+                  for muid, tokens in _push_grp],
+            )
 
-        asyncio.create_task(_send_pushes())
+        _spawn(_send_pushes())
 
     # ── Temporal parsing: LLM extracts time/date for all reminder + recurring captures ──
     # Runs for any personal capture that has reminder keywords or recurring signals.
@@ -2300,9 +2366,7 @@ async def capture_message(
     )
     if _has_temporal:
         try:
-            from datetime import datetime as _dt
-            from zoneinfo import ZoneInfo as _ZI
-            _now_ist = _dt.now(_ZI("Asia/Kolkata"))
+            _now_ist = datetime.now(ZoneInfo("Asia/Kolkata"))
             _today   = _now_ist.strftime("%Y-%m-%d")
             _now_str = _now_ist.strftime("%H:%M")
 
@@ -2313,13 +2377,13 @@ async def capture_message(
                 if result.get("reminder_id") and temporal.get("remind_at_time"):
                     r_date = temporal.get("remind_at_date") or _today
                     r_h, r_m = map(int, temporal["remind_at_time"].split(":"))
-                    _tz = _ZI(current_user.timezone or "Asia/Kolkata")
-                    _local = _dt.fromisoformat(r_date).replace(
+                    _tz = ZoneInfo(current_user.timezone or "Asia/Kolkata")
+                    _local = datetime.fromisoformat(r_date).replace(
                         hour=r_h, minute=r_m, second=0, microsecond=0, tzinfo=_tz
                     )
                     if _local <= _now_ist.replace(tzinfo=_tz):
                         _local += timedelta(days=1)
-                    _utc = _local.astimezone(_ZI("UTC")).replace(tzinfo=None)
+                    _utc = _local.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
                     await db.execute(
                         update(Reminder)
                         .where(Reminder.id == result["reminder_id"])
@@ -2327,7 +2391,7 @@ async def capture_message(
                     )
                     await db.commit()
                     result["remind_at"] = _utc.isoformat()
-                    print(f"[temporal] corrected reminder #{result['reminder_id']} → {_utc} UTC")
+                    logger.info("[temporal] corrected reminder #{} → {} UTC", result['reminder_id'], _utc)
 
                 # 2. Create recurrence(s) if recurring
                 #    Defense in depth: only honour the LLM's recurrence verdict when
@@ -2391,10 +2455,10 @@ async def capture_message(
                             .values(is_cancelled=True)
                         )
                         await db.commit()
-                        print(f"[temporal] created {len(_recs)} recurrence(s): {_rule_str}")
+                        logger.info("[temporal] created {} recurrence(s): {}", len(_recs), _rule_str)
 
         except Exception as e:
-            print(f"[capture] Temporal parsing failed: {e}")
+            logger.warning("[capture] Temporal parsing failed: {}", e)
 
     # ── Needs-time flag: reminder keyword but no time found by LLM or regex ──
     if (
@@ -2405,7 +2469,6 @@ async def capture_message(
         and not group_id
     ):
         result["needs_time"] = True
-        import json as _json_nt
         await db.execute(
             text("UPDATE messages SET tags = tags || '{\"needs_time\": true}'::jsonb WHERE id = :mid")
             .bindparams(mid=result["message_id"])
@@ -2414,7 +2477,6 @@ async def capture_message(
 
     # ── Expense metadata ─────────────────────────────────────────────
     if message.expense_amount is not None and result.get("message_id"):
-        import json as _json_exp
         # Always record who paid — default to the person capturing the expense
         payer_id   = message.expense_payer_id   if message.expense_payer_id   is not None else current_user.id
         payer_name = message.expense_payer_name if message.expense_payer_name else current_user.name
@@ -2428,7 +2490,7 @@ async def capture_message(
             expense_tags["expense_context"] = message.expense_context
         await db.execute(
             text("UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid")
-            .bindparams(extra=_json_exp.dumps(expense_tags), mid=result["message_id"])
+            .bindparams(extra=json.dumps(expense_tags), mid=result["message_id"])
         )
         await db.commit()
         result["expense_amount"]   = message.expense_amount
@@ -2448,12 +2510,12 @@ async def capture_message(
         result["media_url"] = message.media_url
         mime = (message.metadata or {}).get("mime_type", "image/jpeg") if message.metadata else "image/jpeg"
         img_caption = (message.content or "").strip()
-        asyncio.create_task(
+        _spawn(_enrich(
             message_processor._enrich_image_background(
                 result["message_id"], current_user.id,
                 message.media_url, img_caption, mime,
             )
-        )
+        ))
 
     # ── Link metadata ────────────────────────────────────────────────
     # Share-extension URL captures arrive as message_type="text" with media_url = the external
@@ -2472,12 +2534,12 @@ async def capture_message(
             or len(_link_caption) < 60
         )
         if _needs_enrichment:
-            asyncio.create_task(
+            _spawn(_enrich(
                 message_processor._enrich_link_background(
                     result["message_id"], current_user.id,
                     message.media_url, _link_caption,
                 )
-            )
+            ))
 
     # ── Document metadata ────────────────────────────────────────────
     # Stamp the original filename + a flag so iOS renders a file card (and the
@@ -2486,7 +2548,6 @@ async def capture_message(
     # After tagging, fire PDF text extraction in background so the document
     # becomes keyword-searchable within a few seconds of capture.
     if message.message_type == MessageTypeEnum.DOCUMENT and result.get("message_id"):
-        import json as _json_doc
         file_name = (message.metadata or {}).get("file_name") or "Document"
         doc_caption = (message.content or "").strip()
         doc_tags = {"is_document": True, "file_name": file_name}
@@ -2494,7 +2555,7 @@ async def capture_message(
             doc_tags["caption"] = doc_caption
         await db.execute(
             text("UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid")
-            .bindparams(extra=_json_doc.dumps(doc_tags), mid=result["message_id"])
+            .bindparams(extra=json.dumps(doc_tags), mid=result["message_id"])
         )
         await db.commit()
         result["is_document"] = True
@@ -2505,12 +2566,12 @@ async def capture_message(
         # DocumentChip, so showing it as essence text would be redundant.
         result["essence"]     = doc_caption or file_name
         # Tags stamped ↑ — now safe to fire background extraction (no write race)
-        asyncio.create_task(
+        _spawn(_enrich(
             message_processor._enrich_document_background(
                 result["message_id"], current_user.id,
                 message.media_url, doc_caption, file_name,
             )
-        )
+        ))
 
     # ── Rich text metadata ────────────────────────────────────────────
     # Share-extension captures from rich-text sources (e.g. Apple Notes) may include
@@ -2518,11 +2579,10 @@ async def capture_message(
     # used for search/classification/embedding. Stash it in tags so iOS can render
     # and edit the formatted version in the detail sheet; content/summary stay plain.
     if message.metadata and message.metadata.get("rich_html") and result.get("message_id"):
-        import json as _json_rich
         rich_tags = {"rich_html": message.metadata["rich_html"]}
         await db.execute(
             text("UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid")
-            .bindparams(extra=_json_rich.dumps(rich_tags), mid=result["message_id"])
+            .bindparams(extra=json.dumps(rich_tags), mid=result["message_id"])
         )
         await db.commit()
         result["rich_html"] = message.metadata["rich_html"]
@@ -2555,7 +2615,7 @@ async def upload_image(
     await db.refresh(img)
 
     # Return an absolute URL so the iOS app can load it via AsyncImage
-    base_url = os.getenv("RAILWAY_PUBLIC_DOMAIN", "")
+    base_url = Config.PUBLIC_DOMAIN
     if base_url:
         url = f"https://{base_url}/api/images/{img.id}"
     else:
@@ -2564,6 +2624,55 @@ async def upload_image(
     return {"url": url}
 
 
+# image_id → (data, mime_type, expires_at). Group photos and shared captures are fetched by
+# every member at once, so keep recent blobs in memory and coalesce concurrent loads.
+_IMAGE_CACHE: "OrderedDict[int, tuple]" = OrderedDict()
+_IMAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_IMAGE_CACHE_TTL = 300   # bounds how long a deleted account's images stay servable
+_image_cache_bytes = 0
+_image_inflight: dict[int, asyncio.Future] = {}
+_IMAGE_CACHE_HEADERS = {"Cache-Control": "private, max-age=86400, immutable"}
+
+
+async def _load_image(image_id: int, db: AsyncSession) -> Optional[tuple]:
+    global _image_cache_bytes
+    hit = _IMAGE_CACHE.get(image_id)
+    if hit and hit[2] > time.monotonic():
+        _IMAGE_CACHE.move_to_end(image_id)
+        return hit[:2]
+
+    pending = _image_inflight.get(image_id)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    fut = asyncio.get_running_loop().create_future()
+    _image_inflight[image_id] = fut
+    try:
+        img = await db.get(StoredImage, image_id)
+        value = (img.data, img.mime_type) if img else None
+        fut.set_result(value)
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()   # waiters re-raise it; don't warn when there are none
+        raise
+    finally:
+        _image_inflight.pop(image_id, None)
+
+    if value:
+        old = _IMAGE_CACHE.pop(image_id, None)
+        if old:
+            _image_cache_bytes -= len(old[0])
+        _IMAGE_CACHE[image_id] = (*value, time.monotonic() + _IMAGE_CACHE_TTL)
+        _image_cache_bytes += len(value[0])
+        while _image_cache_bytes > _IMAGE_CACHE_MAX_BYTES and _IMAGE_CACHE:
+            _, evicted = _IMAGE_CACHE.popitem(last=False)
+            _image_cache_bytes -= len(evicted[0])
+    return value
+
+
 @app.get("/api/images/{image_id}")
 async def serve_image(
     image_id: int,
@@ -2571,11 +2680,12 @@ async def serve_image(
     db: AsyncSession = Depends(get_db),
 ):
     """Serve a stored image by ID. Auth-gated — any authenticated user can view (needed for group photos)."""
-    from fastapi.responses import Response
-    img = await db.get(StoredImage, image_id)
+    img = await _load_image(image_id, db)
     if not img:
         raise HTTPException(status_code=404, detail="Image not found")
-    return Response(content=img.data, media_type=img.mime_type)
+    data, mime_type = img
+    # Stored images are immutable per id — let the client keep them
+    return Response(content=data, media_type=mime_type, headers=_IMAGE_CACHE_HEADERS)
 
 
 @app.post("/api/search")
@@ -2593,14 +2703,17 @@ async def search_messages(
         user_phone=current_user.phone_number, query=search.query,
         limit=search.limit, category_filter=search.category_filter,
         group_id=search.group_id, db=db, fast=search.fast,
+        user=current_user,
+        keyword_weight=search.keyword_weight, vector_weight=search.vector_weight,
     )
-    return {
+    results = search_data.get("results", [])
+    return ORJSONResponse({
         "success":          True,
         "query":            search.query,
         "natural_response": search_data.get("natural_response", ""),
-        "results":          search_data.get("results", []),
-        "total":            len(search_data.get("results", [])),
-    }
+        "results":          results,
+        "total":            len(results),
+    })
 
 
 @app.patch("/api/messages/{message_id}/done")
@@ -2610,7 +2723,6 @@ async def mark_message_done(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    from sqlalchemy import update as sa_update
     done_val = body.done if body is not None else True
 
     # Fetch the message first so we can:
@@ -2639,17 +2751,17 @@ async def mark_message_done(
 
     jsonb_expr = f"jsonb_set(COALESCE(tags, '{{}}'), '{{done}}', '{str(done_val).lower()}'::jsonb)"
     await db.execute(
-        sa_update(Message)
+        update(Message)
         .where(Message.id == message_id)
         .values(tags=text(jsonb_expr))
     )
     await db.commit()
 
-    from services import redis_cache as _rc
-    # Always bust the owner's bootstrap cache
-    asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(msg.user_id, None)))
+    # Always bust the owner's bootstrap and search caches
+    _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(msg.user_id, None)))
+    semantic_cache.invalidate(msg.user_id)
     if msg.group_id:
-        asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(msg.user_id, msg.group_id)))
+        _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(msg.user_id, msg.group_id)))
 
     # For group-wide tasks, bust all members' personal bootstrap caches and broadcast
     # so their "Assigned to Me" updates without needing a manual pull-to-refresh.
@@ -2660,10 +2772,10 @@ async def mark_message_done(
                 select(GroupMember.user_id).where(GroupMember.group_id == msg.group_id)
             )
             for (muid,) in all_members.all():
-                asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(muid, None)))
+                _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(muid, None)))
         except Exception:
             pass
-        asyncio.create_task(ws_manager.broadcast(msg.group_id, {
+        _spawn(ws_manager.broadcast(msg.group_id, {
             "type":       "todo_completed",
             "message_id": message_id,
             "done":       done_val,
@@ -2680,7 +2792,6 @@ async def update_message_bucket(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    from sqlalchemy import update as sa_update
     VALID_BUCKETS = {"Remember", "To-Do", "Ideas", "Track", "Events", "Random"}
     bucket = body.get("bucket", "")
     if bucket not in VALID_BUCKETS:
@@ -2706,8 +2817,6 @@ async def update_message_bucket(
         updated_tags["due_date"] = datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d")
     elif bucket == "Events" and not updated_tags.get("due_date"):
         # Extract calendar date from content using the same regex as _build_from_bucket
-        import re as _re
-        from datetime import date as _date, timedelta as _td
         _lc = msg.content.lower()
         _MONTHS = {
             "january": 1, "february": 2, "march": 3, "april": 4, "may": 5,
@@ -2720,8 +2829,8 @@ async def update_message_bucket(
             r"january|february|march|april|may|june|july|august|september|"
             r"october|november|december|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec"
         )
-        _m_dm = _re.search(rf"\b(\d{{1,2}})(?:-\d{{1,2}})?(?:st|nd|rd|th)?\s?({_month_pat})\b", _lc)
-        _m_md = _re.search(rf"\b({_month_pat})\s?(\d{{1,2}})(?:st|nd|rd|th)?\b", _lc)
+        _m_dm = re.search(rf"\b(\d{{1,2}})(?:-\d{{1,2}})?(?:st|nd|rd|th)?\s?({_month_pat})\b", _lc)
+        _m_md = re.search(rf"\b({_month_pat})\s?(\d{{1,2}})(?:st|nd|rd|th)?\b", _lc)
         _day, _mon = 0, 0
         if _m_dm:
             _day = int(_m_dm.group(1))
@@ -2732,11 +2841,11 @@ async def update_message_bucket(
         if _mon and 1 <= _day <= 31:
             _today = datetime.now(ZoneInfo("Asia/Kolkata")).date()
             try:
-                _candidate = _date(_today.year, _mon, _day)
+                _candidate = date(_today.year, _mon, _day)
                 if _candidate < _today:
-                    _candidate = _date(_today.year + 1, _mon, _day)
+                    _candidate = date(_today.year + 1, _mon, _day)
                 updated_tags["due_date"] = _candidate.isoformat()
-                _notify = _candidate - _td(days=1)
+                _notify = _candidate - timedelta(days=1)
                 if _notify >= _today:
                     updated_tags["auto_notify_date"] = _notify.isoformat()
             except ValueError:
@@ -2767,7 +2876,7 @@ async def update_message_bucket(
         await db.flush()
 
     await db.execute(
-        sa_update(Message)
+        update(Message)
         .where(and_(Message.id == message_id, Message.user_id == current_user.id))
         .values(tags=updated_tags, category_id=_category.id)
     )
@@ -2783,11 +2892,11 @@ async def update_message_bucket(
     db.add(annotation)
     await db.commit()
 
-    # Bust bootstrap cache so the next app-load reflects the new bucket
-    from services import redis_cache as _rc
-    asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, None)))
+    # Bust bootstrap and search caches so the next app-load reflects the new bucket
+    _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, None)))
+    semantic_cache.invalidate(current_user.id)
     if msg.group_id:
-        asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, msg.group_id)))
+        _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, msg.group_id)))
 
     return {"success": True}
 
@@ -2799,13 +2908,12 @@ async def update_message_content(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    from sqlalchemy import update as sa_update
     new_content = (body.get("content") or "").strip()
     if not new_content:
         raise HTTPException(status_code=422, detail="content is required")
 
     result = await db.execute(
-        sa_update(Message)
+        update(Message)
         .where(and_(Message.id == message_id, Message.user_id == current_user.id))
         .values(content=new_content, summary=new_content)
     )
@@ -2817,17 +2925,15 @@ async def update_message_content(
     # projection above whenever the message carries tags.rich_html (see capture route).
     # "" (empty string) clears formatting — falls back to plain-text rendering.
     if "rich_html" in body:
-        import json as _json_rich
         rich_tags = {"rich_html": body.get("rich_html") or None}
         await db.execute(
             text("UPDATE messages SET tags = tags || CAST(:extra AS jsonb) WHERE id = :mid")
-            .bindparams(extra=_json_rich.dumps(rich_tags), mid=message_id)
+            .bindparams(extra=json.dumps(rich_tags), mid=message_id)
         )
         await db.commit()
 
-    from services import redis_cache as _rc
-    asyncio.create_task(_rc.cache_del(_rc.bootstrap_key(current_user.id, None)))
-    asyncio.create_task(_rc.cache_del_user_searches(current_user.id))
+    _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(current_user.id, None)))
+    _spawn(redis_cache.cache_del_user_searches(current_user.id))
 
     return {"success": True}
 
@@ -2866,11 +2972,10 @@ async def complete_list_item(
     item_index: int,
     current_user: User = Depends(get_current_user),
 ):
-    from services.list_service import ListService
-    ls = ListService(cerebras_client)
-    success = await ls.complete_item(message_id, item_index)
+    success = await list_service.complete_item(message_id, item_index)
     if not success:
         raise HTTPException(status_code=404, detail="Item not found")
+    semantic_cache.invalidate(current_user.id)
     return {"success": True}
 
 
@@ -2884,11 +2989,10 @@ async def add_list_item(
     task = (body.get("task") or "").strip()
     if not task:
         raise HTTPException(status_code=422, detail="task is required")
-    from services.list_service import ListService
-    ls    = ListService(cerebras_client)
-    index = await ls.add_item(message_id, task)
+    index = await list_service.add_item(message_id, task)
     if index is None:
         raise HTTPException(status_code=404, detail="List not found")
+    semantic_cache.invalidate(current_user.id)
     return {"success": True, "item_index": index}
 
 
@@ -2898,30 +3002,56 @@ async def delete_list_item(
     item_index: int,
     current_user: User = Depends(get_current_user),
 ):
-    from services.list_service import ListService
-    ls = ListService(cerebras_client)
-    success = await ls.delete_item(message_id, item_index)
+    success = await list_service.delete_item(message_id, item_index)
     if not success:
         raise HTTPException(status_code=404, detail="Item not found")
+    semantic_cache.invalidate(current_user.id)
     return {"success": True}
 
 
+async def _cat_list(op: CategoryOperation, user: User, db: AsyncSession) -> dict:
+    return {"success": True, "categories": await category_manager.list_categories(
+        user.phone_number, db, user=user,
+    )}
+
+
+async def _cat_create(op: CategoryOperation, user: User, db: AsyncSession) -> dict:
+    return {"success": True, "data": await category_manager.create_category(
+        user.phone_number, op.category_name, db, description=op.description, user=user,
+    )}
+
+
+async def _cat_edit(op: CategoryOperation, user: User, db: AsyncSession) -> dict:
+    return {"success": True, "data": await category_manager.edit_category(
+        user.phone_number, op.category_name, db,
+        new_name=op.new_name, description=op.description, user=user,
+    )}
+
+
+async def _cat_delete(op: CategoryOperation, user: User, db: AsyncSession) -> dict:
+    return {"success": True, "data": await category_manager.delete_category(
+        user.phone_number, op.category_name, db, user=user,
+    )}
+
+
+_CAT_OPS = {
+    "list":   _cat_list,
+    "create": _cat_create,
+    "edit":   _cat_edit,
+    "delete": _cat_delete,
+}
+
+
 @app.post("/api/categories/manage")
 async def manage_categories(
     operation: CategoryOperation,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    phone = current_user.phone_number
-    if operation.operation == "list":
-        return {"success": True, "categories": await category_manager.list_categories(phone, db)}
-    elif operation.operation == "create":
-        return {"success": True, "data": await category_manager.create_category(phone, operation.category_name, operation.description, db)}
-    elif operation.operation == "edit":
-        return {"success": True, "data": await category_manager.edit_category(phone, operation.category_name, operation.new_name, operation.description, db)}
-    elif operation.operation == "delete":
-        return {"success": True, "data": await category_manager.delete_category(phone, operation.category_name, db)}
-    raise HTTPException(status_code=400, detail="Invalid operation")
+    handler = _CAT_OPS.get(operation.operation)
+    if handler is None:
+        raise HTTPException(status_code=400, detail="Invalid operation")
+    return await handler(operation, current_user, db)
 
 
 @app.get("/api/admin/stats")
@@ -2930,14 +3060,7 @@ async def admin_stats(
     db: AsyncSession = Depends(get_db),
 ):
     """Admin-only endpoint — protected by ADMIN_SECRET env var."""
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided     = (
-        request.headers.get("X-Admin-Secret")
-        or request.query_params.get("admin_secret")
-        or ""
-    )
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
 
     now = datetime.utcnow()
     day_ago   = now - timedelta(days=1)
@@ -3161,63 +3284,83 @@ async def admin_stats(
     }
 
 
+ANALYTICS_CACHE_TTL = 60
+
+
 @app.get("/api/analytics")
 async def get_user_analytics(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    phone = current_user.phone_number
-    total = await db.scalar(
-        select(func.count(Message.id)).join(User).where(User.phone_number == phone)
-    )
-    cat_stats = await db.execute(
-        select(Category.name, func.count(Message.id))
-        .join(Message.category).join(User).where(User.phone_number == phone)
-        .group_by(Category.name)
-    )
-    type_stats = await db.execute(
-        select(Message.message_type, func.count(Message.id))
-        .join(User).where(User.phone_number == phone)
-        .group_by(Message.message_type)
+    # Dashboard counts are polled; a minute of staleness is invisible and saves the
+    # aggregate over the user's whole message history on every poll.
+    ck = redis_cache.analytics_key(current_user.id)
+    cached = await redis_cache.cache_get(ck)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
+    # One round-trip: GROUPING SETS yields per-category, per-type and grand-total rows.
+    # grouping() bitmask tells them apart — 1 = category row, 2 = type row, 3 = total.
+    rows = await db.execute(
+        select(
+            Category.name, Message.message_type, func.count(Message.id),
+            func.grouping(Category.name, Message.message_type),
+        )
+        .select_from(Message).outerjoin(Message.category)
+        .where(Message.user_id == current_user.id)
+        .group_by(func.grouping_sets(Category.name, Message.message_type, text("()")))
     )
-    return {
+    total, by_category, by_type = 0, {}, {}
+    for cat_name, msg_type, count, level in rows.all():
+        if level == 3:
+            total = count
+        elif level == 2:
+            by_type[msg_type.value] = count   # plain str keys: orjson rejects enum keys
+        elif cat_name is not None:   # uncategorised messages only count toward total/type
+            by_category[cat_name] = count
+    payload = {
         "total_messages": total,
-        "by_category":    dict(cat_stats.all()),
-        "by_type":        dict(type_stats.all()),
+        "by_category":    by_category,
+        "by_type":        by_type,
     }
+    _spawn(redis_cache.cache_set(ck, payload, ex=ANALYTICS_CACHE_TTL))
+    return ORJSONResponse(payload)
+
+
+_WEBHOOK_INFO_BODY = orjson.dumps({"platform": "whatsapp", "webhook_endpoint": "/webhook/whatsapp"})
 
 
 @app.get("/api/webhook/info")
 async def get_webhook_info():
     """Returns active webhook info."""
-    return {"platform": "whatsapp", "webhook_endpoint": "/webhook/whatsapp"}
+    return Response(_WEBHOOK_INFO_BODY, media_type="application/json")
 
 
 # ================== Pro Plan Endpoints ==================
 
-class InviteRequest(BaseModel):
+class InviteRequest(RequestModel):
     phone_number: Optional[str] = None
     email: Optional[str] = None
 
-class AcceptInviteRequest(BaseModel):
+class AcceptInviteRequest(RequestModel):
     token: str
 
-class CreateGroupRequest(BaseModel):
+class CreateGroupRequest(RequestModel):
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
     emoji: Optional[str] = None
     photo_url: Optional[str] = None
 
-class UpdateGroupPhotoRequest(BaseModel):
+class UpdateGroupPhotoRequest(RequestModel):
     photo_url: Optional[str] = None
 
-class UpdateGroupNameRequest(BaseModel):
+class UpdateGroupNameRequest(RequestModel):
     name: str = Field(..., min_length=1, max_length=100)
 
-class AddGroupMemberRequest(BaseModel):
+class AddGroupMemberRequest(RequestModel):
     user_id: int
 
-class AddGroupMemberByPhoneRequest(BaseModel):
+class AddGroupMemberByPhoneRequest(RequestModel):
     phone_number: str
 
 
@@ -3599,10 +3742,10 @@ async def settle_group_expenses(
     await db.refresh(marker)
 
     # Bust bootstrap cache for all group members so they see the settlement immediately
-    from services import redis_cache as _rc_settle
     settle_members = await grp_svc.get_group_members(group_id, db)
     for _sm in settle_members:
-        asyncio.create_task(_rc_settle.cache_del(_rc_settle.bootstrap_key(_sm["id"], group_id)))
+        _spawn(redis_cache.cache_del(redis_cache.bootstrap_key(_sm["id"], group_id)))
+        semantic_cache.invalidate(_sm["id"])
 
     return {"success": True, "settled_at": now.isoformat(), "message_id": marker.id}
 
@@ -3631,13 +3774,13 @@ async def remove_pro_member(
 
 
 # ── Coupon: validate (public, no auth needed for preview) ─────────────
-class CouponValidateRequest(BaseModel):
+class CouponValidateRequest(RequestModel):
     code: str
 
-class CouponRedeemRequest(BaseModel):
+class CouponRedeemRequest(RequestModel):
     code: str
 
-class CouponCreateRequest(BaseModel):
+class CouponCreateRequest(RequestModel):
     code: Optional[str] = None
     description: Optional[str] = None
     discount_type: str = "free"      # free | percent | fixed
@@ -3680,7 +3823,7 @@ async def founding_promo(db: AsyncSession = Depends(get_db)):
 
 
 # ── Product analytics (first-party) ─────────────────────────────────────
-class EventIn(BaseModel):
+class EventIn(RequestModel):
     event:       str
     props:       Optional[dict] = None
     session_id:  Optional[str]  = None
@@ -3690,14 +3833,49 @@ class EventIn(BaseModel):
     app_version: Optional[str]  = None
 
 
-class EventBatchIn(BaseModel):
+class EventBatchIn(RequestModel):
     events: List[EventIn]
 
 
-@app.post("/api/events")
-async def ingest_events(batch: EventBatchIn, request: Request, db: AsyncSession = Depends(get_db)):
+def _inline_json_schema(model) -> dict:
+    """A model's JSON schema with its $defs inlined. openapi_extra is merged verbatim into
+    the spec, where pydantic's "#/$defs/..." refs would not resolve."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return resolve(defs[ref.rsplit("/", 1)[1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+@app.post(
+    "/api/events",
+    # The body is read raw below, so FastAPI can't infer it — document it explicitly
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _inline_json_schema(EventBatchIn)}},
+    }},
+)
+async def ingest_events(request: Request, db: AsyncSession = Depends(get_db)):
     """Public batched analytics ingest. Works logged-in (user_id resolved from
     the bearer token) or anonymous (correlated by anon_id). Fire-and-forget."""
+    # Highest-rate body on the API: parse + validate the raw bytes in one pydantic-core
+    # pass instead of FastAPI's json.loads → dict → model_validate
+    try:
+        batch = EventBatchIn.model_validate_json(await request.body())
+    except ValidationError as e:
+        # Same 422 shape FastAPI produces for a typed body parameter: loc starts at "body"
+        raise RequestValidationError([
+            {**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)
+        ])
     auth_hdr = request.headers.get("Authorization", "")
     token    = auth_hdr[7:] if auth_hdr.lower().startswith("bearer ") else None
     user_id  = decode_user_id_safe(token)
@@ -3731,10 +3909,7 @@ async def admin_create_coupon(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
     body = await request.json()
     req  = CouponCreateRequest(**body)
     result = await cpn_svc.create_coupon(
@@ -3753,10 +3928,7 @@ async def admin_list_coupons(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
     coupons = await cpn_svc.list_coupons(db)
     return {"coupons": coupons}
 
@@ -3767,10 +3939,7 @@ async def admin_update_coupon(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
     body = await request.json()
     result = await db.execute(select(CouponCode).where(CouponCode.id == coupon_id))
     coupon = result.scalar_one_or_none()
@@ -3784,10 +3953,10 @@ async def admin_update_coupon(
 
 # ── Payments (Razorpay) ─────────────────────────────────────────────────────
 
-class PaymentCreateOrderRequest(BaseModel):
+class PaymentCreateOrderRequest(RequestModel):
     plan: str  # "monthly" | "annual"
 
-class PaymentVerifyRequest(BaseModel):
+class PaymentVerifyRequest(RequestModel):
     order_id: str
     payment_id: str
     signature: str
@@ -3819,17 +3988,25 @@ async def verify_payment(
     return result
 
 
+# Webhook acks are a fixed set of tiny bodies — serialise them once
+_WEBHOOK_ACKS = {s: orjson.dumps({"status": s}) for s in ("ok", "ignored", "signature_error")}
+
+
+def _webhook_ack(status: str) -> Response:
+    return Response(_WEBHOOK_ACKS[status], media_type="application/json")
+
+
 @app.post("/webhook/razorpay")
 async def razorpay_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     body = await request.body()
     signature = request.headers.get("X-Razorpay-Signature", "")
     ok = await pay_svc.handle_webhook(body, signature, db)
-    return {"status": "ok" if ok else "ignored"}
+    return _webhook_ack("ok" if ok else "ignored")
 
 
 # ── Apple In-App Purchase ────────────────────────────────────────────────────
 
-class IAPVerifyRequest(BaseModel):
+class IAPVerifyRequest(RequestModel):
     transaction_id: str
     original_transaction_id: str
 
@@ -3861,16 +4038,16 @@ async def apple_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     Must return HTTP 200 quickly — Apple retries on failure (up to 3 times).
     Configure in App Store Connect → your app → Subscriptions → Server URL.
     """
-    body = await request.json()
+    body = orjson.loads(await request.body())
     signed_payload = body.get("signedPayload", "")
     if not signed_payload:
         # Malformed — acknowledge so Apple stops retrying this exact payload
-        return {"status": "ignored"}
+        return _webhook_ack("ignored")
 
     ok = await iap_service.handle_notification(signed_payload, db)
     # Return 200 regardless so Apple doesn't flood us with retries on transient issues.
     # Genuine signature failures are logged; benign unknowns are silently acked.
-    return {"status": "ok" if ok else "signature_error"}
+    return _webhook_ack("ok" if ok else "signature_error")
 
 
 @app.delete("/api/admin/coupons/{coupon_id}")
@@ -3879,10 +4056,7 @@ async def admin_deactivate_coupon(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
     ok = await cpn_svc.deactivate(coupon_id, db)
     return {"success": ok}
 
@@ -3893,10 +4067,7 @@ async def admin_grant_pro(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
-    provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    _check_admin(request)
     body = await request.json()
     phone = body.get("phone_number")
     user  = await db.scalar(select(User).where(User.phone_number == phone))
@@ -3911,9 +4082,9 @@ async def admin_grant_pro(
 
 # ── Admin: product analytics readouts ───────────────────────────────────
 def _check_admin(request: Request):
-    admin_secret = os.getenv("ADMIN_SECRET", "")
+    admin_secret = Config.ADMIN_SECRET
     provided = request.headers.get("X-Admin-Secret") or request.query_params.get("admin_secret") or ""
-    if not admin_secret or provided != admin_secret:
+    if not admin_secret or not secrets.compare_digest(provided.encode(), admin_secret.encode()):
         raise HTTPException(status_code=403, detail="Forbidden")
 
 
@@ -3987,30 +4158,43 @@ async def admin_reembed(request: Request, user_id: Optional[int] = None,
     _check_admin(request)
     from services.embedding_service import embedding_service
 
-    q = select(Message).where(Message.embedding.is_(None)).order_by(Message.created_at.desc()).limit(min(limit, 200))
+    # Project only what the enrichment text needs — not full ORM rows
+    q = (
+        select(Message.id, Message.content, Message.summary, Message.tags)
+        .where(Message.embedding.is_(None))
+        .order_by(Message.created_at.desc())
+        .limit(min(limit, 200))
+    )
     if user_id is not None:
         q = q.where(Message.user_id == user_id)
-    rows = (await db.execute(q)).scalars().all()
+    rows = (await db.execute(q)).all()
 
-    ok, failed = 0, 0
+    ids, texts = [], []
     for msg in rows:
+        text_to_embed = (msg.content or "").strip()
+        if not text_to_embed:
+            continue
+        tags = msg.tags if isinstance(msg.tags, dict) else {}
+        ids.append(msg.id)
+        texts.append(" ".join(filter(None, [
+            text_to_embed,
+            tags.get("essence", "") or (msg.summary or ""),
+            " ".join(tags.get("keywords", [])),
+        ])).strip())
+
+    # One batchEmbedContents call (limit ≤ 200 → at most 2) + one executemany UPDATE,
+    # instead of an embed round-trip and an UPDATE per message
+    ok, failed = 0, 0
+    if ids:
         try:
-            text_to_embed = (msg.content or "").strip()
-            if not text_to_embed:
-                continue
-            tags = msg.tags if isinstance(msg.tags, dict) else {}
-            enriched = " ".join(filter(None, [
-                text_to_embed,
-                tags.get("essence", "") or (msg.summary or ""),
-                " ".join(tags.get("keywords", [])),
-            ])).strip()
-            embedding = await embedding_service.aembed(enriched, task_type="RETRIEVAL_DOCUMENT")
+            embeddings = await embedding_service.aembed_batch(texts, task_type="RETRIEVAL_DOCUMENT")
             await db.execute(
-                update(Message).where(Message.id == msg.id).values(embedding=embedding)
+                update(Message),
+                [{"id": i, "embedding": e} for i, e in zip(ids, embeddings)],
             )
-            ok += 1
+            await db.commit()
+            ok = len(ids)
         except Exception as e:
-            print(f"[reembed] msg {msg.id} failed: {e}")
-            failed += 1
-    await db.commit()
+            logger.warning("[reembed] batch of {} failed: {}", len(ids), e)
+            failed = len(ids)
     return {"reembedded": ok, "failed": failed, "total_found": len(rows)}
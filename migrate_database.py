@@ -23,137 +23,106 @@ print(f"✓ Using database: {DATABASE_URL.split('@')[1].split('/')[0]}")
 from database import engine, async_session_maker
 
 
-async def check_column_exists(table: str, column: str) -> bool:
-    """Check if a column exists in a table"""
-    async with async_session_maker() as session:
-        query = text(f"""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='{table}' AND column_name='{column}'
-        """)
-        print(query)
-        result = await session.execute(query)
-        return result.fetchone() is not None
-
-
-async def add_column_if_not_exists(table: str, column: str, definition: str):
-    """Add a column if it doesn't exist"""
-    exists = await check_column_exists(table, column)
-    
-    if not exists:
-        async with async_session_maker() as session:
-            query = text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
-            await session.execute(query)
-            await session.commit()
-            print(f"✓ Added column {column} to {table}")
-    else:
-        print(f"⊘ Column {column} already exists in {table}")
+# (column, definition) pairs added to `users` after the initial deploy. Column names
+# are interpolated into DDL, so only names from this list ever reach ALTER TABLE.
+USER_COLUMNS = [
+    ("email",         "VARCHAR(255) UNIQUE NOT NULL DEFAULT ''"),
+    ("age",           "INTEGER DEFAULT 0"),
+    ("occupation",    "VARCHAR(100) DEFAULT ''"),
+    ("password_hash", "VARCHAR(255) DEFAULT ''"),
+    ("is_active",     "BOOLEAN DEFAULT TRUE"),
+    ("is_verified",   "BOOLEAN DEFAULT FALSE"),
+    ("last_login",    "TIMESTAMP"),
+]
+
+
+async def existing_columns(session, table: str) -> set:
+    """All column names of a table — one information_schema read instead of one per column"""
+    result = await session.execute(
+        text("SELECT column_name FROM information_schema.columns WHERE table_name = :table"),
+        {"table": table},
+    )
+    return {row[0] for row in result}
 
 
-async def migrate_user_table():
+async def migrate_user_table(session):
     """Add new user registration fields"""
     print("\n🔄 Migrating users table...")
     
-    # Add email column
-    await add_column_if_not_exists(
-        'users', 
-        'email', 
-        'VARCHAR(255) UNIQUE NOT NULL DEFAULT \'\''
-    )
-    
-    # Add age column
-    await add_column_if_not_exists(
-        'users', 
-        'age', 
-        'INTEGER DEFAULT 0'
-    )
-    
-    # Add occupation column
-    await add_column_if_not_exists(
-        'users', 
-        'occupation', 
-        'VARCHAR(100) DEFAULT \'\''
-    )
-    
-    # Add password_hash column
-    await add_column_if_not_exists(
-        'users', 
-        'password_hash', 
-        'VARCHAR(255) DEFAULT \'\''
-    )
-    
-    # Add is_active column
-    await add_column_if_not_exists(
-        'users', 
-        'is_active', 
-        'BOOLEAN DEFAULT TRUE'
-    )
-    
-    # Add is_verified column
-    await add_column_if_not_exists(
-        'users', 
-        'is_verified', 
-        'BOOLEAN DEFAULT FALSE'
-    )
-    
-    # Add last_login column
-    await add_column_if_not_exists(
-        'users', 
-        'last_login', 
-        'TIMESTAMP'
-    )
+    existing = await existing_columns(session, "users")
+    missing = [(c, d) for c, d in USER_COLUMNS if c not in existing]
+    for column, _ in USER_COLUMNS:
+        if column in existing:
+            print(f"⊘ Column {column} already exists in users")
+    if missing:
+        # One multi-action ALTER: a single ACCESS EXCLUSIVE lock and catalog update
+        # instead of one per column
+        await session.execute(text(
+            "ALTER TABLE users " + ", ".join(f"ADD COLUMN {c} {d}" for c, d in missing)
+        ))
+        for column, _ in missing:
+            print(f"✓ Added column {column} to users")
     
     print("✓ Users table migration complete\n")
 
 
-async def create_otp_table():
+async def create_otp_table(session):
     """Create OTP verification table if it doesn't exist"""
     print("🔄 Creating otp_verifications table...")
     
-    async with async_session_maker() as session:
-        create_table_query = text("""
-            CREATE TABLE IF NOT EXISTS otp_verifications (
-                id SERIAL PRIMARY KEY,
-                phone_number VARCHAR(20) NOT NULL,
-                otp_code VARCHAR(6) NOT NULL,
-                is_verified BOOLEAN DEFAULT FALSE,
-                attempts INTEGER DEFAULT 0,
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        await session.execute(create_table_query)
-        
-        # Create index on phone_number
-        create_index_query = text("""
-            CREATE INDEX IF NOT EXISTS idx_otp_phone 
-            ON otp_verifications(phone_number)
-        """)
-        
-        await session.execute(create_index_query)
-        await session.commit()
+    await session.execute(text("""
+        CREATE TABLE IF NOT EXISTS otp_verifications (
+            id SERIAL PRIMARY KEY,
+            phone_number VARCHAR(20) NOT NULL,
+            otp_code VARCHAR(6) NOT NULL,
+            is_verified BOOLEAN DEFAULT FALSE,
+            attempts INTEGER DEFAULT 0,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    
+    # Same index init_db builds — newest-code-per-phone lookups without a sort
+    await session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_otp_phone_verified_created
+        ON otp_verifications(phone_number, is_verified, created_at DESC)
+    """))
         
     print("✓ OTP verifications table created\n")
 
 
+# name → target. Built CONCURRENTLY so writers aren't blocked on a live database.
+# (No idx_messages_user: init_db's idx_messages_user_created(user_id, created_at DESC)
+# already covers user_id lookups, and init_db drops that prefix index on purpose.)
+INDEXES = {
+    "idx_users_email":       "users(email)",
+    "idx_users_phone":       "users(phone_number)",
+    "idx_messages_category": "messages(category_id)",
+    "idx_categories_user":   "categories(user_id)",
+}
+
+
+async def create_index(name: str, target: str):
+    # CONCURRENTLY can't run in a transaction block — own AUTOCOMMIT connection per index
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}"))
+        except Exception:
+            # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would
+            # then skip forever — remove it so the next run rebuilds
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            raise
+
+
 async def create_indexes():
     """Create necessary indexes for performance"""
     print("🔄 Creating indexes...")
     
-    async with async_session_maker() as session:
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
-            "CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone_number)",
-            "CREATE INDEX IF NOT EXISTS idx_messages_user ON messages(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_messages_category ON messages(category_id)",
-            "CREATE INDEX IF NOT EXISTS idx_categories_user ON categories(user_id)",
-        ]
-        
-        for index_query in indexes:
-            await session.execute(text(index_query))
-        
-        await session.commit()
+    # One at a time: each build waits out in-flight writers rather than blocking them, and
+    # a failure stops here before main() disposes the engine under any other build
+    for name, target in INDEXES.items():
+        await create_index(name, target)
     
     print("✓ Indexes created\n")
 
@@ -204,8 +173,12 @@ async def main():
     
     try:
         # Run migrations
-        await migrate_user_table()
-        await create_otp_table()
+        # One transaction for the table changes: a single COMMIT, and a failure
+        # part-way leaves the schema exactly as it was
+        async with async_session_maker() as session, session.begin():
+            await migrate_user_table(session)
+            await create_otp_table(session)
+        # Indexes after the tables exist, outside any transaction (CONCURRENTLY)
         await create_indexes()
         await verify_migration()
         
@@ -3,15 +3,18 @@ Authentication Service
 Handles OTP generation, verification, and user authentication
 """
 
-import random
-import string
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import hashlib
+import hmac
 import secrets
 import os
+import time
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func, exists, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
@@ -22,6 +25,8 @@ from services.sms_service import sms_service
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -29,6 +34,31 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key")
 ALGORITHM = "HS256"
 
+# Argon2id with the library's RFC 9106 defaults. Hashes are self-describing
+# ("$argon2id$v=19$m=...") so parameters can be raised later and old hashes still verify;
+# anything else stored in password_hash is the legacy "salt$sha256" format.
+_hasher = PasswordHasher()
+# Verified against whenever there is no usable stored hash, so that path costs the same
+# as a real check and response time doesn't reveal whether an account/hash exists
+_DUMMY_HASH = _hasher.hash(secrets.token_urlsafe(16))
+
+
+def _dummy_verify(password: str) -> None:
+    try:
+        _hasher.verify(_DUMMY_HASH, password)
+    except VerificationError:
+        pass
+
+# Argon2 is deliberately slow (tens of ms, 64 MiB per hash) and releases the GIL, so it
+# runs here instead of on the event loop. Small and dedicated: the worker count caps
+# concurrent hashes — and their memory — during a login burst, and keeps them from
+# queueing behind other users of the default executor.
+_hash_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="pwhash")
+
+
+async def _in_hash_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+
 
 class AuthService:
     """Authentication service for OTP and user management"""
@@ -38,27 +68,60 @@ class AuthService:
     RESEND_COOLDOWN_SECONDS = Config.OTP_RESEND_COOLDOWN_SECONDS
     MAX_OTP_PER_DAY = Config.OTP_MAX_PER_DAY
 
+    # Positive check_otp_verified results, cached briefly: register_user retries (validation
+    # errors, flaky networks) re-ask the same question right after the user verified.
+    # Only True is cached — a False must always re-check, or a fresh verify would be missed.
+    OTP_VERIFIED_CACHE_TTL = 300
+    OTP_VERIFIED_CACHE_MAX = 10_000
+
     def __init__(self):
-        pass
+        # phone_number → expires_at (monotonic), insertion-ordered so the oldest evicts first
+        self._otp_verified: Dict[str, float] = {}
+
+    def _remember_otp_verified(self, phone_number: str) -> None:
+        self._otp_verified.pop(phone_number, None)
+        self._otp_verified[phone_number] = time.monotonic() + self.OTP_VERIFIED_CACHE_TTL
+        if len(self._otp_verified) > self.OTP_VERIFIED_CACHE_MAX:
+            del self._otp_verified[next(iter(self._otp_verified))]
 
     @staticmethod
     def generate_otp(length: int = 6) -> str:
-        return ''.join(random.choices(string.digits, k=length))
+        # CSPRNG — random's Mersenne Twister output is predictable from past samples
+        return f"{secrets.randbelow(10 ** length):0{length}d}"
 
     @staticmethod
     def hash_password(password: str) -> str:
-        salt = secrets.token_hex(16)
-        hashed = hashlib.sha256((password + salt).encode()).hexdigest()
-        return f"{salt}${hashed}"
+        return _hasher.hash(password)
 
     @staticmethod
-    def verify_password(password: str, password_hash: str) -> bool:
-        try:
-            salt, hashed = password_hash.split('$')
-            test_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-            return test_hash == hashed
-        except Exception:
+    def verify_password(password: str, password_hash: Optional[str]) -> bool:
+        password_hash = password_hash or ""
+        if password_hash.startswith("$argon2"):
+            try:
+                return _hasher.verify(password_hash, password)
+            except VerificationError:
+                return False
+            except InvalidHashError:
+                _dummy_verify(password)
+                return False
+        parts = password_hash.split('$')
+        if len(parts) != 2:
+            # Malformed / unknown format — still do a full-cost check before failing
+            _dummy_verify(password)
             return False
+        salt, hashed = parts
+        test_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(test_hash.encode(), hashed.encode())
+
+    @staticmethod
+    def needs_rehash(password_hash: str) -> bool:
+        """True for legacy SHA-256 hashes and Argon2 hashes made with older parameters."""
+        if not password_hash.startswith("$argon2"):
+            return True
+        try:
+            return _hasher.check_needs_rehash(password_hash)
+        except InvalidHashError:
+            return True
 
     def create_access_token(self, user_id: int) -> str:
         payload = {
@@ -101,18 +164,17 @@ class AuthService:
             now = datetime.utcnow()
             day_ago = now - timedelta(hours=24)
 
-            # Pull this phone's OTPs from the last 24h for anti-pumping checks.
-            recent_result = await db.execute(
-                select(OTPVerification)
+            # This phone's OTP count + newest send in the last 24h, for anti-pumping checks —
+            # aggregated in SQL, no rows loaded.
+            sent_today, last_sent = (await db.execute(
+                select(func.count(), func.max(OTPVerification.created_at))
                 .where(OTPVerification.phone_number == phone_number)
                 .where(OTPVerification.created_at > day_ago)
-                .order_by(OTPVerification.created_at.desc())
-            )
-            recent = recent_result.scalars().all()
+            )).one()
 
             # Resend cooldown — block rapid re-requests (we pay per SMS).
-            if recent:
-                since_last = (now - recent[0].created_at).total_seconds()
+            if last_sent is not None:
+                since_last = (now - last_sent).total_seconds()
                 if since_last < self.RESEND_COOLDOWN_SECONDS:
                     wait = int(self.RESEND_COOLDOWN_SECONDS - since_last) + 1
                     return {
@@ -122,7 +184,7 @@ class AuthService:
                     }
 
             # Daily cap per phone number.
-            if len(recent) >= self.MAX_OTP_PER_DAY:
+            if sent_today >= self.MAX_OTP_PER_DAY:
                 return {
                     "success": False,
                     "message": "Too many OTP requests today. Please try again later.",
@@ -138,9 +200,13 @@ class AuthService:
 
             # Invalidate any still-valid previous code (one active code at a time)
             # but keep the rows so the 24h rate-limit counter stays accurate.
-            for r in recent:
-                if not r.is_verified and r.expires_at > now:
-                    r.expires_at = now
+            await db.execute(
+                update(OTPVerification)
+                .where(OTPVerification.phone_number == phone_number)
+                .where(OTPVerification.is_verified == False)
+                .where(OTPVerification.expires_at > now)
+                .values(expires_at=now)
+            )
 
             # Hard-delete only truly-old rows (>24h) to keep the table bounded.
             await db.execute(
@@ -207,6 +273,7 @@ class AuthService:
                 .where(OTPVerification.phone_number == phone_number)
                 .where(OTPVerification.is_verified == False)
                 .order_by(OTPVerification.created_at.desc())
+                .limit(1)
             )
 
             # send_otp() now keeps superseded rows for rate-limiting, so there
@@ -234,9 +301,27 @@ class AuthService:
                     "verified": False
                 }
 
-            if otp_record.otp_code == otp_code:
-                otp_record.is_verified = True
+            # Both outcomes are single conditional UPDATEs, so concurrent submissions can't
+            # each read attempts=4 and slip past the limit (or double-count).
+            if hmac.compare_digest(otp_record.otp_code.encode(), otp_code.encode()):
+                verified_id = await db.scalar(
+                    update(OTPVerification)
+                    .where(OTPVerification.id == otp_record.id)
+                    .where(OTPVerification.is_verified == False)
+                    .where(OTPVerification.attempts < self.MAX_OTP_ATTEMPTS)
+                    .where(OTPVerification.expires_at > datetime.utcnow())
+                    .values(is_verified=True)
+                    .returning(OTPVerification.id)
+                )
                 await db.commit()
+                if verified_id is None:
+                    # Lost a race with another submission for the same code
+                    return {
+                        "success": False,
+                        "message": "OTP no longer valid",
+                        "verified": False
+                    }
+                self._remember_otp_verified(phone_number)
 
                 return {
                     "success": True,
@@ -244,10 +329,15 @@ class AuthService:
                     "verified": True
                 }
 
-            otp_record.attempts += 1
+            attempts = await db.scalar(
+                update(OTPVerification)
+                .where(OTPVerification.id == otp_record.id)
+                .values(attempts=OTPVerification.attempts + 1)
+                .returning(OTPVerification.attempts)
+            )
             await db.commit()
 
-            remaining = self.MAX_OTP_ATTEMPTS - otp_record.attempts
+            remaining = max(0, self.MAX_OTP_ATTEMPTS - attempts)
 
             return {
                 "success": False,
@@ -263,6 +353,22 @@ class AuthService:
                 "verified": False
             }
 
+    async def check_otp_verified(self, phone_number: str, db: AsyncSession) -> bool:
+        """Whether this phone has a verified OTP. Several verified rows can coexist
+        (resend) — any one is sufficient, so this is an EXISTS probe, not a row fetch."""
+        expires = self._otp_verified.get(phone_number)
+        if expires is not None and expires > time.monotonic():
+            return True
+        verified = bool(await db.scalar(
+            select(exists().where(
+                OTPVerification.phone_number == phone_number,
+                OTPVerification.is_verified == True,
+            ))
+        ))
+        if verified:
+            self._remember_otp_verified(phone_number)
+        return verified
+
     async def login_user(
         self,
         password: str,
@@ -280,6 +386,8 @@ class AuthService:
                 user = await db.scalar(select(User).where(User.phone_number == phone_number))
 
             if not user:
+                # Same Argon2 cost as a wrong password, so timing doesn't reveal the account
+                await _in_hash_pool(_dummy_verify, password)
                 return {
                     "success": False,
                     "message": "Invalid credentials"
@@ -296,12 +404,15 @@ class AuthService:
                     "message": "This account was created with Apple Sign-In. Please use the 'Sign in with Apple' button instead."
                 }
 
-            if not self.verify_password(password, user.password_hash):
+            if not await _in_hash_pool(self.verify_password, password, user.password_hash):
                 return {
                     "success": False,
                     "message": "Invalid credentials"
                 }
 
+            # The plaintext is only in hand at login — upgrade old hashes while it is
+            if self.needs_rehash(user.password_hash):
+                user.password_hash = await _in_hash_pool(self.hash_password, password)
             user.last_login = datetime.utcnow()
             await db.commit()
 
@@ -329,6 +440,19 @@ class AuthService:
                 "message": str(e)
             }
 
+    async def _registration_conflict(self, phone_number: str, email: str, db: AsyncSession) -> Optional[str]:
+        """Why this phone/email can't register (None if both are free)."""
+        row = (await db.execute(
+            select(User.phone_number, User.email)
+            .where(or_(User.phone_number == phone_number, User.email == email))
+            .limit(1)
+        )).first()
+        if row is None:
+            return None
+        if row.phone_number == phone_number:
+            return "User already exists"
+        return "An account with this email already exists"
+
     async def register_user(
         self,
         phone_number: str,
@@ -344,48 +468,45 @@ class AuthService:
         OTP verification is optional based on Config.ENABLE_OTP.
         """
 
-        # Check if user already exists
-        result = await db.execute(
-            select(User).where(User.phone_number == phone_number)
-        )
-        existing_user = result.scalar_one_or_none()
-        if existing_user:
-            return {"success": False, "message": "User already exists"}
+        # Cheap duplicate probe first — an existing account gets "already exists" without
+        # an OTP lookup or burning an Argon2 hash
+        conflict = await self._registration_conflict(phone_number, email, db)
+        if conflict:
+            return {"success": False, "message": conflict}
 
         # If OTP is enabled, verify it first
-        if Config.ENABLE_OTP:
-            otp_result = await db.execute(
-                select(OTPVerification)
-                .where(OTPVerification.phone_number == phone_number)
-                .where(OTPVerification.is_verified == True)
-                .order_by(OTPVerification.created_at.desc())
-            )
-            # Several verified rows can coexist (resend) — any one is sufficient.
-            otp_verified = otp_result.scalars().first()
-            if not otp_verified:
-                return {"success": False, "message": "OTP verification required"}
+        if Config.ENABLE_OTP and not await self.check_otp_verified(phone_number, db):
+            return {"success": False, "message": "OTP verification required"}
 
         # Hash the password
-        password_hash = self.hash_password(password)
-
-        # Create the new user
-        new_user = User(
-            name=name,
-            email=email,
-            age=age,
-            phone_number=phone_number,
-            password_hash=password_hash,
-            timezone=timezone,
-            created_at=datetime.utcnow(),
-            last_login=None
+        password_hash = await _in_hash_pool(self.hash_password, password)
+
+        # The probe above can race a concurrent registration, so the insert stays
+        # ON CONFLICT DO NOTHING: the unique phone/email constraints have the final say,
+        # and RETURNING hands back the id without a refresh SELECT.
+        new_user_id = await db.scalar(
+            pg_insert(User)
+            .values(
+                name=name,
+                email=email,
+                age=age,
+                phone_number=phone_number,
+                password_hash=password_hash,
+                timezone=timezone,
+                last_login=None,
+            )
+            .on_conflict_do_nothing()
+            .returning(User.id)
         )
-
-        db.add(new_user)
+        if new_user_id is None:
+            await db.rollback()
+            # Lost the race — look again to say which field collided
+            conflict = await self._registration_conflict(phone_number, email, db)
+            return {"success": False, "message": conflict or "User already exists"}
         await db.commit()
-        await db.refresh(new_user)
 
         # Generate access token
-        access_token = self.create_access_token(new_user.id)
+        access_token = self.create_access_token(new_user_id)
 
         return {
             "success": True,
@@ -393,11 +514,11 @@ class AuthService:
             "data": {
                 "access_token": access_token,
                 "user": {
-                    "id": new_user.id,
-                    "phone_number": new_user.phone_number,
-                    "name": new_user.name,
-                    "email": new_user.email,
-                    "timezone": new_user.timezone
+                    "id": new_user_id,
+                    "phone_number": phone_number,
+                    "name": name,
+                    "email": email,
+                    "timezone": timezone
                 }
             }
         }
@@ -408,7 +529,7 @@ class AuthService:
             return {"success": False, "message": "No account found with this phone number"}
         
         # Use the same hash_password as register_user and login_user
-        new_hash = self.hash_password(new_password)
+        new_hash = await _in_hash_pool(self.hash_password, new_password)
         await db.execute(
             update(User)
             .where(User.phone_number == phone_number)
@@ -418,6 +539,34 @@ class AuthService:
         
         return {"success": True, "message": "Password reset successfully"}
 
+# Verified access tokens: every authenticated request re-presents the same bearer token,
+# so re-running HMAC + base64 + JSON + claim checks on each one is wasted work. Only
+# tokens that decoded cleanly are cached, keyed by a digest (not the token itself), and
+# an entry never outlives the token's own exp.
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAX = 50_000
+_token_cache: Dict[bytes, Tuple[Optional[str], float]] = {}  # digest → (sub, valid_until)
+
+
+def _verified_sub(token: str) -> Optional[str]:
+    """`sub` claim of a valid token. Raises JWTError for a bad or expired token."""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    now = time.time()
+    hit = _token_cache.get(key)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    valid_until = now + TOKEN_CACHE_TTL
+    if payload.get("exp") is not None:
+        valid_until = min(valid_until, float(payload["exp"]))
+    _token_cache.pop(key, None)
+    _token_cache[key] = (payload.get("sub"), valid_until)
+    if len(_token_cache) > TOKEN_CACHE_MAX:
+        del _token_cache[next(iter(_token_cache))]
+    return payload.get("sub")
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -433,8 +582,7 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
+        user_id: str = _verified_sub(token)
 
         if user_id is None:
             raise credentials_exception
@@ -461,8 +609,7 @@ def decode_user_id_safe(token: Optional[str]) -> Optional[int]:
     if not token:
         return None
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        uid = payload.get("sub")
+        uid = _verified_sub(token)
         return int(uid) if uid is not None else None
     except Exception:
         return None
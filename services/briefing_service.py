@@ -18,6 +18,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import async_session_maker, Message, User, Category, DeviceToken, GroupMember
 from services.reminder_service import send_apns_notification
 from services.group_service import total_unread_for_user
+from loguru import logger
 
 
 IST = ZoneInfo("Asia/Kolkata")
@@ -52,7 +53,7 @@ class BriefingService:
             try:
                 await self._send_briefing(user)
             except Exception as e:
-                print(f"[briefing] Failed for user {user.id}: {e}")
+                logger.warning("[briefing] Failed for user {}: {}", user.id, e)
 
     async def _send_briefing(self, user: User):
         """Build and send the morning briefing for one user."""
@@ -123,7 +124,7 @@ class BriefingService:
                     category="BRIEFING_TAP",
                 )
         except Exception as e:
-            print(f"[briefing] APNs delivery failed for user {user.id}: {e}")
+            logger.warning("[briefing] APNs delivery failed for user {}: {}", user.id, e)
 
 
     async def _carry_forward(
@@ -293,7 +294,7 @@ class BriefingService:
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[briefing] Failed to set briefing time: {e}")
+            logger.warning("[briefing] Failed to set briefing time: {}", e)
             return False
 
 
@@ -6,32 +6,52 @@ IMPORTANT: Save this file as services/category_manager.py
 Create a 'services' folder and put this file inside it
 """
 
-from typing import List, Dict, Optional
+import time
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, update, func, and_
 
 from database import User, Category, Message
 from cerebras_client import CerebrasClient
 
+# Listings (with per-category message counts) are read far more often than categories
+# change. Mutations here invalidate immediately; counts drifting from new captures are
+# covered by callers invalidating after a save, and by the TTL for everything else.
+LIST_CACHE_TTL = 60
+LIST_CACHE_MAX_USERS = 5000
+
 
 class CategoryManager:
     """Manage user categories"""
     
     def __init__(self, cerebras_client: CerebrasClient):
         self.cerebras = cerebras_client
+        # user_id → (expires_at, listing), insertion-ordered so the oldest entry evicts first
+        self._list_cache: Dict[int, Tuple[float, List[Dict]]] = {}
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached category listing (after anything that changes its counts)."""
+        self._list_cache.pop(user_id, None)
     
     async def list_categories(
         self,
         user_phone: str,
-        db: AsyncSession
+        db: AsyncSession,
+        user: Optional[User] = None,
     ) -> List[Dict]:
         """
         Get all categories for a user with message counts
         """
         
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             return []
+
+        hit = self._list_cache.get(user.id)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
         
         # Get categories with message counts
         stmt = (
@@ -48,7 +68,7 @@ class CategoryManager:
         result = await db.execute(stmt)
         rows = result.all()
         
-        return [
+        listing = [
             {
                 "id": category.id,
                 "name": category.name,
@@ -61,6 +81,11 @@ class CategoryManager:
             }
             for category, count in rows
         ]
+        self._list_cache.pop(user.id, None)
+        self._list_cache[user.id] = (time.monotonic() + LIST_CACHE_TTL, listing)
+        if len(self._list_cache) > LIST_CACHE_MAX_USERS:
+            del self._list_cache[next(iter(self._list_cache))]
+        return listing
     
     async def create_category(
         self,
@@ -70,10 +95,13 @@ class CategoryManager:
         description: Optional[str] = None,
         color: Optional[str] = None,   # add
         icon: Optional[str] = None,    # add
+        user: Optional[User] = None,
     ) -> Dict:
         """Create a new category"""
         
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             raise ValueError("User not found")
         
@@ -101,6 +129,7 @@ class CategoryManager:
         
         db.add(category)
         await db.commit()
+        self.invalidate(user.id)
         await db.refresh(category)
         
         return {
@@ -117,10 +146,13 @@ class CategoryManager:
         db: AsyncSession,
         new_name: Optional[str] = None,
         description: Optional[str] = None,
+        user: Optional[User] = None,
     ) -> Dict:
         """Edit an existing category"""
         
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             raise ValueError("User not found")
         
@@ -159,6 +191,7 @@ class CategoryManager:
             category.description = description
         
         await db.commit()
+        self.invalidate(user.id)
         await db.refresh(category)
         
         return {
@@ -174,12 +207,15 @@ class CategoryManager:
         name: str,
         db: AsyncSession,
         reassign_to: Optional[str] = "Uncategorized",
+        user: Optional[User] = None,
     ) -> Dict:
         """
         Delete a category
         """
         
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             raise ValueError("User not found")
         
@@ -218,23 +254,22 @@ class CategoryManager:
                 db.add(reassign_category)
                 await db.flush()
         
-        # Get messages in this category
-        messages_result = await db.execute(
-            select(Message).where(Message.category_id == category.id)
+        # Reassign messages — one UPDATE instead of loading every row and flushing
+        # one UPDATE per message
+        reassigned = await db.execute(
+            update(Message)
+            .where(Message.category_id == category.id)
+            .values(category_id=reassign_category.id if reassign_category else None)
         )
-        messages = messages_result.scalars().all()
-        
-        # Reassign messages
-        for message in messages:
-            message.category_id = reassign_category.id if reassign_category else None
         
         # Delete category
         await db.delete(category)
         await db.commit()
+        self.invalidate(user.id)
         
         return {
             "deleted": name,
-            "messages_reassigned": len(messages),
+            "messages_reassigned": reassigned.rowcount,
             "reassigned_to": reassign_to
         }
     
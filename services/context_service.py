@@ -11,6 +11,7 @@ import json
 import os
 from typing import Optional, Dict
 from upstash_redis.asyncio import Redis
+from loguru import logger
 
 
 def _get_redis() -> Redis:
@@ -35,7 +36,7 @@ class ContextService:
             })
             await redis.set(f"ctx:search:{user_id}", payload, ex=self.CONTEXT_TTL)
         except Exception as e:
-            print(f"[context] Failed to set search context: {e}")
+            logger.warning("[context] Failed to set search context: {}", e)
 
     async def get_search_context(self, user_id: int) -> Optional[Dict]:
         """Retrieve last search context if still fresh."""
@@ -45,7 +46,7 @@ class ContextService:
             if raw:
                 return json.loads(raw)
         except Exception as e:
-            print(f"[context] Failed to get search context: {e}")
+            logger.warning("[context] Failed to get search context: {}", e)
         return None
 
     async def clear_search_context(self, user_id: int) -> None:
@@ -53,7 +54,7 @@ class ContextService:
             redis = _get_redis()
             await redis.delete(f"ctx:search:{user_id}")
         except Exception as e:
-            print(f"[context] Failed to clear search context: {e}")
+            logger.warning("[context] Failed to clear search context: {}", e)
 
     async def set_last_action(self, user_id: int, action: str, data: Dict) -> None:
         """Store the last action for undo support."""
@@ -62,7 +63,7 @@ class ContextService:
             payload = json.dumps({"action": action, "data": data})
             await redis.set(f"ctx:action:{user_id}", payload, ex=300)  # 5 min TTL
         except Exception as e:
-            print(f"[context] Failed to set last action: {e}")
+            logger.warning("[context] Failed to set last action: {}", e)
 
     async def get_last_action(self, user_id: int) -> Optional[Dict]:
         try:
@@ -71,7 +72,7 @@ class ContextService:
             if raw:
                 return json.loads(raw)
         except Exception as e:
-            print(f"[context] Failed to get last action: {e}")
+            logger.warning("[context] Failed to get last action: {}", e)
         return None
 
     async def set_pending_confirmation(self, user_id: int, confirmation_type: str, data: Dict) -> None:
@@ -84,7 +85,7 @@ class ContextService:
             payload = json.dumps({"type": confirmation_type, "data": data})
             await redis.set(f"ctx:confirm:{user_id}", payload, ex=300)  # 5 min TTL
         except Exception as e:
-            print(f"[context] Failed to set confirmation: {e}")
+            logger.warning("[context] Failed to set confirmation: {}", e)
 
     async def get_pending_confirmation(self, user_id: int) -> Optional[Dict]:
         try:
@@ -93,7 +94,7 @@ class ContextService:
             if raw:
                 return json.loads(raw)
         except Exception as e:
-            print(f"[context] Failed to get confirmation: {e}")
+            logger.warning("[context] Failed to get confirmation: {}", e)
         return None
 
     async def clear_pending_confirmation(self, user_id: int) -> None:
@@ -101,7 +102,7 @@ class ContextService:
             redis = _get_redis()
             await redis.delete(f"ctx:confirm:{user_id}")
         except Exception as e:
-            print(f"[context] Failed to clear confirmation: {e}")
+            logger.warning("[context] Failed to clear confirmation: {}", e)
 
     async def set_checklist_context(
         self, user_id: int, message_id: int, date_from: str, date_to: str
@@ -116,7 +117,7 @@ class ContextService:
                 ex=self.CONTEXT_TTL,
             )
         except Exception as e:
-            print(f"[context] Failed to set checklist context: {e}")
+            logger.warning("[context] Failed to set checklist context: {}", e)
 
     async def get_checklist_context(
         self, user_id: int, message_id: int
@@ -128,7 +129,7 @@ class ContextService:
             if raw:
                 return json.loads(raw)
         except Exception as e:
-            print(f"[context] Failed to get checklist context: {e}")
+            logger.warning("[context] Failed to get checklist context: {}", e)
         return None
 
 # Singleton
@@ -13,9 +13,15 @@ File type is detected by magic bytes (reliable) and falls back to a filename/url
 hint, because our internal media urls (/api/images/{id}) carry no file extension.
 """
 
+import asyncio
 import httpx
 import io
+import multiprocessing
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from loguru import logger
 
 # Control chars that must not reach Postgres. 0x00 is invalid in UTF-8 text
 # columns (asyncpg raises CharacterNotInRepertoireError); other C0 controls
@@ -23,6 +29,54 @@ import re
 _CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
 
 
+# PDF/DOCX parsing is pure-Python CPU work that holds the GIL, so a worker thread still
+# starves the event loop. It runs in a small process pool instead: at most
+# EXTRACT_WORKERS files parse at once (the rest queue), and a parser crash or OOM on a
+# hostile file kills a worker, not the API. Created on first use — most processes
+# never see a document — with "spawn" so children don't inherit the event loop's
+# threads or sockets.
+EXTRACT_WORKERS = 2
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _extract_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_extract_pool() -> None:
+    """Stop the worker processes — called from the FastAPI lifespan on shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+async def _run_in_pool(fn, content: bytes, max_chars: int) -> str:
+    global _pool
+    pool = _extract_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, content, max_chars)
+    except BrokenProcessPool:
+        # A worker died mid-parse; the executor is unusable from here on, so replace it.
+        # Only unset the module pool if it is still this one — another failed parse may
+        # already have swapped in a fresh pool — and shut the broken one down so its
+        # management thread and process handles don't leak.
+        if _pool is pool:
+            _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+# Downstream only ever reads the lead of a document (keyword extraction sends the first
+# 6000 chars to the LLM, embeddings truncate at 8000), so stop parsing once this much
+# text is in hand — a 200-page PDF costs the same as a 5-page one.
+MAX_EXTRACT_CHARS = 10_000
+
+
 def _sanitize(text: str) -> str:
     """Strip NUL + other control bytes so extracted text is safe to store/embed."""
     if not text:
@@ -53,59 +107,79 @@ def detect_doc_kind(content: bytes, hint: str = "") -> str:
     return "unknown"
 
 
-async def extract_text_from_bytes(content: bytes, hint: str = "") -> str:
-    """Extract text from raw document bytes already in hand."""
+async def extract_text_from_bytes(
+    content: bytes, hint: str = "", max_chars: int = MAX_EXTRACT_CHARS,
+) -> str:
+    """Extract up to ~max_chars of text from raw document bytes already in hand."""
     if not content:
         return "[Empty document]"
     kind = detect_doc_kind(content, hint)
     if kind == "pdf":
-        return _sanitize(await extract_pdf_text(content))
+        return _sanitize(await extract_pdf_text(content, max_chars))
     if kind == "docx":
-        return _sanitize(await extract_docx_text(content))
+        return _sanitize(await extract_docx_text(content, max_chars))
     if kind == "txt":
-        return _sanitize(content.decode("utf-8", errors="replace"))
+        # ≤4 bytes per UTF-8 char — never decode more than the cap can use
+        return _sanitize(content[:max_chars * 4].decode("utf-8", errors="replace")[:max_chars])
     return "[Document content - unsupported format]"
 
 
-async def extract_document_text(url: str) -> str:
+async def extract_document_text(url: str, max_chars: int = MAX_EXTRACT_CHARS) -> str:
     """Download an external document URL and extract its text. Legacy webhook path."""
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(url, timeout=30.0)
             response.raise_for_status()
             content = response.content
-        return await extract_text_from_bytes(content, hint=url)
+        return await extract_text_from_bytes(content, hint=url, max_chars=max_chars)
     except Exception as e:
-        print(f"Error extracting document text: {e}")
+        logger.warning("Error extracting document text: {}", e)
         return "[Error extracting document content]"
 
 
-async def extract_pdf_text(content: bytes) -> str:
+def _join_capped(texts, max_chars: int) -> str:
+    """Join a lazy iterable of text blocks, pulling no more blocks once max_chars is reached."""
+    parts, total = [], 0
+    for t in texts:
+        if t:
+            parts.append(t)
+            total += len(t) + 1
+            if total >= max_chars:
+                break
+    return "\n".join(parts)[:max_chars].strip()
+
+
+def _pdf_text(content: bytes, max_chars: int) -> str:
+    try:
+        from pypdf import PdfReader          # modern package name
+    except ImportError:
+        from PyPDF2 import PdfReader          # fallback for older installs
+
+    reader = PdfReader(io.BytesIO(content))
+    # Pages are parsed on access — stopping early skips the rest of the document
+    return _join_capped((page.extract_text() for page in reader.pages), max_chars)
+
+
+def _docx_text(content: bytes, max_chars: int) -> str:
+    from docx import Document
+
+    doc = Document(io.BytesIO(content))
+    return _join_capped((paragraph.text for paragraph in doc.paragraphs), max_chars)
+
+
+async def extract_pdf_text(content: bytes, max_chars: int = MAX_EXTRACT_CHARS) -> str:
     """Extract text from PDF bytes."""
     try:
-        try:
-            from pypdf import PdfReader          # modern package name
-        except ImportError:
-            from PyPDF2 import PdfReader          # fallback for older installs
-
-        reader = PdfReader(io.BytesIO(content))
-        text = ""
-        for page in reader.pages:
-            text += (page.extract_text() or "") + "\n"
-        return text.strip()
+        return await _run_in_pool(_pdf_text, content, max_chars)
     except Exception as e:
-        print(f"Error extracting PDF: {e}")
+        logger.warning("Error extracting PDF: {}", e)
         return "[Error reading PDF]"
 
 
-async def extract_docx_text(content: bytes) -> str:
+async def extract_docx_text(content: bytes, max_chars: int = MAX_EXTRACT_CHARS) -> str:
     """Extract text from DOCX bytes."""
     try:
-        from docx import Document
-
-        doc = Document(io.BytesIO(content))
-        text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
-        return text.strip()
+        return await _run_in_pool(_docx_text, content, max_chars)
     except Exception as e:
-        print(f"Error extracting DOCX: {e}")
+        logger.warning("Error extracting DOCX: {}", e)
         return "[Error reading Word document]"
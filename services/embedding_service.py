@@ -21,33 +21,90 @@ IMPORTANT: After upgrading dimensions, you MUST re-create the pgvector column:
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import os
 import time
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 
 import httpx
+from loguru import logger
 
 GEMINI_EMBED_URL = (
     "https://generativelanguage.googleapis.com/v1beta/models"
     "/gemini-embedding-001:embedContent"
 )
+GEMINI_BATCH_EMBED_URL = (
+    "https://generativelanguage.googleapis.com/v1beta/models"
+    "/gemini-embedding-001:batchEmbedContents"
+)
+GEMINI_EMBED_MODEL = "models/gemini-embedding-001"
+
+# batchEmbedContents accepts at most 100 requests per call
+MAX_BATCH_SIZE = 100
 
 # Full 3072 dims for maximum semantic richness
 # Set to a smaller value (e.g. 768) if you hit pgvector index size limits
 DEFAULT_DIMS = 1536
 
 
-_shared_async_client = None
+# In-process LRU of recent embeddings. Gemini embeddings are deterministic per
+# (task_type, text), and short captures ("ok", "call mom") and repeated search
+# queries recur constantly. A 1536-dim vector is ~50 KB as a Python list, so keep
+# the cache small — 1024 entries ≈ 50 MB worst case.
+EMBED_CACHE_SIZE = 1024
+_embed_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+_cache_hits = _cache_misses = 0
+
+
+def _cache_key(text: str, task_type: str) -> bytes:
+    # Hash rather than keying on the raw text so long documents don't pin memory
+    return hashlib.blake2b(f"{task_type}\0{text}".encode(), digest_size=16).digest()
+
+
+def _normalize_query(text: str) -> str:
+    # Queries are matched case/whitespace-insensitively (cf. redis_cache.search_key), so
+    # "Pricing  plan" and "pricing plan" embed once and share one cache entry
+    return " ".join(text.lower().split())
+
+
+def _cache_get(key: bytes) -> Optional[List[float]]:
+    global _cache_hits, _cache_misses
+    vec = _embed_cache.get(key)
+    if vec is not None:
+        _embed_cache.move_to_end(key)
+        _cache_hits += 1
+    else:
+        _cache_misses += 1
+    return vec
+
+
+def _cache_put(key: bytes, vec: List[float]) -> None:
+    _embed_cache[key] = vec
+    _embed_cache.move_to_end(key)
+    if len(_embed_cache) > EMBED_CACHE_SIZE:
+        _embed_cache.popitem(last=False)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters for /health, in the shape of functools.lru_cache's cache_info()."""
+    total = _cache_hits + _cache_misses
+    return {
+        "hits":     _cache_hits,
+        "misses":   _cache_misses,
+        "hit_rate": round(_cache_hits / total, 3) if total else None,
+        "currsize": len(_embed_cache),
+        "maxsize":  EMBED_CACHE_SIZE,
+    }
+
 
 def _http_client() -> httpx.AsyncClient:
-    """Lazily-created shared AsyncClient — reused across calls so we don't pay a new
-    TLS handshake per embedding request. Per-request timeouts are passed at the call site."""
-    global _shared_async_client
-    if _shared_async_client is None or _shared_async_client.is_closed:
-        _shared_async_client = httpx.AsyncClient(
-            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
-        )
-    return _shared_async_client
+    """The app-wide HTTP/2 client from cerebras_client. Embeddings and the Gemini LLM
+    calls hit the same host (generativelanguage.googleapis.com), so sharing one pool
+    multiplexes both over the same warm connections instead of each keeping its own
+    TLS sessions. Per-request timeouts are passed at the call site."""
+    from cerebras_client import shared_http_client
+    return shared_http_client()
 
 
 class EmbeddingService:
@@ -79,19 +136,22 @@ class EmbeddingService:
 
     async def aembed_query(self, text: str) -> List[float]:
         """Async embed a search query (uses RETRIEVAL_QUERY task type for better retrieval)."""
-        return await self._async_embed_one(text, "RETRIEVAL_QUERY")
+        return await self._async_embed_one(_normalize_query(text), "RETRIEVAL_QUERY")
 
     async def aembed_batch(
         self, texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT"
     ) -> List[List[float]]:
-        """Async embed multiple strings concurrently (up to 5 at a time)."""
-        semaphore = asyncio.Semaphore(5)
-
-        async def _bounded(t: str) -> List[float]:
-            async with semaphore:
-                return await self._async_embed_one(t, task_type)
-
-        return await asyncio.gather(*[_bounded(t) for t in texts])
+        """Async batch embed — one batchEmbedContents request per 100 uncached texts."""
+        keys = [_cache_key(t[:8000], task_type) for t in texts]
+        out: List[Optional[List[float]]] = [_cache_get(k) for k in keys]
+        misses = [i for i, v in enumerate(out) if v is None]
+        for j in range(0, len(misses), MAX_BATCH_SIZE):
+            idxs = misses[j:j + MAX_BATCH_SIZE]
+            vecs = await self._async_embed_many([texts[i] for i in idxs], task_type)
+            for i, vec in zip(idxs, vecs):
+                out[i] = vec
+                _cache_put(keys[i], vec)
+        return out
 
     # ──────────────────────────────────────────────────────────────
     # Sync interface (kept for backward compatibility)
@@ -102,16 +162,33 @@ class EmbeddingService:
         return self._sync_embed_one(text, task_type)
 
     def embed_query(self, text: str) -> List[float]:
-        return self._sync_embed_one(text, "RETRIEVAL_QUERY")
+        return self._sync_embed_one(_normalize_query(text), "RETRIEVAL_QUERY")
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        return [self._sync_embed_one(t) for t in texts]
+    def embed_batch(
+        self, texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT"
+    ) -> List[List[float]]:
+        """Synchronous batch embed — one batchEmbedContents request per 100 uncached texts."""
+        keys = [_cache_key(t[:8000], task_type) for t in texts]
+        out: List[Optional[List[float]]] = [_cache_get(k) for k in keys]
+        misses = [i for i, v in enumerate(out) if v is None]
+        for j in range(0, len(misses), MAX_BATCH_SIZE):
+            idxs = misses[j:j + MAX_BATCH_SIZE]
+            vecs = self._sync_embed_many([texts[i] for i in idxs], task_type)
+            for i, vec in zip(idxs, vecs):
+                out[i] = vec
+                _cache_put(keys[i], vec)
+        return out
 
     # ──────────────────────────────────────────────────────────────
     # Core async request
     # ──────────────────────────────────────────────────────────────
 
     async def _async_embed_one(self, text: str, task_type: str) -> List[float]:
+        key = _cache_key(text[:8000], task_type)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
         payload = {
             "taskType": task_type,
             "content": {"parts": [{"text": text[:8000]}]},  # Gemini limit
@@ -128,27 +205,76 @@ class EmbeddingService:
             try:
                 resp = await _http_client().post(GEMINI_EMBED_URL, headers=headers, json=payload, timeout=20.0)
                 resp.raise_for_status()
-                return resp.json()["embedding"]["values"]
+                vec = resp.json()["embedding"]["values"]
+                _cache_put(key, vec)
+                return vec
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429 and attempt < 2:
                     await asyncio.sleep(2 ** attempt)
                     continue
-                print(f"[embedding] HTTP {e.response.status_code}: {e.response.text[:200]}")
+                logger.warning("[embedding] HTTP {}: {}", e.response.status_code, e.response.text[:200])
                 raise
             except Exception as e:
                 if attempt < 2:
                     await asyncio.sleep(1)
                     continue
-                print(f"[embedding] Error: {e}")
+                logger.warning("[embedding] Error: {}", e)
                 raise
 
         return [0.0] * self._dims
 
+    def _batch_payload(self, texts: List[str], task_type: str) -> Dict[str, Any]:
+        requests = []
+        for text in texts:
+            req = {
+                "model": GEMINI_EMBED_MODEL,
+                "taskType": task_type,
+                "content": {"parts": [{"text": text[:8000]}]},
+            }
+            if self._dims != 3072:
+                req["outputDimensionality"] = self._dims
+            requests.append(req)
+        return {"requests": requests}
+
+    async def _async_embed_many(self, texts: List[str], task_type: str) -> List[List[float]]:
+        payload = self._batch_payload(texts, task_type)
+        headers = {
+            "Content-Type": "application/json",
+            "X-goog-api-key": self._api_key,
+        }
+
+        for attempt in range(3):
+            try:
+                resp = await _http_client().post(
+                    GEMINI_BATCH_EMBED_URL, headers=headers, json=payload, timeout=60.0,
+                )
+                resp.raise_for_status()
+                return [e["values"] for e in resp.json()["embeddings"]]
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 429 and attempt < 2:
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                logger.warning("[embedding] batch HTTP {}: {}", e.response.status_code, e.response.text[:200])
+                raise
+            except Exception as e:
+                if attempt < 2:
+                    await asyncio.sleep(1)
+                    continue
+                logger.warning("[embedding] batch error: {}", e)
+                raise
+
+        return [[0.0] * self._dims for _ in texts]
+
     # ──────────────────────────────────────────────────────────────
     # Core sync request
     # ──────────────────────────────────────────────────────────────
 
     def _sync_embed_one(self, text: str, task_type: str = "RETRIEVAL_DOCUMENT") -> List[float]:
+        key = _cache_key(text[:8000], task_type)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
         payload = {
             "taskType": task_type,
             "content": {"parts": [{"text": text[:8000]}]},
@@ -165,7 +291,9 @@ class EmbeddingService:
             try:
                 resp = httpx.post(GEMINI_EMBED_URL, headers=headers, json=payload, timeout=20.0)
                 resp.raise_for_status()
-                return resp.json()["embedding"]["values"]
+                vec = resp.json()["embedding"]["values"]
+                _cache_put(key, vec)
+                return vec
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429 and attempt < 2:
                     time.sleep(2 ** attempt)
@@ -179,6 +307,33 @@ class EmbeddingService:
 
         return [0.0] * self._dims
 
+    def _sync_embed_many(self, texts: List[str], task_type: str) -> List[List[float]]:
+        payload = self._batch_payload(texts, task_type)
+        headers = {
+            "Content-Type": "application/json",
+            "X-goog-api-key": self._api_key,
+        }
+
+        for attempt in range(3):
+            try:
+                resp = httpx.post(
+                    GEMINI_BATCH_EMBED_URL, headers=headers, json=payload, timeout=60.0,
+                )
+                resp.raise_for_status()
+                return [e["values"] for e in resp.json()["embeddings"]]
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 429 and attempt < 2:
+                    time.sleep(2 ** attempt)
+                    continue
+                raise
+            except Exception as e:
+                if attempt < 2:
+                    time.sleep(1)
+                    continue
+                raise
+
+        return [[0.0] * self._dims for _ in texts]
+
 
 # Singleton — drop-in replacement
 embedding_service = EmbeddingService(output_dimensionality=DEFAULT_DIMS)
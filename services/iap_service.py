@@ -32,6 +32,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import Config
 from database import IAPTransaction, ProAccount, User
+from services import redis_cache
 
 logger = logging.getLogger(__name__)
 
@@ -313,6 +314,23 @@ class IAPService:
             logger.error("[IAP] Webhook outer JWS verification failed: %s", e)
             return False  # Return non-200 so Apple retries with a valid payload
 
+        # Apple redelivers a notification (same notificationUUID) until it sees a 200 —
+        # including when our 200 was merely slow. Claim the UUID so a redelivery skips the
+        # inner JWS verify + DB work. Claimed only after the outer signature checks out,
+        # so a forged payload can't burn a real UUID; released again if processing fails.
+        notification_uuid = outer.get("notificationUUID")
+        claim_key = redis_cache.apple_notification_key(notification_uuid) if notification_uuid else None
+        if claim_key and not await redis_cache.cache_claim(claim_key):
+            logger.info("[IAP] Webhook duplicate notificationUUID=%s — skipped", notification_uuid)
+            return True
+        try:
+            return await self._apply_notification(outer, db)
+        except Exception:
+            if claim_key:
+                await redis_cache.cache_del(claim_key)
+            raise
+
+    async def _apply_notification(self, outer: dict, db: AsyncSession) -> bool:
         notification_type = outer.get("notificationType", "")
         subtype           = outer.get("subtype", "")
         data              = outer.get("data", {})
@@ -85,12 +85,15 @@ Output schema — always returns all action flags:
 from __future__ import annotations
 
 import os
+import re
 import asyncio
 from datetime import datetime, timedelta
+from string import Template
 from typing import Dict, List, Optional
 from zoneinfo import ZoneInfo
 
 from cerebras_client import CerebrasClient
+from loguru import logger
 
 IST = ZoneInfo("Asia/Kolkata")
 
@@ -99,14 +102,23 @@ COMMAND_PREFIXES = {
     "subtask:", "search:", "find:", "get:",
 }
 
+# One anchored match instead of lowercasing the whole message and scanning every prefix
+_COMMAND_RE = re.compile(
+    r"\s*(?:" + "|".join(map(re.escape, sorted(COMMAND_PREFIXES))) + ")",
+    re.IGNORECASE,
+)
+_TRIVIALS = frozenset({"hi", "hey", "heyy", "hello", "ok", "okay", "lol", "test", "hmm", "hm"})
+
 def _is_command(content: str) -> bool:
-    lc = content.lower().strip()
-    return any(lc.startswith(p) for p in COMMAND_PREFIXES)
+    return _COMMAND_RE.match(content) is not None
 
 def _is_trivial(content: str) -> bool:
-    lc = content.lower().strip()
-    trivials = {"hi", "hey", "heyy", "hello", "ok", "okay", "lol", "test", "hmm", "hm"}
-    return len(lc) < 4 or lc in trivials
+    stripped = content.strip()
+    # Longest trivial is 5 chars — skip lower() for anything longer
+    if len(stripped) > 5:
+        return False
+    lc = stripped.lower()
+    return len(lc) < 4 or lc in _TRIVIALS
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -142,6 +154,149 @@ def _default_result() -> Dict:
     }
 
 
+# ─────────────────────────────────────────────────────────────
+# Static sections of the slow-path (_llm_parse) prompt.
+# Built once at import; only the header and the dated examples
+# vary per call.
+# ─────────────────────────────────────────────────────────────
+
+_ACTION_FLAGS_WITH_QUERY = (
+    "ACTION FLAGS:\n"
+    "  save_as_todo  — message contains one or more tasks/things to do\n"
+    "  save_as_event — message is a scheduled appointment/meeting with a specific time\n"
+    "  save_as_note  — message is a fact/info to remember (credential, location, info)\n"
+    "  save_as_idea  — message is a creative thought/insight/concept\n"
+    "  save_as_track — message logs health/habit data (weight, steps, mood, sleep)\n"
+    "  save_as_list  — message is a named list (shopping, bag, packing) with items\n"
+    "  set_reminder  — message has a specific time → should create a reminder\n"
+    "  is_query      — user wants to retrieve/search something they saved before\n\n"
+    "is_query=true ONLY for: questions ending with '?', or explicit search phrases\n"
+    "  ('show me', 'find', 'search', 'what did I save', 'recall', 'where is', 'do I have').\n"
+    "  Imperative statements are NEVER is_query — they are save_as_todo.\n\n"
+)
+_JSON_SCHEMA_WITH_QUERY = (
+    "Return ONLY this JSON (no markdown):\n"
+    "{\n"
+    '  "actions": {"save_as_todo":bool,"save_as_event":bool,"save_as_note":bool,'
+    '"save_as_idea":bool,"save_as_track":bool,"save_as_list":bool,"set_reminder":bool,"is_query":bool},\n'
+    '  "tasks": [{"task":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","priority":"normal|high|urgent"}],\n'
+    '  "reminder": {"due_date":"YYYY-MM-DD","time":"HH:MM","priority":"normal"} | null,\n'
+    '  "event": {"title":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","people":[]} | null,\n'
+    '  "list": {"list_name":"...","list_type":"shopping|bag|packing|reading|watching|custom","items":[],"due_date":"YYYY-MM-DD|null"} | null,\n'
+    '  "track": {"logs":[{"metric":"...","value":"...","unit":"..."}]} | null,\n'
+    '  "note": {"content":"...","keywords":[]} | null,\n'
+    '  "idea": {"content":"...","keywords":[]} | null,\n'
+    '  "query": {"query_text":"...","date_hint":"today|tomorrow|this_week|null","list_name":"...|null"} | null,\n'
+    '  "people":[],"priority":"normal|high|urgent","essence":"one sentence summary"\n'
+    "}\n\n"
+)
+
+# Save-only mode: no is_query, shorter prompt, faster
+_ACTION_FLAGS_SAVE_ONLY = (
+    "ACTION FLAGS (classify by what the user intends to do with this later):\n"
+    "  save_as_todo  — user intends to PERFORM an action (something to check off)\n"
+    "  save_as_event — scheduled appointment/meeting with a specific time\n"
+    "  save_as_note  — user intends to RECALL information (something to look up)\n"
+    "  save_as_idea  — creative thought/insight/concept\n"
+    "  save_as_track — logs health/habit data (weight, steps, mood, sleep)\n"
+    "  save_as_list  — named list (shopping, bag, packing) with items\n"
+    "  set_reminder  — has a specific time → create a reminder\n"
+    "Bare nouns, document names, and facts with no action signal → save_as_note.\n\n"
+)
+_JSON_SCHEMA_SAVE_ONLY = (
+    "Return ONLY this JSON (no markdown):\n"
+    "{\n"
+    '  "actions": {"save_as_todo":bool,"save_as_event":bool,"save_as_note":bool,'
+    '"save_as_idea":bool,"save_as_track":bool,"save_as_list":bool,"set_reminder":bool,"is_query":false},\n'
+    '  "tasks": [{"task":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","priority":"normal|high|urgent"}],\n'
+    '  "reminder": {"due_date":"YYYY-MM-DD","time":"HH:MM","priority":"normal"} | null,\n'
+    '  "event": {"title":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","people":[]} | null,\n'
+    '  "list": {"list_name":"...","list_type":"shopping|bag|packing|reading|watching|custom","items":[],"due_date":"YYYY-MM-DD|null"} | null,\n'
+    '  "track": {"logs":[{"metric":"...","value":"...","unit":"..."}]} | null,\n'
+    '  "note": {"content":"...","keywords":[]} | null,\n'
+    '  "idea": {"content":"...","keywords":[]} | null,\n'
+    '  "people":[],"priority":"normal|high|urgent","essence":"one sentence summary"\n'
+    "}\n\n"
+)
+
+_RULES = (
+    "KEY RULES:\n"
+    "  TODO vs NOTE — the only question that matters is intent:\n"
+    "    save_as_todo  = user intends to PERFORM an action (there is something to check off)\n"
+    "    save_as_note  = user intends to RECALL information (there is something to look up)\n"
+    "  A bare noun, document name, place, person detail, or fact → save_as_note.\n"
+    "  Require a genuine action signal for save_as_todo: an explicit or strongly implied verb\n"
+    "  ('call', 'buy', 'submit', 'book', 'pay', 'fix', 'check', 'need to', 'have to') OR\n"
+    "  time pressure ('by Friday', 'urgent', 'before 5pm'). Without one → save_as_note.\n\n"
+    "  - A reminder IS ALWAYS also a todo → save_as_todo AND set_reminder = true\n"
+    "  - save_as_event = true for scheduled appointments/meetings; save_as_todo = false for pure events\n"
+    "  - set_reminder = true ONLY when a specific time is mentioned\n"
+    "  - Time without explicit date → assume TODAY\n"
+    "  - Any task/actionable without a date → due_date = TODAY\n"
+    "  - Extract ALL tasks even from unstructured prose\n"
+    "  - Priority: urgent/asap/critical/important → high, else normal\n\n"
+    "  NAMED HEADER RULE:\n"
+    "  Named header (project/brand/place/person) + bullet items → save_as_list=true\n"
+    "  Named qualifier + 'tasks/todos' + items → save_as_list=true (the qualifier makes it named)\n"
+    "  Neutral header (ONLY generic words: Todo, Tasks, Today, Tomorrow, This week) + bullet items → save_as_todo=true (NOT list)\n"
+    "  When a list has a date (e.g. 'for tomorrow', 'by Friday'), extract it as due_date on the list object.\n\n"
+    "  NAMED: 'Extended minds changes', 'Japan trip', 'Grocery', 'Dmart', 'Client ABC', 'Office tasks', 'Office tasks for tomorrow'\n"
+    "  NEUTRAL: 'Todo', 'Tasks', 'Today', 'Todo for today', 'Tomorrow', 'This week'\n\n"
+)
+
+# string.Template is parsed once here and substituted with today/tomorrow/friday per call
+_EXAMPLES_TMPL = Template(
+    "EXAMPLES:\n\n"
+    'M: "remind me to call mom at 10pm" → save_as_todo=true, set_reminder=true\n'
+    '  tasks:[{"task":"call mom","due_date":"$today","time":"22:00","priority":"normal"}]\n\n'
+
+    'M: "dentist appointment Friday 3pm" → save_as_todo=true, save_as_event=true, set_reminder=true\n'
+    '  tasks:[{"task":"dentist","due_date":"$friday","time":"15:00","priority":"normal"}]\n\n'
+
+    'M: "marriage certificate" → save_as_note=true (user is filing a reference, not creating a task)\n'
+    '  note:{"content":"marriage certificate","keywords":["marriage","certificate","document"]}\n\n'
+
+    'M: "passport" → save_as_note=true\n'
+    '  note:{"content":"passport","keywords":["passport","document"]}\n\n'
+
+    'M: "submit passport application" → save_as_todo=true (explicit action verb)\n'
+    '  tasks:[{"task":"submit passport application","due_date":"$today","time":null,"priority":"normal"}]\n\n'
+
+    'M: "Todo for today:\\n- Check apple dev\\n- Pack for trip" → save_as_todo=true (NOT save_as_list, purely generic header)\n'
+    '  tasks:[{"task":"Check apple dev","due_date":"$today","time":null,"priority":"normal"},{"task":"Pack for trip","due_date":"$today","time":null,"priority":"normal"}]\n\n'
+
+    'M: "New todo list for tomorrow:\\n- Work on meraki\\n- Follow up with Aditi" → save_as_todo=true (NOT save_as_list, purely generic header)\n'
+    '  tasks:[{"task":"Work on meraki","due_date":"$tomorrow","time":null,"priority":"normal"},{"task":"Follow up with Aditi","due_date":"$tomorrow","time":null,"priority":"normal"}]\n\n'
+
+    'M: "Office tasks for tomorrow:\\n- Check apple dev\\n- Email Aditi" → save_as_list=true (\'Office\' is a named qualifier)\n'
+    '  list:{"list_name":"Office Tasks","list_type":"custom","items":["Check apple dev","Email Aditi"],"due_date":"$tomorrow"}\n\n'
+
+    'M: "Client XYZ todos:\\n- Send proposal\\n- Follow up on call" → save_as_list=true (\'Client XYZ\' is a named qualifier)\n'
+    '  list:{"list_name":"Client XYZ Tasks","list_type":"custom","items":["Send proposal","Follow up on call"],"due_date":null}\n\n'
+
+    'M: "dmart shopping:\\n- milk\\n- eggs" → save_as_list=true\n'
+    '  list:{"list_name":"Dmart Shopping List","list_type":"shopping","items":["milk","eggs"]}\n\n'
+
+    'M: "Japan trip:\\n- book flights\\n- get visa" → save_as_list=true, save_as_todo=true\n'
+    '  list:{"list_name":"Japan Trip List","list_type":"packing","items":["book flights","get visa"]}\n'
+    '  tasks:[{"task":"book flights","due_date":null,"time":null,"priority":"normal"},{"task":"get visa","due_date":null,"time":null,"priority":"normal"}]\n\n'
+
+    'M: "weight 74kg, slept 7h" → save_as_track=true\n'
+    '  track:{"logs":[{"metric":"weight","value":"74","unit":"kg"},{"metric":"sleep","value":"7","unit":"hours"}]}\n\n'
+
+    'M: "wifi password is airtel123" → save_as_note=true\n'
+    '  note:{"content":"wifi password is airtel123","keywords":["wifi","password"]}\n\n'
+)
+_QUERY_EXAMPLES = (
+    'M: "what did I save about Japan" → is_query=true\n'
+    '  query:{"query_text":"Japan","date_hint":null,"list_name":null}\n\n'
+    'M: "show me my grocery list" → is_query=true\n'
+    '  query:{"query_text":"grocery list","date_hint":null,"list_name":"Grocery List"}\n\n'
+    'M: "find my wifi password" → is_query=true\n'
+    '  query:{"query_text":"wifi password","date_hint":null,"list_name":null}\n\n'
+)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Intent Service
 # ─────────────────────────────────────────────────────────────────────────────
@@ -195,7 +350,7 @@ class IntentService:
 
         # ── Forced bucket: bypass classifier and LLM entirely ────
         if force_bucket:
-            print(f"[intent] forced bucket → {force_bucket} for: {content[:60]}")
+            logger.info("[intent] forced bucket → {} for: {}", force_bucket, content[:60])
             result = self._build_from_bucket(
                 content, force_bucket, today, tomorrow, day_map, check_query=False,
             )
@@ -220,7 +375,7 @@ class IntentService:
         list_result = _ls_tmp._regex_detect(content)
         if list_result and list_result.get("intent") == "create_or_add" and list_result.get("items"):
             if confidence >= CONF_THRESHOLD and bucket:
-                print(f"[intent] list+classifier → {bucket} ({confidence:.2f}) for: {content[:60]}")
+                logger.info("[intent] list+classifier → {} ({:.2f}) for: {}", bucket, confidence, content[:60])
                 result = self._build_list_result(
                     content, list_result, bucket, today, tomorrow, day_map, check_query,
                 )
@@ -230,7 +385,7 @@ class IntentService:
             # Unless no_llm_fallback — then use rule-based bucket for the list
             if no_llm_fallback:
                 fallback_bucket = _infer_bucket_from_rules(content)
-                print(f"[intent] list+no_llm → {fallback_bucket} (rules) for: {content[:60]}")
+                logger.info("[intent] list+no_llm → {} (rules) for: {}", fallback_bucket, content[:60])
                 result = self._build_list_result(
                     content, list_result, fallback_bucket, today, tomorrow, day_map, check_query=False,
                 )
@@ -241,18 +396,18 @@ class IntentService:
             # date expressions ("two weeks from now", "end of next month", etc.) can't be
             # reliably covered by regex. Latency tradeoff is acceptable for low-volume Events.
             if bucket != "Events":
-                print(f"[intent] classifier → {bucket} ({confidence:.2f}) for: {content[:60]}")
+                logger.info("[intent] classifier → {} ({:.2f}) for: {}", bucket, confidence, content[:60])
                 result = self._build_from_bucket(
                     content, bucket, today, tomorrow, day_map, check_query,
                 )
                 result["_classifier_confidence"] = confidence
                 return result
-            print(f"[intent] classifier→Events ({confidence:.2f}), deferring to LLM for date accuracy: {content[:60]}")
+            logger.info("[intent] classifier→Events ({:.2f}), deferring to LLM for date accuracy: {}", confidence, content[:60])
 
         # ── Slow path: Gemini full parse (or rule-based if no_llm_fallback) ─
         if no_llm_fallback:
             fallback_bucket = _infer_bucket_from_rules(content)
-            print(f"[intent] no_llm_fallback → {fallback_bucket} (rules) for: {content[:60]}")
+            logger.info("[intent] no_llm_fallback → {} (rules) for: {}", fallback_bucket, content[:60])
             return self._build_from_bucket(
                 content, fallback_bucket, today, tomorrow, day_map, check_query=False,
             )
@@ -264,11 +419,11 @@ class IntentService:
                 classifier_bucket="Events" if bucket == "Events" else None,
             )
         except Exception as e:
-            print(f"[intent] LLM parse failed: {e}")
+            logger.warning("[intent] LLM parse failed: {}", e)
             # Events: classifier was confident about the bucket — use regex date extraction
             # as fallback rather than dropping the capture entirely.
             if bucket == "Events" and confidence >= CONF_THRESHOLD:
-                print(f"[intent] Events LLM fallback → regex for: {content[:60]}")
+                logger.info("[intent] Events LLM fallback → regex for: {}", content[:60])
                 result = self._build_from_bucket(
                     content, "Events", today, tomorrow, day_map, check_query=False,
                 )
@@ -720,144 +875,18 @@ class IntentService:
             )
 
         if check_query:
-            action_flags = (
-                "ACTION FLAGS:\n"
-                "  save_as_todo  — message contains one or more tasks/things to do\n"
-                "  save_as_event — message is a scheduled appointment/meeting with a specific time\n"
-                "  save_as_note  — message is a fact/info to remember (credential, location, info)\n"
-                "  save_as_idea  — message is a creative thought/insight/concept\n"
-                "  save_as_track — message logs health/habit data (weight, steps, mood, sleep)\n"
-                "  save_as_list  — message is a named list (shopping, bag, packing) with items\n"
-                "  set_reminder  — message has a specific time → should create a reminder\n"
-                "  is_query      — user wants to retrieve/search something they saved before\n\n"
-                "is_query=true ONLY for: questions ending with '?', or explicit search phrases\n"
-                "  ('show me', 'find', 'search', 'what did I save', 'recall', 'where is', 'do I have').\n"
-                "  Imperative statements are NEVER is_query — they are save_as_todo.\n\n"
-            )
-            json_schema = (
-                "Return ONLY this JSON (no markdown):\n"
-                "{\n"
-                '  "actions": {"save_as_todo":bool,"save_as_event":bool,"save_as_note":bool,'
-                '"save_as_idea":bool,"save_as_track":bool,"save_as_list":bool,"set_reminder":bool,"is_query":bool},\n'
-                '  "tasks": [{"task":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","priority":"normal|high|urgent"}],\n'
-                '  "reminder": {"due_date":"YYYY-MM-DD","time":"HH:MM","priority":"normal"} | null,\n'
-                '  "event": {"title":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","people":[]} | null,\n'
-                '  "list": {"list_name":"...","list_type":"shopping|bag|packing|reading|watching|custom","items":[],"due_date":"YYYY-MM-DD|null"} | null,\n'
-                '  "track": {"logs":[{"metric":"...","value":"...","unit":"..."}]} | null,\n'
-                '  "note": {"content":"...","keywords":[]} | null,\n'
-                '  "idea": {"content":"...","keywords":[]} | null,\n'
-                '  "query": {"query_text":"...","date_hint":"today|tomorrow|this_week|null","list_name":"...|null"} | null,\n'
-                '  "people":[],"priority":"normal|high|urgent","essence":"one sentence summary"\n'
-                "}\n\n"
-            )
+            action_flags, json_schema = _ACTION_FLAGS_WITH_QUERY, _JSON_SCHEMA_WITH_QUERY
         else:
-            # Save-only mode: no is_query, shorter prompt, faster
-            action_flags = (
-                "ACTION FLAGS (classify by what the user intends to do with this later):\n"
-                "  save_as_todo  — user intends to PERFORM an action (something to check off)\n"
-                "  save_as_event — scheduled appointment/meeting with a specific time\n"
-                "  save_as_note  — user intends to RECALL information (something to look up)\n"
-                "  save_as_idea  — creative thought/insight/concept\n"
-                "  save_as_track — logs health/habit data (weight, steps, mood, sleep)\n"
-                "  save_as_list  — named list (shopping, bag, packing) with items\n"
-                "  set_reminder  — has a specific time → create a reminder\n"
-                "Bare nouns, document names, and facts with no action signal → save_as_note.\n\n"
-            )
-            json_schema = (
-                "Return ONLY this JSON (no markdown):\n"
-                "{\n"
-                '  "actions": {"save_as_todo":bool,"save_as_event":bool,"save_as_note":bool,'
-                '"save_as_idea":bool,"save_as_track":bool,"save_as_list":bool,"set_reminder":bool,"is_query":false},\n'
-                '  "tasks": [{"task":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","priority":"normal|high|urgent"}],\n'
-                '  "reminder": {"due_date":"YYYY-MM-DD","time":"HH:MM","priority":"normal"} | null,\n'
-                '  "event": {"title":"...","due_date":"YYYY-MM-DD","time":"HH:MM|null","people":[]} | null,\n'
-                '  "list": {"list_name":"...","list_type":"shopping|bag|packing|reading|watching|custom","items":[],"due_date":"YYYY-MM-DD|null"} | null,\n'
-                '  "track": {"logs":[{"metric":"...","value":"...","unit":"..."}]} | null,\n'
-                '  "note": {"content":"...","keywords":[]} | null,\n'
-                '  "idea": {"content":"...","keywords":[]} | null,\n'
-                '  "people":[],"priority":"normal|high|urgent","essence":"one sentence summary"\n'
-                "}\n\n"
-            )
-
-        rules = (
-            "KEY RULES:\n"
-            "  TODO vs NOTE — the only question that matters is intent:\n"
-            "    save_as_todo  = user intends to PERFORM an action (there is something to check off)\n"
-            "    save_as_note  = user intends to RECALL information (there is something to look up)\n"
-            "  A bare noun, document name, place, person detail, or fact → save_as_note.\n"
-            "  Require a genuine action signal for save_as_todo: an explicit or strongly implied verb\n"
-            "  ('call', 'buy', 'submit', 'book', 'pay', 'fix', 'check', 'need to', 'have to') OR\n"
-            "  time pressure ('by Friday', 'urgent', 'before 5pm'). Without one → save_as_note.\n\n"
-            "  - A reminder IS ALWAYS also a todo → save_as_todo AND set_reminder = true\n"
-            "  - save_as_event = true for scheduled appointments/meetings; save_as_todo = false for pure events\n"
-            "  - set_reminder = true ONLY when a specific time is mentioned\n"
-            "  - Time without explicit date → assume TODAY\n"
-            "  - Any task/actionable without a date → due_date = TODAY\n"
-            "  - Extract ALL tasks even from unstructured prose\n"
-            "  - Priority: urgent/asap/critical/important → high, else normal\n\n"
-            "  NAMED HEADER RULE:\n"
-            "  Named header (project/brand/place/person) + bullet items → save_as_list=true\n"
-            "  Named qualifier + 'tasks/todos' + items → save_as_list=true (the qualifier makes it named)\n"
-            "  Neutral header (ONLY generic words: Todo, Tasks, Today, Tomorrow, This week) + bullet items → save_as_todo=true (NOT list)\n"
-            "  When a list has a date (e.g. 'for tomorrow', 'by Friday'), extract it as due_date on the list object.\n\n"
-            "  NAMED: 'Extended minds changes', 'Japan trip', 'Grocery', 'Dmart', 'Client ABC', 'Office tasks', 'Office tasks for tomorrow'\n"
-            "  NEUTRAL: 'Todo', 'Tasks', 'Today', 'Todo for today', 'Tomorrow', 'This week'\n\n"
-        )
-
-        examples = (
-            "EXAMPLES:\n\n"
-            f'M: "remind me to call mom at 10pm" → save_as_todo=true, set_reminder=true\n'
-            f'  tasks:[{{"task":"call mom","due_date":"{today}","time":"22:00","priority":"normal"}}]\n\n'
-
-            f'M: "dentist appointment Friday 3pm" → save_as_todo=true, save_as_event=true, set_reminder=true\n'
-            f'  tasks:[{{"task":"dentist","due_date":"{day_map.get("friday", tomorrow)}","time":"15:00","priority":"normal"}}]\n\n'
-
-            f'M: "marriage certificate" → save_as_note=true (user is filing a reference, not creating a task)\n'
-            f'  note:{{"content":"marriage certificate","keywords":["marriage","certificate","document"]}}\n\n'
+            action_flags, json_schema = _ACTION_FLAGS_SAVE_ONLY, _JSON_SCHEMA_SAVE_ONLY
 
-            f'M: "passport" → save_as_note=true\n'
-            f'  note:{{"content":"passport","keywords":["passport","document"]}}\n\n'
-
-            f'M: "submit passport application" → save_as_todo=true (explicit action verb)\n'
-            f'  tasks:[{{"task":"submit passport application","due_date":"{today}","time":null,"priority":"normal"}}]\n\n'
-
-            f'M: "Todo for today:\\n- Check apple dev\\n- Pack for trip" → save_as_todo=true (NOT save_as_list, purely generic header)\n'
-            f'  tasks:[{{"task":"Check apple dev","due_date":"{today}","time":null,"priority":"normal"}},{{"task":"Pack for trip","due_date":"{today}","time":null,"priority":"normal"}}]\n\n'
-
-            f'M: "New todo list for tomorrow:\\n- Work on meraki\\n- Follow up with Aditi" → save_as_todo=true (NOT save_as_list, purely generic header)\n'
-            f'  tasks:[{{"task":"Work on meraki","due_date":"{tomorrow}","time":null,"priority":"normal"}},{{"task":"Follow up with Aditi","due_date":"{tomorrow}","time":null,"priority":"normal"}}]\n\n'
-
-            f'M: "Office tasks for tomorrow:\\n- Check apple dev\\n- Email Aditi" → save_as_list=true (\'Office\' is a named qualifier)\n'
-            f'  list:{{"list_name":"Office Tasks","list_type":"custom","items":["Check apple dev","Email Aditi"],"due_date":"{tomorrow}"}}\n\n'
-
-            f'M: "Client XYZ todos:\\n- Send proposal\\n- Follow up on call" → save_as_list=true (\'Client XYZ\' is a named qualifier)\n'
-            f'  list:{{"list_name":"Client XYZ Tasks","list_type":"custom","items":["Send proposal","Follow up on call"],"due_date":null}}\n\n'
-
-            f'M: "dmart shopping:\\n- milk\\n- eggs" → save_as_list=true\n'
-            f'  list:{{"list_name":"Dmart Shopping List","list_type":"shopping","items":["milk","eggs"]}}\n\n'
-
-            f'M: "Japan trip:\\n- book flights\\n- get visa" → save_as_list=true, save_as_todo=true\n'
-            f'  list:{{"list_name":"Japan Trip List","list_type":"packing","items":["book flights","get visa"]}}\n'
-            f'  tasks:[{{"task":"book flights","due_date":null,"time":null,"priority":"normal"}},{{"task":"get visa","due_date":null,"time":null,"priority":"normal"}}]\n\n'
-
-            f'M: "weight 74kg, slept 7h" → save_as_track=true\n'
-            f'  track:{{"logs":[{{"metric":"weight","value":"74","unit":"kg"}},{{"metric":"sleep","value":"7","unit":"hours"}}]}}\n\n'
-
-            f'M: "wifi password is airtel123" → save_as_note=true\n'
-            f'  note:{{"content":"wifi password is airtel123","keywords":["wifi","password"]}}\n\n'
+        examples = _EXAMPLES_TMPL.substitute(
+            today=today, tomorrow=tomorrow, friday=day_map.get("friday", tomorrow),
         )
 
-        if check_query:
-            examples += (
-                f'M: "what did I save about Japan" → is_query=true\n'
-                f'  query:{{"query_text":"Japan","date_hint":null,"list_name":null}}\n\n'
-                f'M: "show me my grocery list" → is_query=true\n'
-                f'  query:{{"query_text":"grocery list","date_hint":null,"list_name":"Grocery List"}}\n\n'
-                f'M: "find my wifi password" → is_query=true\n'
-                f'  query:{{"query_text":"wifi password","date_hint":null,"list_name":null}}\n\n'
-            )
-
-        prompt = header + action_flags + json_schema + rules + examples
+        prompt = "".join((
+            header, action_flags, json_schema, _RULES, examples,
+            _QUERY_EXAMPLES if check_query else "",
+        ))
         response = await self.fast.chat(prompt, max_tokens=600)
         return self._validate(response)
 
@@ -985,7 +1014,6 @@ class IntentService:
 # Helpers (used in validation and rule-based fallback)
 # ─────────────────────────────────────────────────────────────────────────────
 
-import re
 _DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 _TRACK_SIGNALS = {"kg", "km", "mile", "steps", "calories", "kcal", "mood", "slept", "weight", "bp", "sugar", "water"}
@@ -22,6 +22,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import async_session_maker, Message, User, Category
 from cerebras_client import CerebrasClient
 from models import MessageType as MT
+from loguru import logger
 
 
 async def _save_list_embedding(message_id: int, list_name: str, items: List[str], db: AsyncSession):
@@ -33,7 +34,7 @@ async def _save_list_embedding(message_id: int, list_name: str, items: List[str]
         await db.execute(update(Message).where(Message.id == message_id).values(embedding=embedding))
         await db.commit()
     except Exception as e:
-        print(f"⚠ List embedding failed (non-critical): {e}")
+        logger.warning("⚠ List embedding failed (non-critical): {}", e)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -239,7 +240,7 @@ class ListService:
             if result is not None:
                 return result
         except Exception as e:
-            print(f"[list] LLM detection failed, falling back to regex: {e}")
+            logger.warning("[list] LLM detection failed, falling back to regex: {}", e)
 
         # ── Fallback: regex ────────────────────────────────────────
         return self._regex_detect(content)
@@ -30,6 +30,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import Category, Message, User
 from cerebras_client import CerebrasClient
 from models import MessageType
+from loguru import logger
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -366,8 +367,11 @@ class MessageProcessor:
         force_bucket: Optional[str] = None,
         no_llm_fallback: bool = False,
         skip_reminder: bool = False,
+        user: Optional[User] = None,
     ) -> Dict:
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             raise ValueError("User not registered")
 
@@ -405,7 +409,7 @@ class MessageProcessor:
             or (message_type == "text" and media_url)
         ):
             force_bucket = "Remember"
-            print(f"[processor] media override → Remember (type={message_type}, has_url={bool(media_url)})")
+            logger.info("[processor] media override → Remember (type={}, has_url={})", message_type, bool(media_url))
 
         # ── FAST PATH: Regex list detection — skip when force_bucket is set ──
         # When force_bucket is set (e.g. group @mention → always To-Do) we skip
@@ -420,7 +424,7 @@ class MessageProcessor:
                         _b, _conf = classifier_service.classify(content)
                         if _conf >= CONF_THRESHOLD and _b in ("To-Do", "Remember", "Track"):
                             list_bucket = _b
-                    print(f"[processor] regex_list hit: {regex_list['list_name']!r} ({len(regex_list['items'])} items), bucket={list_bucket}")
+                    logger.info("[processor] regex_list hit: {!r} ({} items), bucket={}", regex_list['list_name'], len(regex_list['items']), list_bucket)
                     return await self._handle_list_save_direct(
                         user, regex_list["list_name"], regex_list["list_type"], regex_list["items"], db,
                         group_id=group_id, bucket=list_bucket,
@@ -437,7 +441,7 @@ class MessageProcessor:
         )
 
         actions = parsed.get("actions", {})
-        print(f"[processor] actions={[k for k,v in actions.items() if v]} for: {content[:60]}")
+        logger.info("[processor] actions={} for: {}", [k for k,v in actions.items() if v], content[:60])
 
         # ── Named list — highest priority, self-contained ─────────
         if actions.get("save_as_list") and parsed.get("list"):
@@ -705,7 +709,7 @@ class MessageProcessor:
                     else:
                         reminder_count += 1
                 except Exception as e:
-                    print(f"⚠ Reminder failed for '{saved['task']}': {e}")
+                    logger.warning("⚠ Reminder failed for '{}': {}", saved['task'], e)
 
         reminder_note = f" · {reminder_count} reminder(s) set" if reminder_count else ""
 
@@ -789,8 +793,7 @@ class MessageProcessor:
 
         # Debug: confirm what was stored in DB tags
         stored_tags = msg.tags if isinstance(msg.tags, dict) else {}
-        print(f"[task_save] id={msg.id} primary={primary_bucket} due={stored_tags.get('due_date')!r} "
-              f"event_time={stored_tags.get('event_time')!r} task='{content[:50]}'")
+        logger.info("[task_save] id={} primary={} due={!r} event_time={!r} task='{}'", msg.id, primary_bucket, stored_tags.get('due_date'), stored_tags.get('event_time'), content[:50])
 
         result = {
             "message_id":  msg.id,
@@ -832,7 +835,7 @@ class MessageProcessor:
                     )
                     await db.commit()
             except Exception as e:
-                print(f"⚠ Reminder failed: {e}")
+                logger.warning("⚠ Reminder failed: {}", e)
 
         self._save_embedding(msg.id, content, {}, db)
         return result
@@ -1065,7 +1068,7 @@ class MessageProcessor:
                         )
                         await db.commit()
                 except Exception as e:
-                    print(f"⚠ Reminder failed: {e}")
+                    logger.warning("⚠ Reminder failed: {}", e)
 
         self._save_embedding(msg.id, content, analysis, db)
         return result
@@ -1173,7 +1176,7 @@ Return ONLY this JSON:
         try:
             response = await self.cerebras.chat(prompt, max_tokens=1500)
         except Exception as e:
-            print(f"[processor] _full_analysis LLM failed: {e}")
+            logger.warning("[processor] _full_analysis LLM failed: {}", e)
             response = {}
 
         response.setdefault("buckets", fast_buckets)
@@ -1319,7 +1322,7 @@ Return ONLY this JSON:
                         )
                         await db.commit()
                 except Exception as e:
-                    print(f"⚠ Reminder failed for '{saved['task']}': {e}")
+                    logger.warning("⚠ Reminder failed for '{}': {}", saved['task'], e)
 
         timed   = [s for s in saved_items if s["evt_time"]]
         untimed = [s for s in saved_items if not s["evt_time"]]
@@ -1432,10 +1435,10 @@ Return ONLY this JSON:
                 return
             except Exception as e:
                 if attempt == 0:
-                    print(f"⚠ Embedding attempt 1 failed, retrying in 1s: {e}")
+                    logger.warning("⚠ Embedding attempt 1 failed, retrying in 1s: {}", e)
                     await _aio.sleep(1)
                 else:
-                    print(f"⚠ Embedding failed (non-critical): {e}")
+                    logger.warning("⚠ Embedding failed (non-critical): {}", e)
 
     # ─────────────────────────────────────────────────────────────────────────
     # Background-enrichment helpers (image + document)
@@ -1569,14 +1572,14 @@ Return ONLY this JSON:
             async with async_session_maker() as db:
                 raw = await self._load_stored_bytes(media_url, db)
                 if not raw:
-                    print(f"[enrich] image {message_id}: bytes not found, skipping")
+                    logger.warning("[enrich] image {}: bytes not found, skipping", message_id)
                     return
 
-                print(f"[enrich] image {message_id}: running vision ({len(raw)//1024} KB)")
+                logger.info("[enrich] image {}: running vision ({} KB)", message_id, len(raw)//1024)
                 try:
                     analysis = await vision_service.analyze_image(raw, mime_type)
                 except Exception as e:
-                    print(f"[enrich] image {message_id} vision failed: {e}")
+                    logger.warning("[enrich] image {} vision failed: {}", message_id, e)
                     analysis = {
                         "document_type": "other", "title": caption or "Image",
                         "extracted_text": "", "recall_terms": "", "description": "",
@@ -1630,10 +1633,10 @@ Return ONLY this JSON:
 
                 # Bust personal bootstrap so brain view gets fresh content
                 await cache_del(bootstrap_key(user_id, None))
-                print(f"[enrich] image {message_id}: done (OCR {len(extracted)} chars, recall_terms {len(recall_terms)} chars)")
+                logger.info("[enrich] image {}: done (OCR {} chars, recall_terms {} chars)", message_id, len(extracted), len(recall_terms))
 
         except Exception as e:
-            print(f"[enrich] image {message_id} error: {e}")
+            logger.warning("[enrich] image {} error: {}", message_id, e)
 
     async def _enrich_document_background(
         self,
@@ -1653,10 +1656,10 @@ Return ONLY this JSON:
             async with async_session_maker() as db:
                 raw = await self._load_stored_bytes(media_url, db)
                 if not raw:
-                    print(f"[enrich] doc {message_id}: bytes not found, skipping")
+                    logger.warning("[enrich] doc {}: bytes not found, skipping", message_id)
                     return
 
-                print(f"[enrich] doc {message_id}: extracting text ({len(raw)//1024} KB)")
+                logger.info("[enrich] doc {}: extracting text ({} KB)", message_id, len(raw)//1024)
                 try:
                     # file_name (the real original filename, always has the right extension)
                     # takes precedence over caption — PDFs still detect fine via magic bytes
@@ -1665,11 +1668,11 @@ Return ONLY this JSON:
                     # list") would otherwise silently defeat detection for those.
                     extracted = (await extract_text_from_bytes(raw, hint=file_name or caption or media_url) or "").strip()
                 except Exception as e:
-                    print(f"[enrich] doc {message_id} extraction error: {e}")
+                    logger.warning("[enrich] doc {} extraction error: {}", message_id, e)
                     return
 
                 if not extracted or extracted.startswith("["):
-                    print(f"[enrich] doc {message_id}: no extractable text (image-only PDF?)")
+                    logger.info("[enrich] doc {}: no extractable text (image-only PDF?)", message_id)
                     return
 
                 # Distil extracted text to 50-100 high-signal keywords via Gemini.
@@ -1688,10 +1691,10 @@ Return ONLY this JSON:
 
                 self._save_embedding(message_id, embed_text, {}, db)
                 await cache_del(bootstrap_key(user_id, None))
-                print(f"[enrich] doc {message_id}: done ({len(extracted)} chars → {len(keywords)} keyword chars)")
+                logger.info("[enrich] doc {}: done ({} chars → {} keyword chars)", message_id, len(extracted), len(keywords))
 
         except Exception as e:
-            print(f"[enrich] doc {message_id} error: {e}")
+            logger.warning("[enrich] doc {} error: {}", message_id, e)
 
     async def _extract_document_keywords(self, text: str, caption: str) -> str:
         """Use Gemini to distil long extracted document text to 50-100 searchable keywords.
@@ -1716,7 +1719,7 @@ Return ONLY this JSON:
             lines = [ln.strip().lower() for ln in raw.splitlines() if ln.strip()]
             return "\n".join(lines[:100])
         except Exception as e:
-            print(f"[keywords] extraction failed, using lead: {e}")
+            logger.warning("[keywords] extraction failed, using lead: {}", e)
             return text[:800]
 
     async def _enrich_link_background(
@@ -1735,7 +1738,7 @@ Return ONLY this JSON:
         try:
             import httpx
         except ImportError:
-            print(f"[enrich] link {message_id}: httpx not available, skipping")
+            logger.warning("[enrich] link {}: httpx not available, skipping", message_id)
             return
 
         try:
@@ -1754,7 +1757,7 @@ Return ONLY this JSON:
                         resp = await client.get(link_url, headers=headers)
                         html = resp.text
                 except Exception as e:
-                    print(f"[enrich] link {message_id}: fetch failed: {e}")
+                    logger.warning("[enrich] link {}: fetch failed: {}", message_id, e)
                     return
 
                 # Extract OG title + description from HTML
@@ -1773,10 +1776,10 @@ Return ONLY this JSON:
                 page_text = f"{og_title}\n{og_desc}".strip()
 
                 if not page_text:
-                    print(f"[enrich] link {message_id}: no OG metadata found")
+                    logger.info("[enrich] link {}: no OG metadata found", message_id)
                     return
 
-                print(f"[enrich] link {message_id}: got OG text ({len(page_text)} chars)")
+                logger.info("[enrich] link {}: got OG text ({} chars)", message_id, len(page_text))
                 keywords = await self._extract_document_keywords(page_text, caption or "")
                 searchable = (f"{caption}\n{keywords}" if caption else keywords).strip()
 
@@ -1788,7 +1791,7 @@ Return ONLY this JSON:
 
                 self._save_embedding(message_id, searchable, {}, db)
                 await cache_del(bootstrap_key(user_id, None))
-                print(f"[enrich] link {message_id}: done ({len(keywords)} keyword chars)")
+                logger.info("[enrich] link {}: done ({} keyword chars)", message_id, len(keywords))
 
         except Exception as e:
-            print(f"[enrich] link {message_id} error: {e}")
\ No newline at end of file
+            logger.warning("[enrich] link {} error: {}", message_id, e)
\ No newline at end of file
@@ -15,6 +15,7 @@ from sqlalchemy import and_, select, update, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import async_session_maker, Message, User
+from loguru import logger
 
 IST = ZoneInfo("Asia/Kolkata")
 UTC = ZoneInfo("UTC")
@@ -46,7 +47,7 @@ class NudgeService:
             try:
                 await self._nudge_user(user, today, now_utc)
             except Exception as e:
-                print(f"[nudge] Failed for user {user.id}: {e}")
+                logger.warning("[nudge] Failed for user {}: {}", user.id, e)
 
 
     async def _nudge_user(self, user: User, today: str, now_utc: datetime):
@@ -104,7 +105,7 @@ class NudgeService:
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[nudge] Snooze failed: {e}")
+            logger.warning("[nudge] Snooze failed: {}", e)
             return False
 
     # ──────────────────────────────────────────────────────────────
@@ -153,7 +154,7 @@ class NudgeService:
                         .values(tags=tags)
                     )
                 except Exception as e:
-                    print(f"[nudge] Follow-up mark failed for message {message.id}: {e}")
+                    logger.warning("[nudge] Follow-up mark failed for message {}: {}", message.id, e)
             await session.commit()
 
 
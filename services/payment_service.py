@@ -5,11 +5,11 @@ Uses httpx directly (async-safe) — no razorpay SDK needed.
 
 import hashlib
 import hmac
-import json
 from datetime import datetime, timedelta
 from typing import Optional
 
 import httpx
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -147,7 +147,7 @@ class PaymentService:
         if not hmac.compare_digest(expected, signature):
             return False
 
-        event = json.loads(body)
+        event = orjson.loads(body)
         if event.get("event") == "payment.captured":
             payment = event.get("payload", {}).get("payment", {}).get("entity", {})
             order_id = payment.get("order_id")
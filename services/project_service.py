@@ -15,6 +15,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import async_session_maker, Message, User
 from cerebras_client import CerebrasClient
+from loguru import logger
 
 
 class ProjectService:
@@ -79,7 +80,7 @@ Return ONLY this JSON:
             if project and confidence >= 0.80:
                 return project
         except Exception as e:
-            print(f"[project] Detection failed: {e}")
+            logger.warning("[project] Detection failed: {}", e)
 
         return None
 
@@ -105,7 +106,7 @@ Return ONLY this JSON:
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[project] Assign failed: {e}")
+            logger.warning("[project] Assign failed: {}", e)
             return False
 
     # ──────────────────────────────────────────────────────────────
@@ -173,29 +174,34 @@ Return ONLY this JSON:
         if not messages:
             return f"No items found in project *{project_name}*."
 
-        text_ = f"📁 *Project: {project_name}*\n_{len(messages)} items_\n\n"
+        parts = [f"📁 *Project: {project_name}*\n_{len(messages)} items_\n\n"]
 
-        todos  = [m for m in messages if "To-Do" in (m.tags or {}).get("all_buckets", [])]
-        ideas  = [m for m in messages if "Ideas" in (m.tags or {}).get("all_buckets", [])]
-        others = [m for m in messages if m not in todos and m not in ideas]
+        # Single pass — `m not in todos` was a linear scan per message
+        todos, ideas, others = [], [], []
+        for m in messages:
+            buckets = (m.tags or {}).get("all_buckets", [])
+            is_todo, is_idea = "To-Do" in buckets, "Ideas" in buckets
+            if is_todo:
+                todos.append(m)
+            if is_idea:
+                ideas.append(m)
+            if not (is_todo or is_idea):
+                others.append(m)
 
         if todos:
-            text_ += "✅ *Tasks*\n"
-            for m in todos[:5]:
-                tags   = m.tags or {}
-                done   = "~" if tags.get("done") else "•"
-                text_ += f"{done} {m.content[:60]}\n"
-            text_ += "\n"
+            parts.append("✅ *Tasks*\n")
+            parts.extend(
+                f"{'~' if (m.tags or {}).get('done') else '•'} {m.content[:60]}\n" for m in todos[:5]
+            )
+            parts.append("\n")
 
         if ideas:
-            text_ += "💡 *Ideas*\n"
-            for m in ideas[:3]:
-                text_ += f"• {m.content[:60]}\n"
-            text_ += "\n"
+            parts.append("💡 *Ideas*\n")
+            parts.extend(f"• {m.content[:60]}\n" for m in ideas[:3])
+            parts.append("\n")
 
         if others:
-            text_ += "📝 *Notes*\n"
-            for m in others[:3]:
-                text_ += f"• {m.content[:60]}\n"
+            parts.append("📝 *Notes*\n")
+            parts.extend(f"• {m.content[:60]}\n" for m in others[:3])
 
-        return text_
+        return "".join(parts)
@@ -19,10 +19,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy import String, Boolean, Integer, DateTime, ForeignKey, Text
 
-from database import async_session_maker, Base, User, Message, Category, DeviceToken
+from database import async_session_maker, Base, User, Message, Category, DeviceToken, UTC_NOW
 from cerebras_client import CerebrasClient
 from services.reminder_service import send_apns_notification
 from services.group_service import total_unread_for_user
+from loguru import logger
 
 
 IST = ZoneInfo("Asia/Kolkata")
@@ -44,7 +45,7 @@ class Recurrence(Base):
     next_fire:        Mapped[datetime]      = mapped_column(DateTime)
     is_active:        Mapped[bool]          = mapped_column(Boolean, default=True)
     template_content: Mapped[str]           = mapped_column(Text)
-    created_at:       Mapped[datetime]      = mapped_column(DateTime, default=datetime.utcnow)
+    created_at:       Mapped[datetime]      = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 # ── Service ───────────────────────────────────────────────────────────────────
@@ -151,7 +152,7 @@ Examples:
             if isinstance(response, dict) and "task" in response:
                 return response
         except Exception as e:
-            print(f"[recurrence] parse_temporal failed: {e}")
+            logger.warning("[recurrence] parse_temporal failed: {}", e)
         return None
 
     async def parse_recurrence(self, content: str) -> Optional[Dict]:
@@ -199,7 +200,7 @@ Examples:
             if response.get("rule") and response.get("task"):
                 return response
         except Exception as e:
-            print(f"[recurrence] Parse failed: {e}")
+            logger.warning("[recurrence] Parse failed: {}", e)
 
         return None
 
@@ -250,7 +251,7 @@ Examples:
             await db.refresh(rec)
             return rec
         except Exception as e:
-            print(f"[recurrence] Create failed: {e}")
+            logger.warning("[recurrence] Create failed: {}", e)
             return None
 
     # ──────────────────────────────────────────────────────────────
@@ -278,7 +279,7 @@ Examples:
             try:
                 await self._fire(rec, user)
             except Exception as e:
-                print(f"[recurrence] Fire failed for rec {rec.id}: {e}")
+                logger.warning("[recurrence] Fire failed for rec {}: {}", rec.id, e)
 
     async def _fire(self, rec: Recurrence, user: User):
         """Create a new todo message and send notification."""
@@ -373,9 +374,9 @@ Examples:
                     category="REMINDER_ACTION",
                 )
         except Exception as e:
-            print(f"[recurrence] APNs failed for rec {rec.id}: {e}")
+            logger.warning("[recurrence] APNs failed for rec {}: {}", rec.id, e)
 
-        print(f"[recurrence] Fired rec {rec.id} for user {user.id}")
+        logger.info("[recurrence] Fired rec {} for user {}", rec.id, user.id)
 
     # ──────────────────────────────────────────────────────────────
     # Pause / resume
@@ -392,7 +393,7 @@ Examples:
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[recurrence] Pause failed: {e}")
+            logger.warning("[recurrence] Pause failed: {}", e)
             return False
 
     async def resume(self, rec_id: int) -> bool:
@@ -414,7 +415,7 @@ Examples:
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[recurrence] Resume failed: {e}")
+            logger.warning("[recurrence] Resume failed: {}", e)
             return False
 
     # ──────────────────────────────────────────────────────────────
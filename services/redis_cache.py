@@ -15,15 +15,36 @@ _OK    = bool(_URL and _TOKEN)
 
 _HEADERS = {"Authorization": f"Bearer {_TOKEN}"}
 
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    """Shared keep-alive client — every cache hit used to pay a fresh TLS handshake.
+    Per-request timeouts are passed at the call site."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=_HEADERS,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Close the shared client — called from the FastAPI lifespan on shutdown."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
 
 async def cache_get(key: str) -> Optional[Any]:
     if not _OK:
         return None
     try:
-        async with httpx.AsyncClient(timeout=2.0) as c:
-            r = await c.get(f"{_URL}/get/{key}", headers=_HEADERS)
-            val = r.json().get("result")
-            return json.loads(val) if val else None
+        r = await _http().get(f"{_URL}/get/{key}", timeout=2.0)
+        val = r.json().get("result")
+        return json.loads(val) if val else None
     except Exception:
         return None
 
@@ -32,23 +53,38 @@ async def cache_set(key: str, value: Any, ex: int = 300) -> None:
     if not _OK:
         return
     try:
-        async with httpx.AsyncClient(timeout=2.0) as c:
-            # Pipeline: single round-trip for SET with EX
-            await c.post(
-                f"{_URL}/pipeline",
-                headers=_HEADERS,
-                json=[["SET", key, json.dumps(value, default=str), "EX", str(ex)]],
-            )
+        # Pipeline: single round-trip for SET with EX
+        await _http().post(
+            f"{_URL}/pipeline",
+            json=[["SET", key, json.dumps(value, default=str), "EX", str(ex)]],
+            timeout=2.0,
+        )
     except Exception:
         pass
 
 
+async def cache_claim(key: str, ex: int = 86400) -> bool:
+    """SET key NX — True if this call created the key (first claimant), False if it
+    already existed. Fails open: True when Redis is unconfigured or unreachable."""
+    if not _OK:
+        return True
+    try:
+        r = await _http().post(
+            f"{_URL}/pipeline",
+            json=[["SET", key, "1", "NX", "EX", str(ex)]],
+            timeout=2.0,
+        )
+        data = r.json()
+        return bool(data and data[0].get("result"))
+    except Exception:
+        return True
+
+
 async def cache_del(key: str) -> None:
     if not _OK:
         return
     try:
-        async with httpx.AsyncClient(timeout=2.0) as c:
-            await c.get(f"{_URL}/del/{key}", headers=_HEADERS)
+        await _http().get(f"{_URL}/del/{key}", timeout=2.0)
     except Exception:
         pass
 
@@ -64,25 +100,27 @@ def bootstrap_key(user_id: int, group_id: Optional[int]) -> str:
     return f"em:b:{user_id}:{group_id or 'p'}"
 
 
+def analytics_key(user_id: int) -> str:
+    return f"em:a:{user_id}"
+
+
+def apple_notification_key(notification_uuid: str) -> str:
+    return f"em:apn:{notification_uuid}"
+
+
 async def cache_del_user_searches(user_id: int) -> None:
     """Delete all search cache entries for a user (called after content edits)."""
+    from services import semantic_cache
+    semantic_cache.invalidate(user_id)
     if not _OK:
         return
     try:
         pattern = f"em:s:{user_id}:*"
-        async with httpx.AsyncClient(timeout=3.0) as c:
-            r = await c.post(
-                f"{_URL}/pipeline",
-                headers=_HEADERS,
-                json=[["KEYS", pattern]],
-            )
-            data = r.json()
-            keys = data[0].get("result", []) if data else []
-            if keys:
-                await c.post(
-                    f"{_URL}/pipeline",
-                    headers=_HEADERS,
-                    json=[["DEL"] + keys],
-                )
+        c = _http()
+        r = await c.post(f"{_URL}/pipeline", json=[["KEYS", pattern]], timeout=3.0)
+        data = r.json()
+        keys = data[0].get("result", []) if data else []
+        if keys:
+            await c.post(f"{_URL}/pipeline", json=[["DEL"] + keys], timeout=3.0)
     except Exception:
         pass
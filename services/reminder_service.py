@@ -7,7 +7,6 @@ Handles creation, scheduling, and delivery of reminders via APNs.
 from __future__ import annotations
 from database import Base, User, Message, Category, MessageType, async_session_maker
 import asyncio
-import os
 import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
@@ -20,8 +19,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import String, Text, DateTime, ForeignKey, Boolean, Integer, JSON
 
-from database import Base, User, Message, Category, MessageType, async_session_maker, DeviceToken
+from database import Base, User, Message, Category, MessageType, async_session_maker, DeviceToken, UTC_NOW
 from cerebras_client import CerebrasClient
+from config import Config
+from loguru import logger
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -30,6 +31,28 @@ from cerebras_client import CerebrasClient
 
 _apns_jwt_cache: dict = {}   # {"token": str, "exp": float}
 
+_apns_client: Optional[httpx.AsyncClient] = None
+
+def _apns_http_client() -> httpx.AsyncClient:
+    """Shared HTTP/2 client — Apple asks providers to keep APNs connections open and
+    multiplex pushes over them rather than reconnecting (TLS handshake) per notification."""
+    global _apns_client
+    if _apns_client is None or _apns_client.is_closed:
+        _apns_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=300.0),
+        )
+    return _apns_client
+
+
+async def aclose_apns_client() -> None:
+    """Close the shared APNs client — called from the FastAPI lifespan on shutdown."""
+    global _apns_client
+    if _apns_client is not None and not _apns_client.is_closed:
+        await _apns_client.aclose()
+    _apns_client = None
+
 
 async def _cleanup_dead_token(token: str) -> None:
     """Delete a stale APNs token from the DB (Apple returned 410 or 400/BadDeviceToken)."""
@@ -38,9 +61,9 @@ async def _cleanup_dead_token(token: str) -> None:
         async with async_session_maker() as session:
             await session.execute(_sql_delete(DeviceToken).where(DeviceToken.token == token))
             await session.commit()
-            print(f"[apns] Pruned dead token ...{token[-8:]}")
+            logger.info("[apns] Pruned dead token ...{}", token[-8:])
     except Exception as exc:
-        print(f"[apns] Failed to prune dead token: {exc}")
+        logger.warning("[apns] Failed to prune dead token: {}", exc)
 
 
 def _normalize_apns_key(raw: str) -> str:
@@ -72,15 +95,11 @@ def _build_apns_jwt() -> str:
     if _apns_jwt_cache.get("exp", 0) > now + 300:
         return _apns_jwt_cache["token"]
 
-    key_id   = os.getenv("APNS_KEY_ID", "")
-    team_id  = os.getenv("APNS_TEAM_ID", "")
-    auth_key = _normalize_apns_key(os.getenv("APNS_AUTH_KEY", ""))
-
     token = jose_jwt.encode(
-        {"iss": team_id, "iat": int(now)},
-        auth_key,
+        {"iss": Config.APNS_TEAM_ID, "iat": int(now)},
+        _normalize_apns_key(Config.APNS_AUTH_KEY),
         algorithm="ES256",
-        headers={"kid": key_id},
+        headers={"kid": Config.APNS_KEY_ID},
     )
     _apns_jwt_cache = {"token": token, "exp": now + 3300}
     return token
@@ -95,17 +114,13 @@ async def send_apns_notification(
     category: str | None = None,
 ) -> bool:
     """Send a push notification to one iOS device via APNs HTTP/2."""
-    key_id    = os.getenv("APNS_KEY_ID", "")
-    team_id   = os.getenv("APNS_TEAM_ID", "")
-    auth_key  = os.getenv("APNS_AUTH_KEY", "")
-    bundle_id = os.getenv("APNS_BUNDLE_ID", "")
+    bundle_id = Config.APNS_BUNDLE_ID
 
-    if not all([key_id, team_id, auth_key, bundle_id, device_token]):
-        print("[apns] Missing config — set APNS_KEY_ID / APNS_TEAM_ID / APNS_AUTH_KEY / APNS_BUNDLE_ID")
+    if not all([Config.APNS_KEY_ID, Config.APNS_TEAM_ID, Config.APNS_AUTH_KEY, bundle_id, device_token]):
+        logger.info("[apns] Missing config — set APNS_KEY_ID / APNS_TEAM_ID / APNS_AUTH_KEY / APNS_BUNDLE_ID")
         return False
 
-    production = os.getenv("APNS_PRODUCTION", "false").lower() == "true"
-    host = "api.push.apple.com" if production else "api.sandbox.push.apple.com"
+    host = "api.push.apple.com" if Config.APNS_PRODUCTION else "api.sandbox.push.apple.com"
     url  = f"https://{host}/3/device/{device_token}"
 
     headers = {
@@ -127,12 +142,11 @@ async def send_apns_notification(
         payload.update(data)
 
     try:
-        async with httpx.AsyncClient(http2=True, timeout=10.0) as client:
-            resp = await client.post(url, json=payload, headers=headers)
+        resp = await _apns_http_client().post(url, json=payload, headers=headers)
         if resp.status_code == 200:
-            print(f"[apns] ✅ Sent to ...{device_token[-8:]}")
+            logger.info("[apns] ✅ Sent to ...{}", device_token[-8:])
             return True
-        print(f"[apns] ❌ {resp.status_code}: {resp.text[:200]}")
+        logger.warning("[apns] ❌ {}: {}", resp.status_code, resp.text[:200])
         # 410 = token permanently unregistered (app deleted / device erased)
         if resp.status_code == 410:
             asyncio.create_task(_cleanup_dead_token(device_token))
@@ -144,7 +158,7 @@ async def send_apns_notification(
                 pass
         return False
     except Exception as e:
-        print(f"[apns] Error: {e}")
+        logger.warning("[apns] Error: {}", e)
         return False
 
 
@@ -168,7 +182,7 @@ class Reminder(Base):
     snooze_count:     Mapped[int]           = mapped_column(Integer, default=0)
     sent_at:          Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     recurrence:       Mapped[Optional[dict]]    = mapped_column(JSON, nullable=True)
-    created_at:       Mapped[datetime]      = mapped_column(DateTime, default=datetime.utcnow)
+    created_at:       Mapped[datetime]      = mapped_column(DateTime, server_default=UTC_NOW)
 
     def __repr__(self):
         return f"<Reminder {self.id} — {self.task} at {self.remind_at}>"
@@ -197,7 +211,7 @@ class ReminderService:
     ) -> Optional[Reminder]:
         remind_at = self._resolve_remind_at(analysis, user.timezone)
         if not remind_at:
-            print(f"[reminder] Could not resolve time from analysis")
+            logger.warning("[reminder] Could not resolve time from analysis")
             return None
 
         task = self._best_task_label(content, analysis)
@@ -213,7 +227,7 @@ class ReminderService:
         db.add(reminder)
         await db.commit()
         await db.refresh(reminder)
-        print(f"[reminder] Created #{reminder.id} — '{task}' at {remind_at} UTC")
+        logger.info("[reminder] Created #{} — '{}' at {} UTC", reminder.id, task, remind_at)
         return reminder
 
     # ──────────────────────────────────────────────────────────────
@@ -227,7 +241,7 @@ class ReminderService:
         try:
             await self._fire_due_reminders()
         except Exception as e:
-            print(f"[reminder] Tick error: {e}")
+            logger.warning("[reminder] Tick error: {}", e)
 
     async def run_scheduler(self, poll_interval: int = 30):
         """
@@ -235,12 +249,12 @@ class ReminderService:
         New deployments use run_scheduler_tick() via master scheduler.
         """
         self._scheduler_running = True
-        print("[reminder] Scheduler started")
+        logger.info("[reminder] Scheduler started")
         while self._scheduler_running:
             try:
                 await self._fire_due_reminders()
             except Exception as e:
-                print(f"[reminder] Scheduler error: {e}")
+                logger.warning("[reminder] Scheduler error: {}", e)
             await asyncio.sleep(poll_interval)
 
     async def _fire_due_reminders(self):
@@ -260,7 +274,7 @@ class ReminderService:
                 for reminder in due:
                     await self._send_reminder(reminder, db)
             except Exception as e:
-                print(f"[reminder] DB error in scheduler: {e}")
+                logger.warning("[reminder] DB error in scheduler: {}", e)
 
     async def _send_reminder(self, reminder: Reminder, db: AsyncSession):
         # ── APNs push ─────────────────────────────────────────────
@@ -283,7 +297,7 @@ class ReminderService:
                     category="REMINDER_ACTION",
                 )
         except Exception as e:
-            print(f"[apns] Failed for reminder #{reminder.id}: {e}")
+            logger.warning("[apns] Failed for reminder #{}: {}", reminder.id, e)
 
         # Mark reminder as sent and update linked message tags
         async with async_session_maker() as session:
@@ -306,9 +320,9 @@ class ReminderService:
                             .values(tags=tags)
                         )
                 except Exception as e:
-                    print(f"[reminder] Could not update todo tags: {e}")
+                    logger.warning("[reminder] Could not update todo tags: {}", e)
             await session.commit()
-        print(f"[reminder] ✅ Sent #{reminder.id} — {reminder.task}")
+        logger.info("[reminder] ✅ Sent #{} — {}", reminder.id, reminder.task)
     # ──────────────────────────────────────────────────────────────
     # Snooze / Cancel / List
     # ──────────────────────────────────────────────────────────────
@@ -22,10 +22,12 @@ import re
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from loguru import logger
 from sqlalchemy import and_, func, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from cerebras_client import CerebrasClient
+import database
 from database import Category, Message, MessageType, User
 
 class _SemanticSkipped(Exception):
@@ -213,6 +215,33 @@ def _date_label(saved_date: str, today: date) -> str:
 # Search service
 # ─────────────────────────────────────────────────────────────────────────────
 
+# fp16 ANN candidates fetched per requested semantic hit, before the fp32 re-rank
+ANN_OVERFETCH = 4
+
+# Hybrid retrieval — Reciprocal Rank Fusion of vector and full-text ranks.
+# k=60 is the standard RRF constant; it flattens the gap between adjacent ranks so
+# neither list's #1 dominates outright.
+RRF_K = 60
+DEFAULT_KEYWORD_WEIGHT = 0.4
+DEFAULT_VECTOR_WEIGHT  = 0.6
+
+
+def _rrf_fuse(
+    semantic_hits: Dict[int, float], keyword_hits: Dict[int, float],
+    vector_weight: float, keyword_weight: float,
+) -> Dict[int, float]:
+    """Weighted RRF over two {id: score} maps → {id: fused}, normalised so 1.0 means
+    ranked #1 in both lists."""
+    fused: Dict[int, float] = {}
+    for weight, hits in ((vector_weight, semantic_hits), (keyword_weight, keyword_hits)):
+        if weight <= 0:
+            continue
+        for rank, mid in enumerate(sorted(hits, key=hits.get, reverse=True), start=1):
+            fused[mid] = fused.get(mid, 0.0) + weight / (RRF_K + rank)
+    best = (max(vector_weight, 0.0) + max(keyword_weight, 0.0)) / (RRF_K + 1)
+    return {mid: f / best for mid, f in fused.items()} if best else {}
+
+
 class SearchService:
 
     def __init__(self, cerebras_client: CerebrasClient):
@@ -227,18 +256,25 @@ class SearchService:
         category_filter: Optional[List[str]] = None,
         group_id: Optional[int] = None,
         fast: bool = False,
+        user: Optional[User] = None,
+        keyword_weight: float = DEFAULT_KEYWORD_WEIGHT,
+        vector_weight: float = DEFAULT_VECTOR_WEIGHT,
     ) -> Dict:
         if not query or not query.strip():
             return {"results": [], "natural_response": "Please enter a search query."}
 
-        user = await self._get_user(user_phone, db)
+        # Callers that already hold the authenticated User (same session) skip the phone lookup
+        if user is None:
+            user = await self._get_user(user_phone, db)
         if not user:
             return {"results": [], "natural_response": "User not found."}
 
         from services import redis_cache
 
-        # ── Cache check (skip for group searches — group data changes frequently) ──
-        if not group_id:
+        # ── Cache check (skip for group searches — group data changes frequently —
+        #    and for non-default fusion weights, which the cache keys don't cover) ──
+        default_weights = (keyword_weight, vector_weight) == (DEFAULT_KEYWORD_WEIGHT, DEFAULT_VECTOR_WEIGHT)
+        if not group_id and default_weights:
             ck = redis_cache.search_key(user.id, query)
             cached = await redis_cache.cache_get(ck)
             if cached:
@@ -264,7 +300,7 @@ class SearchService:
                 user=user, bucket=_canonical, limit=limit,
                 group_id=group_id, db=db,
             )
-            print(f"[search] bucket-browse '{_canonical}' → {len(results)} results")
+            logger.info("[search] bucket-browse '{}' → {} results", _canonical, len(results))
             return {"results": results, "natural_response": ""}
 
         if len(query.strip().split()) == 1 and _query_word in TYPE_ALIASES:
@@ -273,7 +309,7 @@ class SearchService:
                 user=user, message_type=_msg_type, limit=limit,
                 group_id=group_id, db=db,
             )
-            print(f"[search] type-browse '{_msg_type}' → {len(results)} results")
+            logger.info("[search] type-browse '{}' → {} results", _msg_type, len(results))
             return {"results": results, "natural_response": ""}
 
         import time as _time
@@ -306,7 +342,7 @@ class SearchService:
             )
             ranked = self._rank(messages=messages, query=query, expansion=base_expansion,
                                 use_due_filter=bool(date_from), fast=True)[:limit]
-            print(f"[search] tier1 keyword → {_time.monotonic()-_t0:.2f}s ({len(ranked)} results)")
+            logger.info("[search] tier1 keyword → {:.2f}s ({} results)", _time.monotonic()-_t0, len(ranked))
             # Do NOT cache fast=True results — they are keyword-only (no embeddings)
             # and an empty keyword hit would poison the cache for the subsequent
             # fast=False embedding search on the same query (e.g. "sketches" matches
@@ -340,9 +376,21 @@ class SearchService:
         try:
             query_embedding = await embed_task
         except Exception as e:
-            print(f"[search] embed failed: {e}")
+            logger.warning("[search] embed failed: {}", e)
             query_embedding = None
 
+        # ── Semantic cache — a near-identical earlier query short-circuits tiers 2+3 ─
+        from services import semantic_cache
+        sem_scope = (limit, date_from, date_to, bucket_hint, person_hint, use_due_filter)
+        use_sem_cache = ck is not None and query_embedding is not None
+        if use_sem_cache:
+            hit = semantic_cache.lookup(user.id, sem_scope, query_embedding)
+            if hit is not None:
+                if expand_task:
+                    expand_task.cancel()
+                logger.info("[search] semantic cache hit → {:.2f}s", _time.monotonic()-_t0)
+                return hit
+
         expansion = base_expansion
         if expand_task:
             try:
@@ -353,29 +401,32 @@ class SearchService:
                 if bucket_hint:
                     expansion["bucket_filter"] = bucket_hint
             except Exception as e:
-                print(f"[search] expand failed: {e}")
+                logger.warning("[search] expand failed: {}", e)
 
         if person_hint:
             expansion.setdefault("entities", [])
             if person_hint not in expansion["entities"]:
                 expansion["entities"].insert(0, person_hint)
 
-        print(f"[search] tier2+3 ready → {_time.monotonic()-_t0:.2f}s")
+        logger.info("[search] tier2+3 ready → {:.2f}s", _time.monotonic()-_t0)
 
         messages = await self._retrieve(
             user=user, query=query, expansion=expansion,
             use_due_filter=use_due_filter, db=db, limit=limit * 3,
             group_id=group_id, precomputed_embedding=query_embedding,
+            keyword_weight=keyword_weight, vector_weight=vector_weight,
         )
         ranked = self._rank(
             messages=messages, query=query, expansion=expansion,
             use_due_filter=use_due_filter,
         )[:limit]
 
-        print(f"[search] tier2+3 done → {_time.monotonic()-_t0:.2f}s ({len(ranked)} results)")
+        logger.info("[search] tier2+3 done → {:.2f}s ({} results)", _time.monotonic()-_t0, len(ranked))
         result = {"results": ranked, "natural_response": ""}
         if ck:
             await redis_cache.cache_set(ck, result, ex=300)
+        if use_sem_cache:
+            semantic_cache.store(user.id, sem_scope, query_embedding, result)
         return result
 
 
@@ -396,7 +447,7 @@ class SearchService:
         today_str = str(date_type.today())
         is_today_query = (date_from == date_to == today_str)
 
-        print(f"[todos_direct] user={user_id} df={date_from} dt={date_to} is_today={is_today_query}")
+        logger.info("[todos_direct] user={} df={} dt={} is_today={}", user_id, date_from, date_to, is_today_query)
 
         # Build the date condition
         # For today queries with include_overdue: also pull past-due undone items
@@ -564,7 +615,7 @@ Return ONLY this JSON:
         try:
             response = await self.cerebras.chat_lite(prompt, max_tokens=300)
         except Exception as e:
-            print(f"[search] _expand_query failed ({type(e).__name__}): {e}")
+            logger.warning("[search] _expand_query failed ({}): {}", type(e).__name__, e)
             response = {}
         response.setdefault("core_concepts", words)
         response.setdefault("keywords", words)
@@ -657,8 +708,11 @@ Return ONLY this JSON:
         group_id: Optional[int] = None,
         precomputed_embedding: Optional[List[float]] = None,
         skip_semantic: bool = False,
+        keyword_weight: float = DEFAULT_KEYWORD_WEIGHT,
+        vector_weight: float = DEFAULT_VECTOR_WEIGHT,
     ) -> List[tuple]:
         semantic_hits: Dict[int, float] = {}
+        fused: Dict[int, float] = {}
         # Only include messages with cosine similarity above this floor.
         # Gemini text-embedding-004 (1536-dim): short unrelated texts still score 0.30–0.38.
         # 0.40 is the practical cutoff for "genuinely related" in this embedding space.
@@ -669,48 +723,89 @@ Return ONLY this JSON:
             from services.embedding_service import embedding_service
             query_embedding = precomputed_embedding or await embedding_service.aembed_query(query)
             embedding_str   = f"[{','.join(map(str, query_embedding))}]"
-            # probes=10 = sqrt(lists=100): searches 10% of clusters instead of the default 1%.
-            # SET LOCAL scopes it to this transaction only — no global session pollution.
-            await db.execute(text("SET LOCAL ivfflat.probes = 10"))
+            # fp16 ANN candidates to re-rank at full precision — 4× headroom absorbs the
+            # ordering noise halfvec adds near the cut-off
+            ann_lim = limit * ANN_OVERFETCH
+            # An HNSW scan (messages_embedding_hnsw_half) yields at most ef_search candidates
+            # (default 40) *before* the user/bucket filters — keep it ≥ ann_lim, floor 100.
+            # is_local=true is SET LOCAL: scoped to this transaction, no session pollution.
+            await db.execute(
+                text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+                {"ef": str(max(100, ann_lim))},
+            )
             if group_id:
-                sem_sql = text("""
-                    SELECT m.id, 1 - (m.embedding <=> :emb ::vector) AS similarity
-                    FROM messages m
-                    WHERE m.group_id = :gid AND m.embedding IS NOT NULL
-                      AND (1 - (m.embedding <=> :emb ::vector)) > :min_sim
-                      AND COALESCE(m.tags->>'primary_bucket', m.tags->>'intent_bucket', '') != 'To-Do'
-                    ORDER BY m.embedding <=> :emb ::vector
+                scope  = "m.group_id = :gid"
+                params = {"gid": group_id}
+            else:
+                scope  = "m.user_id = :uid AND m.group_id IS NULL AND (m.tags->>'assigned_by' IS NULL)"
+                params = {"uid": user.id}
+            scope += " AND COALESCE(m.tags->>'primary_bucket', m.tags->>'intent_bucket', '') != 'To-Do'"
+            # Hybrid candidates in one round-trip: top-k by cosine and top-k by full-text
+            # rank (GIN on messages.tsv), outer-joined so each id carries both signals.
+            # The cosine side is two-stage: ann walks the halfvec HNSW index, vec re-scores
+            # those candidates against the fp32 column so the floor/gap filters see exact sims.
+            # On pgvector < 0.7 (no halfvec index) ann orders by the fp32 column directly.
+            # The query vector is bound twice: a parameter cast to halfvec is typed halfvec
+            # everywhere it appears, which would re-rank vec against an fp16-rounded query.
+            ann_order = (
+                "m.embedding::halfvec(1536) <=> :emb_h ::halfvec(1536)" if database.HALFVEC_ANN
+                else "m.embedding <=> :emb_h ::vector"
+            )
+            # Full-text side only once init_db has the generated tsv column; otherwise the
+            # whole statement would fail and the slow path would return nothing.
+            if database.TSV_SEARCH:
+                kw_cte = f""", kw AS (
+                    SELECT m.id, ts_rank_cd(m.tsv, q) AS kw_score
+                    FROM messages m, websearch_to_tsquery('english', :q) q
+                    WHERE {scope} AND m.tsv @@ q
+                    ORDER BY kw_score DESC
                     LIMIT :lim
-                """)
-                sem_result = await db.execute(sem_sql, {"emb": embedding_str, "gid": group_id, "lim": limit, "min_sim": MIN_SEMANTIC_SIMILARITY})
+                )"""
+                final_select = "SELECT id, vec.similarity, kw.kw_score FROM vec FULL OUTER JOIN kw USING (id)"
             else:
-                sem_sql = text("""
-                    SELECT m.id, 1 - (m.embedding <=> :emb ::vector) AS similarity
+                kw_cte = ""
+                final_select = "SELECT id, vec.similarity, NULL::real AS kw_score FROM vec"
+            hybrid_sql = text(f"""
+                WITH ann AS (
+                    SELECT m.id, m.embedding
                     FROM messages m
-                    WHERE m.user_id = :uid AND m.group_id IS NULL AND m.embedding IS NOT NULL
-                      AND (m.tags->>'assigned_by' IS NULL)
-                      AND (1 - (m.embedding <=> :emb ::vector)) > :min_sim
-                      AND COALESCE(m.tags->>'primary_bucket', m.tags->>'intent_bucket', '') != 'To-Do'
-                    ORDER BY m.embedding <=> :emb ::vector
+                    WHERE {scope} AND m.embedding IS NOT NULL
+                    ORDER BY {ann_order}
+                    LIMIT :ann_lim
+                ), vec AS (
+                    SELECT id, 1 - (embedding <=> :emb ::vector) AS similarity
+                    FROM ann
+                    WHERE (1 - (embedding <=> :emb ::vector)) > :min_sim
+                    ORDER BY similarity DESC
                     LIMIT :lim
-                """)
-                sem_result = await db.execute(sem_sql, {"emb": embedding_str, "uid": user.id, "lim": limit, "min_sim": MIN_SEMANTIC_SIMILARITY})
-            semantic_hits = {row.id: float(row.similarity) for row in sem_result}
+                ){kw_cte}
+                {final_select}
+            """)
+            hybrid_rows = (await db.execute(hybrid_sql, {
+                **params, "emb": embedding_str, "emb_h": embedding_str, "q": query, "lim": limit, "ann_lim": ann_lim,
+                "min_sim": MIN_SEMANTIC_SIMILARITY,
+            })).all()
+            semantic_hits = {r.id: float(r.similarity) for r in hybrid_rows if r.similarity is not None}
+            keyword_hits  = {r.id: float(r.kw_score) for r in hybrid_rows if r.kw_score is not None}
             # Relative filter: drop candidates more than 0.12 below the best score.
             # Prevents weak-but-above-floor matches from polluting results when one
             # result is clearly dominant (e.g. "soup recipe" → 0.663 vs 0.503/0.494).
             # Topic queries with clustered results (e.g. 0.72/0.68/0.65) all pass.
+            # Full-text matches are kept regardless — an exact name/ID hit is never noise.
             if semantic_hits:
                 max_sim = max(semantic_hits.values())
                 RELATIVE_GAP = 0.12
                 semantic_hits = {mid: sim for mid, sim in semantic_hits.items()
                                  if sim >= max_sim - RELATIVE_GAP}
                 scores = sorted(semantic_hits.values(), reverse=True)
-                print(f"[search] semantic hits={len(scores)} scores={[round(s,3) for s in scores[:5]]} (floor={MIN_SEMANTIC_SIMILARITY} gap={RELATIVE_GAP})")
+                logger.info("[search] semantic hits={} scores={} (floor={} gap={})", len(scores), [round(s,3) for s in scores[:5]], MIN_SEMANTIC_SIMILARITY, RELATIVE_GAP)
+            if keyword_hits:
+                logger.info("[search] full-text hits={}", len(keyword_hits))
+            fused = _rrf_fuse(semantic_hits, keyword_hits, vector_weight, keyword_weight)
         except _SemanticSkipped:
             pass  # fast tier-1 path: keyword-only by design, not a failure
         except Exception as e:
-            print(f"⚠ Semantic search failed: {e}")
+            logger.warning("⚠ Semantic search failed: {}", e)
 
         stmt = (
             select(Message, Category)
@@ -800,11 +895,9 @@ Return ONLY this JSON:
             kw_conds.append(func.lower(Message.content).contains(t))
             kw_conds.append(func.lower(Message.summary).contains(t))
 
-        # ── [SEMANTIC-ONLY TEST] ──────────────────────────────────────────────
-        # Candidate generation is now embedding-only for the slow (fast=False) path.
-        # The rapidfuzz/keyword ILIKE retrieval below is kept ONLY for the instant
+        # Candidate generation for the slow (fast=False) path is the hybrid vector +
+        # full-text query above. The ILIKE retrieval below is kept ONLY for the instant
         # fast=True tier-1 preview (skip_semantic=True), which has no embedding to use.
-        # To restore hybrid retrieval, set: all_ids = kw_ids | set(semantic_hits.keys())
         if skip_semantic:
             if kw_conds:
                 stmt = stmt.where(or_(*kw_conds))
@@ -813,7 +906,7 @@ Return ONLY this JSON:
             kw_rows   = kw_result.all()
             all_ids   = {m.id for m, _ in kw_rows}
         else:
-            all_ids   = set(semantic_hits.keys())
+            all_ids   = set(fused.keys())
         if not all_ids:
             return []
 
@@ -844,7 +937,7 @@ Return ONLY this JSON:
         rows         = final_result.all()
 
         for message, _ in rows:
-            message._semantic_score = semantic_hits.get(message.id, 0.0)
+            message._relevance = fused.get(message.id, 0.0)
 
         return list(rows)
 
@@ -917,13 +1010,12 @@ Return ONLY this JSON:
         self, message: Message, category: Optional[Category],
         query: str, expansion: Dict, use_due_filter: bool,
     ) -> float:
-        # ── [SEMANTIC-ONLY TEST] ──────────────────────────────────────────────
-        # Ranking is driven purely by embedding cosine similarity. Every rapidfuzz /
-        # keyword-substring / metadata text-scoring signal is commented out below so
-        # we can evaluate the quality + speed of pure semantic search in isolation.
-        # Scaled ×100 so 0.40–1.0 cosine → 40–100 (keeps results above _rank's
-        # MIN_RELEVANCE=8 floor). Remove this return + uncomment below to restore hybrid.
-        base = getattr(message, "_semantic_score", 0.0) * 100.0
+        # Ranking is driven by the reciprocal-rank fusion of vector and full-text rank
+        # computed in _retrieve (see _rrf_fuse). Every rapidfuzz / keyword-substring /
+        # metadata text-scoring signal is commented out below.
+        # Scaled ×100 so the normalised 0–1 fused score → 0–100 (a top hit in either
+        # list stays well above _rank's MIN_RELEVANCE=8 floor).
+        base = getattr(message, "_relevance", 0.0) * 100.0
 
         # Recency decay: among equally relevant results, newer captures rank higher.
         # tau=365 gives a half-life of ~253 days — soft enough that a highly relevant
@@ -961,7 +1053,7 @@ Return ONLY this JSON:
         # q_lower = query.lower()
         #
         # # Semantic score (secondary to text)
-        # score += getattr(message, "_semantic_score", 0.0) * 15.0
+        # score += getattr(message, "_relevance", 0.0) * 15.0
         #
         # # Primary text score. Strip structural stopwords first ("movie list" → "movie")
         # # so the distinctive noun decides relevance, not the ubiquitous word "list".
@@ -0,0 +1,114 @@
+"""
+semantic_cache.py — In-process semantic cache for search results
+
+The Redis search cache (redis_cache.search_key) only hits on the exact same
+query string. This one also catches repeats and paraphrases: a new query whose
+embedding has cosine ≥ THRESHOLD with an earlier query from the same user (and
+the same scope — limit, date range, bucket/person hints) reuses that query's
+results, skipping LLM expansion, retrieval and ranking.
+
+Entries expire after TTL_SECONDS and are dropped for a user whenever their
+content changes (redis_cache.cache_del_user_searches calls invalidate()).
+
+Usage:
+    from services import semantic_cache
+    hit = semantic_cache.lookup(user.id, scope, query_embedding)
+    ...
+    semantic_cache.store(user.id, scope, query_embedding, result)
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+THRESHOLD     = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+TTL_SECONDS   = 300
+MAX_ENTRIES   = 1000   # across all users — least recently searched users are evicted first
+MAX_PER_USER  = 50
+
+# user_id → [(scope, unit query vector, result, expires_at)], oldest first
+_Entry = Tuple[Hashable, np.ndarray, Dict[str, Any], float]
+_store: "OrderedDict[int, List[_Entry]]" = OrderedDict()
+_size = 0
+_hits = _misses = 0
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    v = np.asarray(embedding, dtype=np.float32)
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+def lookup(user_id: int, scope: Hashable, embedding: List[float]) -> Optional[Dict[str, Any]]:
+    """Cached result of the most similar same-scope query, or None below THRESHOLD."""
+    global _hits, _misses
+    hit = _lookup(user_id, scope, embedding)
+    if hit is None:
+        _misses += 1
+    else:
+        _hits += 1
+    return hit
+
+
+def _lookup(user_id: int, scope: Hashable, embedding: List[float]) -> Optional[Dict[str, Any]]:
+    global _size
+    entries = _store.get(user_id)
+    if not entries:
+        return None
+    now = time.monotonic()
+    live = [e for e in entries if e[3] > now]
+    if len(live) != len(entries):
+        _size -= len(entries) - len(live)
+        if not live:
+            del _store[user_id]
+            return None
+        _store[user_id] = entries = live
+    _store.move_to_end(user_id)
+
+    candidates = [e for e in entries if e[0] == scope]
+    if not candidates:
+        return None
+    scores = np.stack([e[1] for e in candidates]) @ _unit(embedding)
+    best = int(scores.argmax())
+    return candidates[best][2] if scores[best] >= THRESHOLD else None
+
+
+def store(user_id: int, scope: Hashable, embedding: List[float], result: Dict[str, Any]) -> None:
+    global _size
+    entries = _store.setdefault(user_id, [])
+    entries.append((scope, _unit(embedding), result, time.monotonic() + TTL_SECONDS))
+    _size += 1
+    if len(entries) > MAX_PER_USER:
+        del entries[0]
+        _size -= 1
+    _store.move_to_end(user_id)
+
+    while _size > MAX_ENTRIES:
+        uid, oldest = next(iter(_store.items()))
+        oldest.pop(0)
+        _size -= 1
+        if not oldest:
+            del _store[uid]
+
+
+def invalidate(user_id: int) -> None:
+    global _size
+    _size -= len(_store.pop(user_id, ()))
+
+
+def stats() -> Dict[str, Any]:
+    """Counters for /health — hit rate since process start and current occupancy."""
+    total = _hits + _misses
+    return {
+        "hits":      _hits,
+        "misses":    _misses,
+        "hit_rate":  round(_hits / total, 3) if total else None,
+        "entries":   _size,
+        "users":     len(_store),
+        "threshold": THRESHOLD,
+    }
@@ -18,11 +18,36 @@ The registered DLT template must contain a single variable, e.g.:
 where MSG91_OTP_VAR_NAME == "OTP".
 """
 
+from typing import Optional
+
 import httpx
 from loguru import logger
 
 from config import Config
 
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    """Shared keep-alive client — an OTP send used to pay a fresh TLS handshake to
+    MSG91 on top of the request itself, on the user-facing login path."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=SMSService.TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+        )
+    return _client
+
+
+async def aclose_sms_client() -> None:
+    """Close the shared client — called from the FastAPI lifespan on shutdown."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
 
 class SMSService:
     """Sends OTP SMS via MSG91's Flow API. Stateless; safe to use as a singleton."""
@@ -74,8 +99,7 @@ class SMSService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.TIMEOUT_SECONDS) as client:
-                resp = await client.post(self.FLOW_URL, json=payload, headers=headers)
+            resp = await _http().post(self.FLOW_URL, json=payload, headers=headers)
         except httpx.HTTPError as e:
             logger.error("[sms] MSG91 request error: {}", e)
             raise RuntimeError("SMS send failed (network)") from e
@@ -16,6 +16,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import async_session_maker, Message, User, Category
 from cerebras_client import CerebrasClient
+from loguru import logger
 
 
 class SubtaskService:
@@ -102,7 +103,7 @@ Return ONLY JSON."""
             if response.get("is_subtask") and float(response.get("confidence", 0)) > 0.75:
                 return response
         except Exception as e:
-            print(f"[subtask] Detection failed: {e}")
+            logger.warning("[subtask] Detection failed: {}", e)
 
         return None
 
@@ -162,7 +163,7 @@ Return ONLY JSON."""
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[subtask] Add failed: {e}")
+            logger.warning("[subtask] Add failed: {}", e)
             return False
 
     # ──────────────────────────────────────────────────────────────
@@ -200,7 +201,7 @@ Return ONLY JSON."""
                 await session.commit()
             return True
         except Exception as e:
-            print(f"[subtask] Complete failed: {e}")
+            logger.warning("[subtask] Complete failed: {}", e)
             return False
 
     # ──────────────────────────────────────────────────────────────
@@ -212,31 +213,30 @@ Return ONLY JSON."""
         tags     = message.tags if isinstance(message.tags, dict) else {}
         subtasks = tags.get("subtasks", [])
 
-        text_ = f"📋 *{message.content[:60]}*\n\n"
+        header = f"📋 *{message.content[:60]}*\n\n"
         buttons = []
 
         if not subtasks:
-            text_ += "_No subtasks yet._"
-            return text_, {"inline_keyboard": buttons}
+            return header + "_No subtasks yet._", {"inline_keyboard": buttons}
 
         done_count = sum(1 for s in subtasks if s.get("done"))
-        text_ += f"_{done_count}/{len(subtasks)} completed_\n\n"
+        parts = [header, f"_{done_count}/{len(subtasks)} completed_\n\n"]
 
         for i, sub in enumerate(subtasks):
             is_done = sub.get("done", False)
             if is_done:
-                text_ += f"~✓ {sub['task'][:50]}~\n"
+                parts.append(f"~✓ {sub['task'][:50]}~\n")
             else:
-                text_ += f"• {sub['task'][:50]}\n"
+                parts.append(f"• {sub['task'][:50]}\n")
                 buttons.append([{
                     "text":          f"✓ {sub['task'][:35]}",
                     "callback_data": f"subtask:{message.id}:{i}",
                 }])
 
         if done_count == len(subtasks):
-            text_ += "\n_All subtasks complete! 🎉_"
+            parts.append("\n_All subtasks complete! 🎉_")
 
-        return text_, {"inline_keyboard": buttons}
+        return "".join(parts), {"inline_keyboard": buttons}
 
     # ──────────────────────────────────────────────────────────────
     # Helpers
@@ -12,7 +12,7 @@ import base64
 import os
 from typing import Dict, Optional
 
-import httpx
+from loguru import logger
 
 
 # ─────────────────────────────────────────────────────────────
@@ -20,6 +20,7 @@ import httpx
 # ─────────────────────────────────────────────────────────────
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_AI_STUDIO_API_KEY", "")
 
 VISION_PROMPT = """You are a search indexer for a personal knowledge base. Analyze this image.
 
@@ -42,7 +43,7 @@ async def _analyze_with_gemini(
     mime_type: str,
     model: str = "gemini-2.5-flash-lite",
 ) -> Dict:
-    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_AI_STUDIO_API_KEY", "")
+    api_key = GEMINI_API_KEY
     if not api_key:
         raise ValueError("GEMINI_API_KEY not set")
 
@@ -67,14 +68,17 @@ async def _analyze_with_gemini(
         },
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            url,
-            json=payload,
-            params={"key": api_key},
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    # Shared app-wide HTTP/2 pool (same Gemini host as the LLM + embedding calls) —
+    # a per-call client paid a fresh TLS handshake on every image
+    from cerebras_client import shared_http_client
+    resp = await shared_http_client().post(
+        url,
+        json=payload,
+        params={"key": api_key},
+        timeout=30.0,
+    )
+    resp.raise_for_status()
+    data = resp.json()
 
     # Extract text from Gemini response
     raw = data["candidates"][0]["content"]["parts"][0]["text"]
@@ -118,7 +122,7 @@ class VisionService:
             return result
 
         except Exception as e:
-            print(f"[vision] Analysis failed: {e}")
+            logger.warning("[vision] Analysis failed: {}", e)
             return {
                 "document_type":  "other",
                 "title":          "Image",